@@ -1,16 +1,55 @@
 import os
-from flask import Flask
-from flask_cors import CORS
-from dotenv import load_dotenv
-from .config import Config
-from .extensions import db, migrate
+import threading
+
+# Everything the app needs is imported inside create_app: the scraper and other
+# app.scripts CLIs import this package too, and shouldn't pay for Flask, SQLAlchemy,
+# Alembic and the engines just to run
+
+def _build_engines(app, snapshot):
+    """
+    Compile the prerequisite graph, eligibility matrices, planner, ranker and
+    timetable builder from a snapshot; each is swapped into app.extensions with a single assignment.
+    After a data change the prerequisite closure is updated from the previous graph,
+    so only the courses whose requisites changed and their dependents are recomputed.
+    """
+    from .scripts.eligibility import EligibilityEngine
+    from .scripts.planner import DegreePlanner
+    from .scripts.professor_ratings import ProfessorRanker
+    from .scripts.prereq_graph import PrerequisiteGraph
+    from .scripts.timetable import TimetableBuilder
+
+    previous = app.extensions.get("prereq_graph")
+    graph = previous.updated(snapshot.requisites) if previous is not None else PrerequisiteGraph(snapshot.requisites)
+    descriptions = {code: course["description"] for code, course in snapshot.courses.items()}
+    eligibility = EligibilityEngine(graph.requisites(), snapshot.plan, descriptions)
+    planner = DegreePlanner(snapshot.plan) if snapshot.plan is not None else None
+    ranker = ProfessorRanker(snapshot.tags, snapshot.professor_rows)
+    timetable = TimetableBuilder(snapshot.sections, ranker)
+    app.extensions.update(prereq_graph=graph, degree_plan=snapshot.plan, eligibility=eligibility,
+                          planner=planner, professor_ranker=ranker, timetable=timetable)
+    recommender = app.extensions.get("recommender")
+    if recommender is not None:
+        recommender.engine, recommender.ranker, recommender.planner = eligibility, ranker, planner
 
 def create_app():
+    from flask import Flask
+    from flask_cors import CORS
+    from dotenv import load_dotenv
+    from .config import Config
+    from .extensions import db, migrate
+    from .cache import ResultCache, data_version
+    from .data import DataStore
+    from .jobs import JobQueue
+    from . import metrics
+    from .recommendations import Recommender
+
     # Load environment variables from .env
     load_dotenv()
     app = Flask(__name__, instance_relative_config=False)
     CORS(app)
     app.config.from_object(Config)
+    # Request timing, stage histograms at /metrics and the opt-in slow request profiler
+    metrics.init_app(app)
 
     # Accept DATABASE_URL or SQLALCHEMY_DATABASE_URI
     db_url = os.getenv("DATABASE_URL") or os.getenv("SQLALCHEMY_DATABASE_URI")
@@ -25,6 +64,43 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Catalog, degree plan and ratings are read once into an in-memory snapshot;
+    # request handlers only read the snapshot and the engines compiled from it
+    data = DataStore.from_config(app.config)
+    app.extensions["data"] = data
+    _build_engines(app, data.snapshot)
+
+    # Recommendations are cached per data version; a new scrape, ratings ingest or
+    # grade refresh changes the files' fingerprint, which reloads the snapshot and
+    # empties and re-warms the cache. The reload runs on a background thread, one at
+    # a time, so the request that notices the change isn't held up by it
+    recommendation_cache = ResultCache(max_entries=app.config["RECOMMENDATION_CACHE_ENTRIES"],
+                                       max_bytes=app.config["RECOMMENDATION_CACHE_BYTES"],
+                                       ttl=app.config["RECOMMENDATION_CACHE_TTL"],
+                                       version_fn=lambda: data_version(data.paths.values()))
+    recommender = Recommender(app.extensions["eligibility"], app.extensions["professor_ranker"],
+                              app.extensions["planner"], cache=recommendation_cache)
+    app.extensions["recommender"] = recommender
+
+    rebuild_lock = threading.Lock()
+
+    def rebuild(version):
+        with rebuild_lock:
+            if version != recommendation_cache.current_version:
+                return  # the data moved again; the rebuild started for that covers this one
+            _build_engines(app, data.refresh())
+            recommender.rewarm(version)
+
+    def on_data_change(cache):
+        threading.Thread(target=rebuild, args=(cache.current_version,), daemon=True,
+                         name="data-rebuild").start()
+
+    recommendation_cache.warmer = on_data_change
+    recommender.warm()
+    app.extensions["jobs"] = JobQueue(max_workers=app.config["JOB_WORKERS"],
+                                      max_pending=app.config["JOB_QUEUE_SIZE"],
+                                      ttl=app.config["JOB_TTL"], logger=app.logger)
+
     @app.route("/ping")
     def ping():
         return "pong", 200
@@ -38,8 +114,8 @@ def create_app():
         except Exception as e:
             return {"error": str(e)}, 500
 
-    # register models
-    from . import models  # noqa
+    # register models: imported only so their tables are declared on db
+    from . import models  # noqa: F401
 
     from . import routes  # noqa
     app.register_blueprint(routes.api_bp)
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .scripts.prereq_graph import normalize_course_id
+from .scripts.professor_ratings import PREFERENCE_FIELDS, preference_key
+
+def data_version(paths):
+    """
+    Fingerprint of the data files the results are computed from: path, size and
+    modification time of each. The scraper, the ratings ingest and the grade
+    refresh all rewrite their database, so any of them changes the version.
+    """
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def normalize_preferences(preferences):
+    """
+    Onboarding preferences reduced to the fields that affect results, folded by
+    professor_ratings.preference_key() exactly as the ranker folds them, so two
+    answers share a cache entry only when they rank the same. preferredDays only
+    matters to timetables, so it isn't part of the key.
+    """
+    return dict(zip(PREFERENCE_FIELDS, preference_key(preferences)))
+
+def cache_key(courses, preferences, version, **params):
+    """
+    Canonical hash of (sorted completed courses, normalized preferences, data
+    version, extra request parameters).
+    """
+    payload = {
+        "courses": sorted({normalize_course_id(course).upper() for course in courses}),
+        "preferences": normalize_preferences(preferences),
+        "version": version,
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of JSON-serializable results with a TTL and a memory
+    bound. Entry sizes are the length of their JSON encoding, which is what the
+    route sends anyway, and the least recently used entries are evicted until
+    both max_entries and max_bytes hold.
+
+    The cache is tied to a data version. Every `check_interval` seconds the
+    version function is called again; when the version has moved, every entry
+    is dropped and the warmer, if any, refills the cache for the common profiles.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, ttl=3600,
+                 version_fn=None, check_interval=5, warmer=None):
+        """
+        :param max_entries: Entries kept at most.
+        :param max_bytes: Total JSON size of the entries kept at most.
+        :param ttl: Seconds an entry is served for.
+        :param version_fn: Returns the current data version; None for a fixed version.
+        :param check_interval: Seconds between data version checks.
+        :param warmer: Called with the cache after every invalidation to precompute entries.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.check_interval = check_interval
+        self.warmer = warmer
+        self._entries = OrderedDict()  # key -> (expires, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version = version_fn() if version_fn else None
+        self._checked = time.monotonic()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    @property
+    def version(self):
+        """
+        Current data version; see check_version().
+        """
+        return self.check_version()
+
+    def check_version(self):
+        """
+        Re-read the data version, at most every check_interval seconds. A change
+        invalidates the cache and re-runs the warmer.
+
+        :return: The current data version.
+        """
+        if self.version_fn is None or time.monotonic() - self._checked < self.check_interval:
+            return self._version
+        current = self.version_fn()
+        with self._lock:
+            self._checked = time.monotonic()
+            changed = current != self._version
+            if changed:
+                self._version = current
+                self._clear()
+                self.invalidations += 1
+        if changed and self.warmer is not None:
+            self.warmer(self)
+        return current
+
+    @property
+    def current_version(self):
+        """
+        The data version last seen, without checking for a newer one.
+        """
+        return self._version
+
+    def get(self, key):
+        """
+        The cached value, or None when missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value):
+        size = len(json.dumps(value, separators=(",", ":")))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        The cached value for key, or compute() stored under it.
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def __contains__(self, key):
+        """
+        True when key holds an unexpired entry; unlike get(), not counted as a hit or miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "version": self._version,
+            }
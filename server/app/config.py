@@ -1,6 +1,42 @@
 import os
+import tempfile
+
+# <repo>/data, where the scraped catalog and professor databases live
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     # SQLALCHEMY_DATABASE_URI will be set from env var DATABASE_URL or SQLALCHEMY_DATABASE_URI
+    CLASSES_DB_PATH = os.getenv("CLASSES_DB_PATH", os.path.join(DATA_DIR, "classes.db"))
+    PROFESSORS_DB_PATH = os.getenv("PROFESSORS_DB_PATH", os.path.join(DATA_DIR, "professors.db"))
+    # Instructor names pinned to an RMP professor id where fuzzy matching can't link them (app.scripts.name_matching)
+    NAME_OVERRIDES_PATH = os.getenv("NAME_OVERRIDES_PATH", os.path.join(DATA_DIR, "name_overrides.csv"))
+    # Grade distributions; the aggregate tables are built by `python -m app.scripts.grade_aggregates`
+    GRADES_DB_PATH = os.getenv("GRADES_DB_PATH", os.path.join(DATA_DIR, "grades.db"))
+    # JSON mapping of grade_aggregates fields to allgrades columns, e.g. '{"term": "term_name"}'
+    GRADE_COLUMNS = os.getenv("GRADE_COLUMNS", "")
+    # Course description vectors; built by `python -m app.scripts.course_similarity`
+    COURSE_VECTORS_PATH = os.getenv("COURSE_VECTORS_PATH", os.path.join(DATA_DIR, "course_vectors.npy"))
+    # Class sections with meeting times, one row per meeting (app.scripts.timetable.load_sections)
+    SECTIONS_PATH = os.getenv("SECTIONS_PATH", os.path.join(DATA_DIR, "sections.csv"))
+    # Milliseconds /api/timetable searches before returning the best schedules found
+    TIMETABLE_BUDGET_MS = int(os.getenv("TIMETABLE_BUDGET_MS", "200"))
+    DEGREE_PLAN_PATH = os.getenv("DEGREE_PLAN_PATH", os.path.join(DATA_DIR, "CE Degree Plan CSV.csv"))
+    # Read-only SQLite connections kept open per database (app.data.DataStore)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+    # Recommendation result cache (/api/recommendations)
+    RECOMMENDATION_CACHE_ENTRIES = int(os.getenv("RECOMMENDATION_CACHE_ENTRIES", "1024"))
+    RECOMMENDATION_CACHE_BYTES = int(os.getenv("RECOMMENDATION_CACHE_BYTES", str(32 * 1024 * 1024)))
+    RECOMMENDATION_CACHE_TTL = int(os.getenv("RECOMMENDATION_CACHE_TTL", "3600"))
+    # Background transcript jobs (/api/process-file?async=1)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+    JOB_TTL = int(os.getenv("JOB_TTL", "600"))
+    # Transcript batches (/api/process-files)
+    BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "500"))
+    BULK_MAX_FILE_BYTES = int(os.getenv("BULK_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+    # Sampled stack profiles of requests slower than this many milliseconds (0 turns the profiler off)
+    PROFILE_SLOW_REQUEST_MS = int(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+    PROFILE_SAMPLE_INTERVAL_MS = int(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "smartadvisors-profiles"))
@@ -0,0 +1,325 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from types import MappingProxyType
+
+from .config import Config
+
+# Default database locations, overridable through the same environment variables as Config
+CLASSES_DB_PATH = Config.CLASSES_DB_PATH
+PROFESSORS_DB_PATH = Config.PROFESSORS_DB_PATH
+NAME_OVERRIDES_PATH = Config.NAME_OVERRIDES_PATH
+GRADES_DB_PATH = Config.GRADES_DB_PATH
+DEGREE_PLAN_PATH = Config.DEGREE_PLAN_PATH
+COURSE_VECTORS_PATH = Config.COURSE_VECTORS_PATH
+SECTIONS_PATH = Config.SECTIONS_PATH
+
+# Sources in DataStore.paths that are SQLite databases and get a connection pool
+DATABASES = ("classes", "professors", "grades")
+
+# Applied to every connection. Read-only connections can't change the journal
+# mode, so WAL is switched on by the first writer (scripts) and persists in the file.
+READ_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA cache_size = -8192",        # 8 MiB page cache
+    "PRAGMA mmap_size = 67108864",      # 64 MiB memory-mapped reads
+    "PRAGMA temp_store = MEMORY",
+)
+WRITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",        # readers keep reading while a scrape writes
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8192",
+    "PRAGMA temp_store = MEMORY",
+)
+BUSY_TIMEOUT = 5.0  # seconds a connection waits on a locked database
+
+# Statement text is kept constant so sqlite3's per-connection statement cache
+# compiles each query once per pooled connection; values are always bound.
+QUERIES = {
+    "table_exists": "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+    "course_tables": "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'ClassesFor%'",
+    "courses": "SELECT Course_Num, Course_Name, Description FROM {table}",
+    "requisite_columns": "SELECT Course_Num, Pre_Requisites, Co_Requisites FROM {table}",
+}
+
+def department_table(department):
+    """
+    ClassesFor{department} with anything but letters, digits and underscores removed;
+    table names can't be bound as parameters, so this is the only place they are built.
+    """
+    return re.sub(r'[^a-zA-Z0-9_]', '', f"ClassesFor{department}")
+
+def query(name, table=None):
+    """
+    SQL text of a named query, with the sanitized table name filled in where it takes one.
+    """
+    sql = QUERIES[name]
+    return sql.format(table=department_table(table)) if table is not None else sql
+
+def connect(path, readonly=True):
+    """
+    Open a database with the shared pragmas. Read-only connections use a
+    mode=ro URI, so a missing file raises instead of creating an empty database.
+    """
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT,
+                               check_same_thread=False, cached_statements=256)
+        pragmas = READ_PRAGMAS
+    else:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        pragmas = WRITE_PRAGMAS
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+def table_exists(conn, table):
+    """
+    Works with a connection or a cursor.
+    """
+    return conn.execute(query("table_exists"), (table,)).fetchone() is not None
+
+class PoolTimeout(Exception):
+    """
+    Raised when no pooled connection frees up within the wait timeout.
+    """
+
+class ConnectionPool:
+    """
+    Bounded pool of read-only connections to one database. Connections are
+    opened on first use and handed out one caller at a time; a caller finding
+    all `size` in use waits for one to come back, up to a timeout.
+
+    Each connection carries the generation it was opened in. close() starts a
+    new generation, so connections still borrowed at that point are closed
+    when they come back instead of being reused or counted against `size`, and
+    wakes the waiting callers, who then open connections of the new generation.
+    """
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self.size = size
+        self._idle = []  # (generation, connection), most recently returned last
+        self._opened = 0
+        self._generation = 0
+        self._available = threading.Condition(threading.Lock())
+
+    @contextmanager
+    def connection(self, timeout=BUSY_TIMEOUT):
+        """
+        Borrow a connection; waits up to `timeout` seconds when all are in use,
+        then raises PoolTimeout.
+        """
+        generation, conn = self._acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self._release(generation, conn)
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    self._opened += 1
+                    generation = self._generation
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"All {self.size} connections to {os.path.basename(self.path)} "
+                                      f"stayed busy for {timeout:g}s")
+                self._available.wait(remaining)
+        try:
+            return generation, connect(self.path)
+        except BaseException:
+            with self._available:
+                if generation == self._generation:
+                    self._opened -= 1
+                    self._available.notify()
+            raise
+
+    def _release(self, generation, conn):
+        with self._available:
+            if generation == self._generation:
+                self._idle.append((generation, conn))
+                self._available.notify()
+                return
+        conn.close()
+
+    def close(self):
+        """
+        Close idle connections and start a new generation; borrowed ones are
+        closed on return, and callers waiting for a connection are woken.
+        """
+        with self._available:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+            self._opened = 0
+            self._available.notify_all()
+        for _, conn in idle:
+            conn.close()
+
+class CatalogSnapshot:
+    """
+    Immutable in-memory copy of the course catalog, the degree plan and the
+    professor ratings, read once from disk. Everything request handlers need
+    about courses and professors is served from here.
+
+    courses maps each course code to a read-only {"code", "name", "department",
+    "description", "prereqs", "coreqs"} record; professors holds the tags and
+    rows ProfessorRanker is built from. search() runs full-text queries against
+    an in-memory copy of the catalog's FTS index, kept in a shared-cache database
+    each searching thread opens its own connection to, so searches don't wait on
+    one connection and the index isn't copied per thread; similarity is the
+    memory-mapped description vector index (None until it has been built).
+    sections maps course codes to their class sections with meeting times.
+    """
+
+    def __init__(self, courses, requisites, plan, tags, professor_rows, search_db=None, similarity=None,
+                 sections=None, search_uri=None):
+        self.courses = MappingProxyType(courses)
+        self.requisites = MappingProxyType(requisites)
+        self.plan = plan
+        self.tags = tuple(tags)
+        self.professor_rows = tuple(professor_rows)
+        self._search_db = search_db  # also keeps the shared in-memory database alive
+        self._search_uri = search_uri
+        self._search_local = threading.local()
+        self.similarity = similarity
+        self.sections = MappingProxyType(sections or {})
+
+    @classmethod
+    def load(cls, classes_db=CLASSES_DB_PATH, professors_db=PROFESSORS_DB_PATH, plan_path=DEGREE_PLAN_PATH,
+             vectors_path=COURSE_VECTORS_PATH, sections_path=SECTIONS_PATH):
+        """
+        Read every source; missing files give empty sections.
+        """
+        # Imported here: the script modules use this module's connect()
+        from .scripts.course_search import create_search_tables
+        from .scripts.course_similarity import CourseSimilarity
+        from .scripts.degree_plan import load_degree_plan
+        from .scripts.prereq_graph import load_requisites, normalize_course_id
+        from .scripts.professor_ratings import load_ratings
+        from .scripts.timetable import load_sections
+
+        courses, requisites = {}, {}
+        search_db = search_uri = None
+        if os.path.exists(classes_db):
+            conn = connect(classes_db)
+            try:
+                # The full-text index is searched from a private in-memory copy of
+                # the database; a database scraped before the index existed gets it built here
+                search_uri = f"file:catalog-search-{uuid.uuid4().hex}?mode=memory&cache=shared"
+                search_db = sqlite3.connect(search_uri, uri=True, check_same_thread=False)
+                conn.backup(search_db)
+                with search_db:
+                    create_search_tables(search_db.cursor())
+                for (table,) in conn.execute(query("course_tables")).fetchall():
+                    # A department's table also holds the other subjects' courses it
+                    # requires, so the department is the code's subject, as in course_search
+                    for code, name, description in conn.execute(query("courses", table[len("ClassesFor"):])):
+                        code = normalize_course_id(code)
+                        courses[code] = {"code": code, "name": name, "department": code.split(" ")[0],
+                                         "description": description}
+                requisites = load_requisites(conn)
+            finally:
+                conn.close()
+        for code, course in courses.items():
+            prereqs, coreqs = requisites.get(code, ((), ()))
+            course["prereqs"], course["coreqs"] = tuple(sorted(prereqs)), tuple(sorted(coreqs))
+            courses[code] = MappingProxyType(course)
+
+        tags, rows = [], []
+        if os.path.exists(professors_db):
+            conn = connect(professors_db)
+            try:
+                tags, rows = load_ratings(conn)
+            finally:
+                conn.close()
+
+        plan = load_degree_plan(plan_path) if os.path.exists(plan_path) else None
+        sections = load_sections(sections_path) if os.path.exists(sections_path) else {}
+        return cls(courses, requisites, plan, tags, rows, search_db, CourseSimilarity.load(vectors_path), sections,
+                   search_uri)
+
+    def course(self, code):
+        return self.courses.get(code)
+
+    def search(self, text, limit=20, offset=0, department=None):
+        """
+        Full-text course search over the snapshot; see course_search.search_courses().
+        """
+        from .scripts.course_search import search_courses
+
+        if self._search_db is None:
+            return {"total": 0, "results": []}
+        return search_courses(self._search_connection(), text, limit=limit, offset=offset, department=department)
+
+    def _search_connection(self):
+        """
+        This thread's read-only connection to the shared in-memory search
+        database, opened on its first search. The database itself isn't copied.
+        """
+        conn = getattr(self._search_local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._search_uri, uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            self._search_local.conn = conn
+        return conn
+
+class DataStore:
+    """
+    The app's single entry point to its databases: configured paths, a pool of
+    read-only connections per database, and the current CatalogSnapshot.
+
+    refresh() builds a new snapshot off to the side and swaps the reference in
+    one assignment, so a request sees either the old snapshot or the new one,
+    never a half-loaded mix.
+    """
+
+    def __init__(self, classes_db=CLASSES_DB_PATH, professors_db=PROFESSORS_DB_PATH,
+                 grades_db=GRADES_DB_PATH, plan_path=DEGREE_PLAN_PATH, pool_size=4,
+                 vectors_path=COURSE_VECTORS_PATH, sections_path=SECTIONS_PATH):
+        self.paths = MappingProxyType({"classes": classes_db, "professors": professors_db,
+                                       "grades": grades_db, "degree_plan": plan_path,
+                                       "course_vectors": vectors_path, "sections": sections_path})
+        self.pools = {name: ConnectionPool(self.paths[name], pool_size) for name in DATABASES}
+        self._refresh_lock = threading.Lock()
+        self.snapshot = CatalogSnapshot.load(classes_db, professors_db, plan_path, vectors_path, sections_path)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config["CLASSES_DB_PATH"], config["PROFESSORS_DB_PATH"], config["GRADES_DB_PATH"],
+                   config["DEGREE_PLAN_PATH"], pool_size=config["DB_POOL_SIZE"],
+                   vectors_path=config["COURSE_VECTORS_PATH"], sections_path=config["SECTIONS_PATH"])
+
+    def connection(self, database):
+        """
+        Borrow a pooled read-only connection: `with data.connection("grades") as conn:`.
+        """
+        return self.pools[database].connection()
+
+    def exists(self, database):
+        return os.path.exists(self.paths[database])
+
+    def refresh(self):
+        """
+        Reload the snapshot from disk and swap it in. Pooled connections are
+        reopened, so they don't keep reading a replaced database file.
+        """
+        with self._refresh_lock:
+            snapshot = CatalogSnapshot.load(self.paths["classes"], self.paths["professors"], self.paths["degree_plan"],
+                                            self.paths["course_vectors"], self.paths["sections"])
+            self.snapshot = snapshot
+            for pool in self.pools.values():
+                pool.close()
+        return snapshot
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
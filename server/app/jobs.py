@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import JOB_FAILURES
+
+class QueueFull(Exception):
+    """
+    Raised by JobQueue.submit() when max_pending jobs are already queued or running.
+    """
+
+class JobQueue:
+    """
+    In-process background job queue: a bounded thread pool plus a table of job
+    records that routes poll by id. No broker is needed, so it runs the same
+    locally and on a single instance.
+
+    Job records expire `ttl` seconds after they finish. When `max_pending` jobs
+    are queued or running, submit() raises QueueFull so callers can answer 429.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, ttl=600, logger=None):
+        """
+        :param max_workers: Jobs that run at the same time.
+        :param max_pending: Jobs that may be queued or running before submit() refuses more.
+        :param ttl: Seconds a finished job's result is kept.
+        :param logger: Where failed jobs are logged with their traceback; this module's logger when None.
+        """
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.logger = logger or logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) and return the new job's id.
+        """
+        with self._lock:
+            self._purge_expired()
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs already pending")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": "queued",
+                "result": None,
+                "error": None,
+                "created": time.time(),
+                "finished": None,
+            }
+            self._pending += 1
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        with self._lock:
+            self._jobs[job_id]["status"] = "running"
+        try:
+            result, error, status = fn(*args, **kwargs), None, "done"
+        except Exception as e:
+            JOB_FAILURES.inc(getattr(fn, "__name__", type(fn).__name__))
+            self.logger.exception("Job %s failed: %s", job_id, e)
+            result, error, status = None, str(e), "failed"
+        with self._lock:
+            self._jobs[job_id].update(status=status, result=result, error=error, finished=time.time())
+            self._pending -= 1
+
+    def get(self, job_id):
+        """
+        A copy of the job record, or None if the id is unknown or has expired.
+        """
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job["finished"] is not None and job["finished"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "max_pending": self.max_pending, "tracked": len(self._jobs)}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,351 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+# Histogram bucket upper bounds in seconds, from a regex match to a slow scrape
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Metric types ---
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """
+    A monotonically increasing count per label set.
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """
+        Add `amount` to the series with these label values, given in labelnames order.
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}")
+        return lines
+
+class Histogram:
+    """
+    Observations counted into fixed buckets per label set, with their sum and count.
+    Each series is a plain list of per-bucket counts, so observe() is a scan of
+    the bucket bounds and one increment under the lock.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[:-1]) if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = (("le", _format_number(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]!r}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+class Registry:
+    """
+    The metrics of one process, rendered together in the Prometheus text format.
+    With several server processes each keeps its own registry, so /metrics
+    reports the process that answered it.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry; the scripts record their stages here whether or not the app is running
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("smartadvisors_stage_seconds",
+                                   "Time spent in named stages of transcript parsing and scraping.", ("stage",))
+STAGE_ERRORS = REGISTRY.counter("smartadvisors_stage_errors_total",
+                                "Exceptions raised out of a named stage.", ("stage",))
+REQUEST_SECONDS = REGISTRY.histogram("smartadvisors_http_request_duration_seconds",
+                                     "Request latency by route, method and status.", ("route", "method", "status"))
+REQUEST_EXCEPTIONS = REGISTRY.counter("smartadvisors_http_request_exceptions_total",
+                                      "Requests that ended in an unhandled exception.", ("route", "method"))
+SLOW_REQUESTS = REGISTRY.counter("smartadvisors_slow_requests_total",
+                                 "Requests over the profiling threshold.", ("route",))
+JOB_FAILURES = REGISTRY.counter("smartadvisors_job_failures_total",
+                                "Background jobs that raised, by job function.", ("job",))
+
+# --- Stage timers ---
+
+# Per-thread list that stage() appends to instead of the registry, see collect_stages()
+_collecting = threading.local()
+
+@contextmanager
+def stage(name):
+    """
+    Time the enclosed block into smartadvisors_stage_seconds{stage=name}; an
+    exception leaving the block is counted in smartadvisors_stage_errors_total.
+    """
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        collected = getattr(_collecting, "stages", None)
+        if collected is not None:
+            collected.append((name, elapsed, failed))
+        else:
+            STAGE_SECONDS.observe(elapsed, name)
+            if failed:
+                STAGE_ERRORS.inc(name)
+
+@contextmanager
+def collect_stages():
+    """
+    Gather the stages timed in the enclosed block as a list of (name, seconds,
+    failed) instead of recording them. Pool workers keep their own registries,
+    so they send this list back with their result for record_stages().
+    """
+    collected = []
+    previous = getattr(_collecting, "stages", None)
+    _collecting.stages = collected
+    try:
+        yield collected
+    finally:
+        _collecting.stages = previous
+
+def record_stages(stages):
+    """
+    Record stages gathered by collect_stages(), e.g. in another process. Inside
+    a collect_stages() block they are gathered there instead, like stage() does.
+    """
+    collected = getattr(_collecting, "stages", None)
+    if collected is not None:
+        collected.extend(stages)
+        return
+    for name, seconds, failed in stages:
+        STAGE_SECONDS.observe(seconds, name)
+        if failed:
+            STAGE_ERRORS.inc(name)
+
+# --- Slow request profiler ---
+
+class SlowRequestProfiler:
+    """
+    Opt-in sampling profiler for requests slower than a threshold.
+
+    While a request runs, one background thread samples its stack every
+    `interval` seconds from sys._current_frames(). When the request finishes
+    over `threshold` seconds, the samples are written to `directory` in the
+    folded-stack format flame graph tools read; faster requests' samples are
+    dropped. Only the request thread is sampled: pages parsed in the
+    transcript process pool show up as time waiting on the pool (their stage
+    timings still reach the histograms, see collect_stages()).
+    """
+
+    def __init__(self, threshold, directory, interval=0.005, max_dumps=100):
+        """
+        :param threshold: Seconds a request must take to be dumped.
+        :param directory: Where the .folded files are written.
+        :param interval: Seconds between samples.
+        :param max_dumps: Files kept in the directory; the oldest are removed first.
+        """
+        self.threshold = threshold
+        self.directory = directory
+        self.interval = interval
+        self.max_dumps = max_dumps
+        self._active = {}  # thread id -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def begin(self):
+        with self._lock:
+            self._active[threading.get_ident()] = _Tally()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def end(self, elapsed, route):
+        """
+        Stop sampling the current thread; dump its samples when `elapsed` is over the threshold.
+
+        :return: Path of the written profile, or None.
+        """
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if samples is None or elapsed < self.threshold:
+            return None
+        SLOW_REQUESTS.inc(route)
+        return self._dump(samples, elapsed, route)
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._active
+            if idle:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None and ident != own:
+                        samples[_fold(frame)] += 1
+
+    def _dump(self, samples, elapsed, route):
+        os.makedirs(self.directory, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9]+', "_", route).strip("_") or "root"
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms-{name}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        dumps = sorted(os.path.join(self.directory, entry) for entry in os.listdir(self.directory)
+                       if entry.endswith(".folded"))
+        for old in dumps[:-self.max_dumps]:
+            os.remove(old)
+        return path
+
+def _fold(frame):
+    """
+    One stack as "outermost;...;innermost" of module:function entries.
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+# --- Flask integration ---
+
+def init_app(app, registry=REGISTRY):
+    """
+    Time every request into smartadvisors_http_request_duration_seconds and serve
+    the registry at /metrics. With PROFILE_SLOW_REQUEST_MS set, requests over
+    that many milliseconds get a sampled profile in PROFILE_DIR.
+    """
+    threshold_ms = app.config.get("PROFILE_SLOW_REQUEST_MS", 0)
+    profiler = None
+    if threshold_ms:
+        profiler = SlowRequestProfiler(threshold_ms / 1000, app.config["PROFILE_DIR"],
+                                       interval=app.config.get("PROFILE_SAMPLE_INTERVAL_MS", 5) / 1000)
+    app.extensions["metrics"] = registry
+    app.extensions["profiler"] = profiler
+
+    def route():
+        rule = request.url_rule
+        return rule.rule if rule is not None else "<unmatched>"
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        if profiler is not None:
+            profiler.begin()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            REQUEST_SECONDS.observe(elapsed, route(), request.method, str(response.status_code))
+            if profiler is not None:
+                path = profiler.end(elapsed, route())
+                if path is not None:
+                    app.logger.warning("Slow request %s %s took %.0f ms, profile written to %s",
+                                       request.method, request.path, elapsed * 1000, path)
+        return response
+
+    @app.teardown_request
+    def count_exception(exc):
+        if exc is not None:
+            REQUEST_EXCEPTIONS.inc(route(), request.method)
+        if profiler is not None:
+            profiler.end(0, route())  # no-op unless after_request was skipped
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,112 @@
+import itertools
+
+from .cache import ResultCache, cache_key
+from .scripts.degree_plan import is_placeholder
+
+# The onboarding screen's answers; every combination is warmed
+ASSESSMENT_TYPES = ("Test Heavy", "Assignment Heavy")
+ATTENDANCE = ("Required", "Not Required")
+CLASS_SIZES = ("Small", "Medium", "Large")
+
+DEFAULT_SCOPE = "plan"
+DEFAULT_PROFESSORS_PER_COURSE = 3
+
+class Recommender:
+    """
+    Next-course recommendations: the courses a student can take next, each with
+    the professors that best match their preferences.
+
+    Results are cached by (completed courses, preferences, data version), since
+    a cohort uploads nearly the same transcripts and picks from a few preference
+    combinations. When the data version moves the cache is emptied and re-warmed
+    with the freshman and sophomore profiles of the degree plan.
+
+    Keys carry `version`, the data version the current engines were built from,
+    rather than the cache's latest one; while the app rebuilds engines for new
+    data in the background, answers from the old engines stay under the old version.
+    """
+
+    def __init__(self, engine, ranker, planner=None, cache=None, warm_semesters=4):
+        """
+        :param engine: EligibilityEngine.
+        :param ranker: ProfessorRanker.
+        :param planner: DegreePlanner used to derive the profiles to warm, or None.
+        :param cache: ResultCache; a default-sized one when None.
+        :param warm_semesters: Semesters of the fresh-student plan to warm profiles for.
+        """
+        self.engine = engine
+        self.ranker = ranker
+        self.planner = planner
+        self.warm_semesters = warm_semesters
+        self.cache = cache if cache is not None else ResultCache()
+        self.version = self.cache.current_version
+        self.cache.warmer = lambda cache: self.rewarm(cache.current_version)
+
+    def compute(self, completed, preferences=None, scope=DEFAULT_SCOPE, k=DEFAULT_PROFESSORS_PER_COURSE):
+        """
+        Uncached recommendations.
+
+        :return: {"recommendations": [{"course", "name", "professors": [...]}],
+                  "completed": [...], "blocked": [{"course", "missing"}]}
+        """
+        result = self.engine.evaluate(completed, scope=scope)
+        return {
+            "recommendations": [
+                {"course": code,
+                 "name": self.engine.names.get(code),
+                 "professors": self.ranker.rank(preferences, course=code, k=k)}
+                for code in result["eligible"]
+            ],
+            "completed": result["completed"],
+            "blocked": result["blocked"],
+        }
+
+    def recommend(self, completed, preferences=None, scope=DEFAULT_SCOPE, k=DEFAULT_PROFESSORS_PER_COURSE):
+        """
+        Cached compute().
+        """
+        self.cache.check_version()
+        key = cache_key(completed, preferences, self.version, scope=scope, k=k)
+        return self.cache.get_or_compute(key, lambda: self.compute(completed, preferences, scope=scope, k=k))
+
+    def common_profiles(self):
+        """
+        Completed-course sets of an on-track student before each of the first
+        warm_semesters semesters of the fresh-student plan (incoming freshman
+        through second-semester sophomore).
+        """
+        if self.planner is None:
+            return [[]]
+        profiles = [[]]
+        completed = []
+        for semester in self.planner.plan([])["semesters"][:self.warm_semesters - 1]:
+            completed = completed + [course["code"] for course in semester["courses"] if not is_placeholder(course["code"])]
+            profiles.append(sorted(completed))
+        return profiles
+
+    def warm(self):
+        """
+        Precompute the common profiles under every onboarding preference combination.
+
+        :return: Number of entries computed.
+        """
+        computed = 0
+        for completed in self.common_profiles():
+            for assessment, attendance, size in itertools.product(ASSESSMENT_TYPES, ATTENDANCE, CLASS_SIZES):
+                preferences = {"assessmentType": assessment, "attendanceRequired": attendance, "classSize": size}
+                key = cache_key(completed, preferences, self.version, scope=DEFAULT_SCOPE, k=DEFAULT_PROFESSORS_PER_COURSE)
+                if key not in self.cache:
+                    self.cache.put(key, self.compute(completed, preferences))
+                    computed += 1
+        return computed
+
+    def rewarm(self, version):
+        """
+        Adopt the data version the engines now reflect, drop entries of older
+        versions and warm the common profiles again.
+
+        :return: Number of entries computed.
+        """
+        self.version = version
+        self.cache.clear()
+        return self.warm()
@@ -1,13 +1,44 @@
-import os
-from flask import Blueprint, request, jsonify
-from .scripts.parse_transcript import extract_all_courses
+import io
+import json
+import sqlite3
+import zipfile
+from functools import partial
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from .data import PoolTimeout
+from .jobs import QueueFull
+from .metrics import stage
+from .recommendations import DEFAULT_PROFESSORS_PER_COURSE
+from .scripts.grade_aggregates import course_grades, term_grades
+from .scripts.parse_transcript import extract_all_courses, extract_batch
+from .scripts.planner import DEFAULT_CREDIT_CAP
+from .scripts.professor_ratings import PREFERENCE_FIELDS
+from .scripts.prereq_graph import normalize_course_id
+from .scripts.timetable import DEFAULT_SCHEDULES
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+def _preferences_error(preferences):
+    """
+    Why an onboarding preferences object can't be used, or None when it can.
+    Unrecognized answers are allowed (they don't steer the ranking); wrong types aren't.
+    """
+    if not isinstance(preferences, dict):
+        return "preferences must be an object"
+    for field in PREFERENCE_FIELDS:
+        if preferences.get(field) is not None and not isinstance(preferences[field], str):
+            return f"preferences.{field} must be a string"
+    days = preferences.get("preferredDays")
+    if days is not None and (not isinstance(days, list) or not all(isinstance(day, str) for day in days)):
+        return "preferences.preferredDays must be a list of day names"
+    return None
+
 @api_bp.route("/process-file", methods=["POST"])
 def process_file():
     """
     Receives a PDF file from the frontend, parses it, and returns a list of course codes.
+
+    With ?async=1 the file is parsed in the background instead: the response is
+    202 with a job id to poll at /api/jobs/<id>, or 429 when the job queue is full.
     """
     if 'file' not in request.files:
         return jsonify({"error": "No file part in the request"}), 400
@@ -16,16 +47,352 @@ def process_file():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    # Save temporarily
-    tmp_path = os.path.join("/tmp", file.filename)
-    file.save(tmp_path)
+    with stage("upload.read"):
+        data = file.read()
+    if request.args.get("async", "").lower() in ("1", "true", "yes"):
+        try:
+            job_id = current_app.extensions["jobs"].submit(extract_all_courses, data)
+        except QueueFull:
+            response = jsonify({"error": "Too many transcripts are being processed, try again shortly"})
+            response.headers["Retry-After"] = "5"
+            return response, 429
+        return jsonify({"job_id": job_id, "status_url": f"/api/jobs/{job_id}"}), 202
+
+    # Parsed from memory; identical uploads are answered from the transcript cache
+    courses = extract_all_courses(data)
+
+    return jsonify({"output": courses}), 200
+
+def _detach(upload):
+    """
+    Take an uploaded file's stream away from the request. Flask closes the
+    request's files as soon as the view returns, before a streamed response reads them.
+    """
+    stream, upload.stream = upload.stream, io.BytesIO()
+    return stream
+
+def _read_member(archive, info, max_bytes):
+    if info.file_size > max_bytes:
+        raise ValueError(f"File is larger than {max_bytes} bytes")
+    with archive.open(info) as member:
+        data = member.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"File is larger than {max_bytes} bytes")
+    return data
+
+def _read_upload(stream, max_bytes):
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"File is larger than {max_bytes} bytes")
+    return data
+
+@api_bp.route("/process-files", methods=["POST"])
+def process_files():
+    """
+    Parses a batch of transcripts: a ZIP of PDFs in "archive", or several PDFs in
+    "files". Archive members are read straight from the upload, never extracted.
+
+    The response is NDJSON, one line per transcript written as soon as it is
+    parsed (so in completion order, with "index" giving the input position):
+    {"index", "file", "courses", "error"}. A transcript that can't be read or
+    parsed gets an "error" and an empty course list; the rest of the batch goes on.
+    """
+    max_files = current_app.config["BULK_MAX_FILES"]
+    max_bytes = current_app.config["BULK_MAX_FILE_BYTES"]
+
+    if "archive" in request.files:
+        try:
+            archive = zipfile.ZipFile(request.files["archive"].stream)
+        except zipfile.BadZipFile:
+            return jsonify({"error": "'archive' is not a ZIP file"}), 400
+        members = [info for info in archive.infolist()
+                   if not info.is_dir() and not info.filename.startswith("__MACOSX/")]
+        transcripts = [(info.filename, partial(_read_member, archive, info, max_bytes)) for info in members]
+    else:
+        uploads = [upload for upload in request.files.getlist("files") if upload.filename]
+        transcripts = [(upload.filename, partial(_read_upload, upload.stream, max_bytes)) for upload in uploads]
+
+    if not transcripts:
+        return jsonify({"error": "Expected a ZIP in 'archive' or PDFs in 'files'"}), 400
+    if len(transcripts) > max_files:
+        return jsonify({"error": f"At most {max_files} transcripts per batch"}), 413
+
+    streams = [_detach(upload) for _, upload in request.files.items(multi=True)]
+
+    def generate():
+        try:
+            for result in extract_batch(transcripts):
+                yield json.dumps(result) + "\n"
+        finally:
+            for stream in streams:
+                stream.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@api_bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    Status of a background transcript job: queued, running, done (with the
+    course list in "output") or failed (with "error").
+    """
+    job = current_app.extensions["jobs"].get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    body = {"job_id": job_id, "status": job["status"]}
+    if job["status"] == "done":
+        body["output"] = job["result"]
+    elif job["status"] == "failed":
+        body["error"] = job["error"]
+    return jsonify(body), 200
+
+@api_bp.route("/courses/search", methods=["GET"])
+def search_courses():
+    """
+    Full-text search over course codes, names and descriptions, best match first.
+    The last word matches as a prefix ("fluid mech").
+
+    ?q=<text>&page=1&per_page=20, optionally &department=CE
+    """
+    text = request.args.get("q", "").strip()
+    if not text:
+        return jsonify({"error": "Expected a search query in 'q'"}), 400
+
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 20, type=int)
+    if page is None or page < 1 or per_page is None or not 1 <= per_page <= 100:
+        return jsonify({"error": "page must be >= 1 and per_page between 1 and 100"}), 400
+
+    snapshot = current_app.extensions["data"].snapshot
+    found = snapshot.search(text, limit=per_page, offset=(page - 1) * per_page,
+                            department=request.args.get("department"))
+    return jsonify({"query": text, "page": page, "per_page": per_page, **found}), 200
+
+@api_bp.route("/courses/<path:course_code>", methods=["GET"])
+def course_detail(course_code):
+    """
+    Returns a course's catalog entry (name, department, description and direct
+    requisites) from the in-memory catalog snapshot.
+    """
+    course = current_app.extensions["data"].snapshot.course(normalize_course_id(course_code))
+    if course is None:
+        return jsonify({"error": f"Unknown course: {course_code}"}), 404
+    return jsonify(dict(course)), 200
+
+@api_bp.route("/courses/<path:course_code>/chain", methods=["GET"])
+def course_chain(course_code):
+    """
+    Returns the full prerequisite chain of a course: everything it ultimately
+    depends on (upstream) and everything that ultimately depends on it (downstream).
+    """
+    graph = current_app.extensions["prereq_graph"]
+    code = normalize_course_id(course_code)
+    if code not in graph:
+        return jsonify({"error": f"Unknown course: {course_code}"}), 404
+
+    return jsonify({
+        "course": code,
+        "prerequisites": sorted(graph.prerequisites(code)),
+        "corequisites": sorted(graph.corequisites(code)),
+        "upstream": sorted(graph.upstream(code)),
+        "downstream": sorted(graph.downstream(code)),
+        "depth": graph.depth(code),
+    }), 200
+
+@api_bp.route("/courses/<path:course_code>/similar", methods=["GET"])
+def similar_courses(course_code):
+    """
+    Returns the courses whose descriptions are closest to this one's, best first,
+    from the precomputed description vectors.
+
+    ?k=10, optionally &department=CE to suggest electives within one subject.
+    """
+    snapshot = current_app.extensions["data"].snapshot
+    if snapshot.similarity is None:
+        return jsonify({"error": "The course similarity index has not been built"}), 503
+
+    k = request.args.get("k", 10, type=int)
+    if k is None or not 1 <= k <= 50:
+        return jsonify({"error": "k must be between 1 and 50"}), 400
+
+    code = normalize_course_id(course_code)
+    found = snapshot.similarity.similar(code, k=k, department=request.args.get("department"))
+    if found is None:
+        return jsonify({"error": f"Unknown course: {course_code}"}), 404
 
-    courses = extract_all_courses(tmp_path)
+    similar = []
+    for similar_code, score in found:
+        course = snapshot.course(similar_code)
+        similar.append({"code": similar_code, "name": course["name"] if course else None,
+                        "department": similar_code.split(" ")[0], "score": score})
+    return jsonify({"course": code, "similar": similar}), 200
 
-    # Remove the temp file
+@api_bp.route("/courses/<path:course_code>/grades", methods=["GET"])
+def course_grade_distribution(course_code):
+    """
+    Returns the precomputed grade summary of a course (GPA, A-rate, DFW-rate,
+    section counts) overall and per instructor, plus the per-term breakdown.
+
+    ?instructor=<name> restricts the per-term breakdown to one instructor.
+    """
+    parts = normalize_course_id(course_code).split(" ")
+    if len(parts) != 2:
+        return jsonify({"error": f"Expected a course code like 'CE 3305', got: {course_code}"}), 400
+    subject, number = parts
+
+    data = current_app.extensions["data"]
+    if not data.exists("grades"):
+        return jsonify({"error": "No grade data is loaded"}), 503
     try:
-        os.remove(tmp_path)
-    except Exception:
-        pass
+        with data.connection("grades") as conn:
+            summary = course_grades(conn, subject, number)
+            terms = term_grades(conn, subject, number, request.args.get("instructor")) if summary else []
+    except PoolTimeout as e:
+        return jsonify({"error": f"Grade data is busy: {e}"}), 503
+    except sqlite3.OperationalError:
+        return jsonify({"error": "Grade aggregates have not been built"}), 503
 
-    return jsonify({"output": courses}), 200
+    if summary is None:
+        return jsonify({"error": f"No grade data for {subject} {number}"}), 404
+    return jsonify({"course": f"{subject} {number}", **summary, "by_term": terms}), 200
+
+@api_bp.route("/eligible-courses", methods=["POST"])
+def eligible_courses():
+    """
+    Takes the completed course list returned by /api/process-file and returns the
+    courses the student can take next, the blocked ones with what is missing,
+    and the courses already completed.
+
+    Body: {"courses": ["CE 1105", ...], "scope": "catalog" | "plan"}
+    """
+    data = request.get_json(silent=True) or {}
+    courses = data.get("courses")
+    if not isinstance(courses, list) or not all(isinstance(course, str) for course in courses):
+        return jsonify({"error": "Expected a JSON body with a 'courses' list of course codes"}), 400
+
+    scope = data.get("scope", "catalog")
+    if scope not in ("catalog", "plan"):
+        return jsonify({"error": "scope must be 'catalog' or 'plan'"}), 400
+
+    return jsonify(current_app.extensions["eligibility"].evaluate(courses, scope=scope)), 200
+
+@api_bp.route("/degree-plan", methods=["POST"])
+def degree_plan():
+    """
+    Takes the completed course list returned by /api/process-file and lays out the
+    rest of the degree plan semester by semester under a credit cap.
+
+    Body: {"courses": ["CE 1105", ...], "credit_cap": 15}
+    """
+    planner = current_app.extensions["planner"]
+    if planner is None:
+        return jsonify({"error": "No degree plan is loaded"}), 503
+
+    data = request.get_json(silent=True) or {}
+    courses = data.get("courses")
+    if not isinstance(courses, list) or not all(isinstance(course, str) for course in courses):
+        return jsonify({"error": "Expected a JSON body with a 'courses' list of course codes"}), 400
+
+    credit_cap = data.get("credit_cap", DEFAULT_CREDIT_CAP)
+    if not isinstance(credit_cap, int) or isinstance(credit_cap, bool) or not 3 <= credit_cap <= 30:
+        return jsonify({"error": "credit_cap must be an integer between 3 and 30"}), 400
+
+    return jsonify(planner.plan(courses, credit_cap=credit_cap)), 200
+
+@api_bp.route("/professors/rank", methods=["POST"])
+def rank_professors():
+    """
+    Ranks the professors for a course or department against the student's
+    onboarding preferences and returns the top k.
+
+    Body: {"course": "CE 3305"} or {"department": "Mathematics"},
+          plus optional "preferences" {assessmentType, attendanceRequired, classSize} and "k" (default 10)
+    """
+    data = request.get_json(silent=True) or {}
+    course, department = data.get("course"), data.get("department")
+    if not isinstance(course, str) and not isinstance(department, str):
+        return jsonify({"error": "Expected a 'course' or 'department' string"}), 400
+
+    preferences = data.get("preferences") or {}
+    error = _preferences_error(preferences)
+    if error:
+        return jsonify({"error": error}), 400
+
+    k = data.get("k", 10)
+    if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= 100:
+        return jsonify({"error": "k must be an integer between 1 and 100"}), 400
+
+    ranker = current_app.extensions["professor_ranker"]
+    professors = ranker.rank(preferences, department=department, course=course, k=k)
+    return jsonify({"professors": professors}), 200
+
+@api_bp.route("/timetable", methods=["POST"])
+def timetable():
+    """
+    Builds the best conflict-free weekly schedules taking one section of each
+    course, scored by the student's preferred days and class size and by how the
+    sections' professors rank under their preferences.
+
+    Body: {"courses": ["CE 3305", ...], "preferences": {preferredDays, classSize, ...},
+           "n": 5, "strict_days": false, "include_full": false}
+    """
+    builder = current_app.extensions["timetable"]
+    if not builder.sections:
+        return jsonify({"error": "No section data is loaded"}), 503
+
+    data = request.get_json(silent=True) or {}
+    courses = data.get("courses")
+    if (not isinstance(courses, list) or not all(isinstance(course, str) for course in courses)
+            or not 1 <= len(courses) <= 10):
+        return jsonify({"error": "Expected a JSON body with a 'courses' list of 1 to 10 course codes"}), 400
+
+    preferences = data.get("preferences") or {}
+    error = _preferences_error(preferences)
+    if error:
+        return jsonify({"error": error}), 400
+
+    n = data.get("n", DEFAULT_SCHEDULES)
+    if not isinstance(n, int) or isinstance(n, bool) or not 1 <= n <= 20:
+        return jsonify({"error": "n must be an integer between 1 and 20"}), 400
+
+    result = builder.build(courses, preferences, n=n, strict_days=bool(data.get("strict_days")),
+                           include_full=bool(data.get("include_full")),
+                           budget_ms=current_app.config["TIMETABLE_BUDGET_MS"])
+    return jsonify(result), 200
+
+@api_bp.route("/recommendations", methods=["POST"])
+def recommendations():
+    """
+    Takes the completed course list returned by /api/process-file and the
+    onboarding preferences, and returns the courses to take next with the best
+    matching professors for each. Answers are cached per course set and preferences.
+
+    Body: {"courses": ["CE 1105", ...], "preferences": {...}, "scope": "plan" | "catalog", "k": 3}
+    """
+    data = request.get_json(silent=True) or {}
+    courses = data.get("courses")
+    if not isinstance(courses, list) or not all(isinstance(course, str) for course in courses):
+        return jsonify({"error": "Expected a JSON body with a 'courses' list of course codes"}), 400
+
+    preferences = data.get("preferences") or {}
+    error = _preferences_error(preferences)
+    if error:
+        return jsonify({"error": error}), 400
+
+    scope = data.get("scope", "plan")
+    if scope not in ("catalog", "plan"):
+        return jsonify({"error": "scope must be 'catalog' or 'plan'"}), 400
+
+    k = data.get("k", DEFAULT_PROFESSORS_PER_COURSE)
+    if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= 20:
+        return jsonify({"error": "k must be an integer between 1 and 20"}), 400
+
+    recommender = current_app.extensions["recommender"]
+    return jsonify(recommender.recommend(courses, preferences, scope=scope, k=k)), 200
+
+@api_bp.route("/recommendations/cache", methods=["GET"])
+def recommendation_cache_stats():
+    """
+    Hit/miss counters, size and data version of the recommendation cache.
+    """
+    return jsonify(current_app.extensions["recommender"].cache.stats()), 200
@@ -1,11 +1,24 @@
-import pandas as pd
-import sqlite3
-department = "CE"
-db_path = "SmartAdvisors/data/classes.db"
-    
-db = sqlite3.connect(db_path)
-cur = db.cursor()
-
-cur.execute(f"SELECT * FROM ClassesFor{department}")
-data = cur.fetchall()
-print(data)
+import argparse
+
+from ..data import CLASSES_DB_PATH, connect, query
+
+def department_courses(department, db_path=CLASSES_DB_PATH):
+    """
+    (Course_Num, Course_Name, Description) rows of one department's table.
+    """
+    conn = connect(db_path)
+    try:
+        return conn.execute(query("courses", department)).fetchall()
+    finally:
+        conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the scraped courses of a department.")
+    parser.add_argument("department", nargs="?", default="CE")
+    parser.add_argument("--db", default=CLASSES_DB_PATH, help="Path to classes.db.")
+    args = parser.parse_args(argv)
+    print(department_courses(args.department.upper(), args.db))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+import argparse
+import re
+import time
+
+from ..data import CLASSES_DB_PATH, connect, query, table_exists
+from .prereq_graph import normalize_course_id
+
+# Words of a search query: letters and digits, so FTS5 operators and quotes in user input are dropped
+QUERY_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+# "CE 33", "ce3305": a subject and the start of a course number, searched in Course_Num only
+COURSE_CODE_QUERY_RE = re.compile(r'^\s*([A-Za-z]{2,4})[\s\u00A0-]*(\d{1,4})\s*$')
+
+# bm25() weights of the indexed columns: a hit in the code or name outranks one in the description
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+MAX_QUERY_TOKENS = 8
+
+# --- Schema ---
+
+def create_search_tables(cur):
+    """
+    Courses holds one row per course across every department, keyed by the
+    normalized course id; CourseSearch is an FTS5 index over it kept in sync by
+    triggers, so any write to Courses updates the index in the same transaction.
+    When the tables are new they are backfilled from every ClassesFor{dept} table.
+    """
+    exists = table_exists(cur, "Courses")
+    cur.execute("""CREATE TABLE IF NOT EXISTS Courses(
+                                    Course_Num VARCHAR(10) NOT NULL PRIMARY KEY,
+                                    Department VARCHAR(10) NOT NULL,
+                                    Course_Name VARCHAR(100) NOT NULL,
+                                    Description VARCHAR(1000)
+                                    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_courses_department ON Courses(Department)")
+    # External-content index: the text lives once, in Courses. Prefix indexes make
+    # "flu*" and "33*" lookups index scans instead of full term scans.
+    cur.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS CourseSearch USING fts5(
+                                    Course_Num, Course_Name, Description,
+                                    content='Courses', content_rowid='rowid',
+                                    tokenize='unicode61 remove_diacritics 2',
+                                    prefix='2 3 4'
+                                    )""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS courses_search_insert AFTER INSERT ON Courses BEGIN
+                       INSERT INTO CourseSearch(rowid, Course_Num, Course_Name, Description)
+                       VALUES (new.rowid, new.Course_Num, new.Course_Name, new.Description);
+                   END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS courses_search_delete AFTER DELETE ON Courses BEGIN
+                       INSERT INTO CourseSearch(CourseSearch, rowid, Course_Num, Course_Name, Description)
+                       VALUES ('delete', old.rowid, old.Course_Num, old.Course_Name, old.Description);
+                   END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS courses_search_update AFTER UPDATE ON Courses BEGIN
+                       INSERT INTO CourseSearch(CourseSearch, rowid, Course_Num, Course_Name, Description)
+                       VALUES ('delete', old.rowid, old.Course_Num, old.Course_Name, old.Description);
+                       INSERT INTO CourseSearch(rowid, Course_Num, Course_Name, Description)
+                       VALUES (new.rowid, new.Course_Num, new.Course_Name, new.Description);
+                   END""")
+    if not exists:
+        backfill_courses(cur)
+
+def backfill_courses(cur):
+    """
+    Fill Courses (and through the triggers, CourseSearch) from every ClassesFor{dept} table.
+    """
+    cur.execute(query("course_tables"))
+    for (table,) in cur.fetchall():
+        cur.execute(query("courses", table[len("ClassesFor"):]))
+        for course_num, name, description in cur.fetchall():
+            upsert_course(cur, course_num, name, description)
+
+def upsert_course(cur, course_num, name, description):
+    """
+    Insert or update one course; the department is the course id's subject ("MATH 1426" -> MATH).
+    """
+    course_num = normalize_course_id(course_num)
+    cur.execute("""
+        INSERT INTO Courses (Course_Num, Department, Course_Name, Description) VALUES (?, ?, ?, ?)
+        ON CONFLICT(Course_Num) DO UPDATE SET
+            Department = excluded.Department, Course_Name = excluded.Course_Name, Description = excluded.Description
+        WHERE Course_Name IS NOT excluded.Course_Name OR Description IS NOT excluded.Description
+    """, (course_num, course_num.split(" ")[0], name, description))
+
+def delete_course(cur, course_num):
+    cur.execute("DELETE FROM Courses WHERE Course_Num = ?", (normalize_course_id(course_num),))
+
+# --- Search ---
+
+def match_expression(text):
+    """
+    FTS5 MATCH expression for a user query: every word must match, the last one
+    as a prefix so results show up while the student is still typing.
+    "fluid mech" -> '"fluid" "mech"*'. A course code prefix is matched against
+    the code column only: "CE 33" -> 'Course_Num : ("CE" "33"*)'. None when the
+    query has no words.
+    """
+    code = COURSE_CODE_QUERY_RE.match(text or "")
+    if code:
+        return f'Course_Num : ("{code.group(1)}" "{code.group(2)}"*)'
+    tokens = QUERY_TOKEN_RE.findall(text or "")[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def search_courses(conn, text, limit=20, offset=0, department=None):
+    """
+    BM25-ranked courses matching `text`.
+
+    :param department: Only courses of this subject ("CE").
+    :return: {"total": matches, "results": [{"code", "department", "name", "description", "score"}]}
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return {"total": 0, "results": []}
+
+    where = "CourseSearch MATCH ?"
+    params = [expression]
+    if department:
+        where += " AND c.Department = ?"
+        params.append(department.upper())
+
+    total = conn.execute(f"""
+        SELECT COUNT(*) FROM CourseSearch JOIN Courses AS c ON c.rowid = CourseSearch.rowid WHERE {where}
+    """, params).fetchone()[0]
+    rows = conn.execute(f"""
+        SELECT c.Course_Num, c.Department, c.Course_Name, c.Description, bm25(CourseSearch, ?, ?, ?) AS score
+        FROM CourseSearch JOIN Courses AS c ON c.rowid = CourseSearch.rowid
+        WHERE {where}
+        ORDER BY score, c.Course_Num
+        LIMIT ? OFFSET ?
+    """, [*BM25_WEIGHTS, *params, limit, offset]).fetchall()
+    return {
+        "total": total,
+        "results": [
+            {"code": code, "department": department, "name": name, "description": description,
+             "score": round(-score, 4)}  # bm25() is lower-is-better; flip it for readers
+            for code, department, name, description, score in rows
+        ],
+    }
+
+def build_search_index(db_path=CLASSES_DB_PATH):
+    """
+    Create Courses and CourseSearch in a classes database and fill them.
+
+    :return: Number of courses indexed.
+    """
+    conn = connect(db_path, readonly=False)
+    try:
+        with conn:
+            cur = conn.cursor()
+            create_search_tables(cur)
+            backfill_courses(cur)
+            cur.execute("INSERT INTO CourseSearch(CourseSearch) VALUES ('optimize')")
+        return conn.execute("SELECT COUNT(*) FROM Courses").fetchone()[0]
+    finally:
+        conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the full-text course search index.")
+    parser.add_argument("query", nargs="?", help="Search instead of building.")
+    parser.add_argument("--db", default=CLASSES_DB_PATH, help="Path to classes.db.")
+    args = parser.parse_args(argv)
+
+    if args.query is None:
+        print(f"Indexed {build_search_index(args.db)} courses in {args.db}")
+        return 0
+
+    conn = connect(args.db)
+    try:
+        start = time.perf_counter()
+        found = search_courses(conn, args.query)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    for course in found["results"]:
+        print(f"{course['score']:8.3f}  {course['code']:<10} {course['name']}")
+    print(f"{found['total']} match(es) in {elapsed * 1000:.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from ..data import CLASSES_DB_PATH, COURSE_VECTORS_PATH, connect, query, table_exists
+from .prereq_graph import normalize_course_id
+
+# The requisite sentences name other courses, not what this one is about
+REQUISITE_SPLIT_RE = re.compile(r'\b(?:Prerequisites?|Corequisites?)\b', re.IGNORECASE)
+
+EMBED_BATCH_SIZE = 256
+DEFAULT_K = 10
+
+# --- Files ---
+# course_vectors.npy holds one L2-normalized float32 row per course; the JSON
+# sidecar next to it lists the course code and text hash of every row, and the
+# identity (inode, size, mtime) of the matrix file it was written with.
+
+def _file_identity(stat):
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+def metadata_path(vectors_path):
+    return os.path.splitext(vectors_path)[0] + ".json"
+
+def _read_index(vectors_path, mmap_mode="r"):
+    """
+    (metadata, matrix) of a built index, or None when it is missing or the two
+    files weren't written together (e.g. read halfway through a rebuild). The
+    matrix file is stat'ed before and after it is mapped, so a swap in between
+    is noticed too.
+    """
+    meta_path = metadata_path(vectors_path)
+    try:
+        before = os.stat(vectors_path)
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    matrix = np.load(vectors_path, mmap_mode=mmap_mode)
+    identity = _file_identity(before)
+    # Sidecars from before the identity was recorded are checked by shape alone
+    if meta.get("matrix", identity) != identity or _file_identity(os.stat(vectors_path)) != identity:
+        return None
+    if matrix.dtype != np.float32 or matrix.shape != (len(meta["codes"]), meta["dim"]):
+        return None
+    return meta, matrix
+
+def _write_index(vectors_path, codes, hashes, matrix, model):
+    """
+    Replace both files. Both are written to temporary files first; the sidecar
+    records the new matrix file's identity, which os.replace keeps, so a reader
+    between the two swaps sees a mismatch rather than new codes over old rows.
+    The matrix is swapped in last, so its mtime marks a finished build; os.replace
+    leaves servers that mapped the old matrix reading it intact.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(vectors_path)), exist_ok=True)
+    meta_path = metadata_path(vectors_path)
+    with open(vectors_path + ".tmp", "wb") as f:
+        np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+    identity = _file_identity(os.stat(vectors_path + ".tmp"))
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"model": model, "dim": int(matrix.shape[1]), "codes": codes, "hashes": hashes,
+                   "matrix": identity}, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    os.replace(vectors_path + ".tmp", vectors_path)
+
+# --- Build ---
+
+def embedding_text(name, description):
+    """
+    Course name plus the description up to its requisite sentences.
+    """
+    description = REQUISITE_SPLIT_RE.split(description or "", 1)[0]
+    return f"{name}. {description}".strip()
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def catalog_courses(conn):
+    """
+    [(code, name, description)] of every course, sorted by code: from Courses when
+    the search index has been built, else from the ClassesFor{dept} tables.
+    """
+    courses = {}
+    if table_exists(conn, "Courses"):
+        rows = conn.execute("SELECT Course_Num, Course_Name, Description FROM Courses").fetchall()
+    else:
+        rows = []
+        for (table,) in conn.execute(query("course_tables")).fetchall():
+            rows.extend(conn.execute(query("courses", table[len("ClassesFor"):])).fetchall())
+    for code, name, description in rows:
+        courses.setdefault(normalize_course_id(code), (name, description))
+    return [(code, name, description) for code, (name, description) in sorted(courses.items())]
+
+def embed(texts, nlp):
+    """
+    L2-normalized mean word vectors of each text, as a float32 matrix. Only the
+    tokenizer runs: en_core_web_lg's static vectors need no other pipeline step.
+    A text without any known word gets a zero row.
+    """
+    dim = nlp.vocab.vectors_length
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, doc in enumerate(nlp.tokenizer.pipe(texts, batch_size=EMBED_BATCH_SIZE)):
+        matrix[i] = doc.vector
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+def build_vectors(db_path=CLASSES_DB_PATH, vectors_path=COURSE_VECTORS_PATH, nlp=None, full=False):
+    """
+    Embed every course description into the vector index. Rows whose name and
+    description hash is unchanged since the last build are copied over; only
+    new and changed courses are embedded.
+
+    :param nlp: spaCy pipeline with word vectors; defaults to the scraper's en_core_web_lg.
+    :param full: Re-embed every course.
+    :return: (courses indexed, courses embedded)
+    """
+    conn = connect(db_path)
+    try:
+        courses = catalog_courses(conn)
+    finally:
+        conn.close()
+
+    codes = [code for code, _, _ in courses]
+    texts = [embedding_text(name, description) for _, name, description in courses]
+    hashes = [text_hash(text) for text in texts]
+
+    previous = None if full else _read_index(vectors_path, mmap_mode=None)
+    reuse = {}
+    if previous is not None:
+        meta, old_matrix = previous
+        reuse = {(code, digest): old_matrix[i] for i, (code, digest) in enumerate(zip(meta["codes"], meta["hashes"]))}
+    changed = [i for i, key in enumerate(zip(codes, hashes)) if key not in reuse]
+
+    if changed:
+        if nlp is None:
+            from .scraping import get_nlp
+            nlp = get_nlp()
+        fresh = embed([texts[i] for i in changed], nlp)
+        dim, model = fresh.shape[1], nlp.meta.get("name", "")
+    elif previous is not None:
+        dim, model = previous[0]["dim"], previous[0]["model"]
+    else:
+        return 0, 0  # empty catalog, nothing to write
+
+    matrix = np.zeros((len(codes), dim), dtype=np.float32)
+    for i, key in enumerate(zip(codes, hashes)):
+        if key in reuse:
+            matrix[i] = reuse[key]
+    if changed:
+        matrix[changed] = fresh
+    _write_index(vectors_path, codes, hashes, matrix, model)
+    return len(codes), len(changed)
+
+# --- Queries ---
+
+class CourseSimilarity:
+    """
+    Top-k similar courses over the memory-mapped vector index.
+
+    The matrix is mapped read-only, so it costs no copy at load and every
+    server process shares the same pages. Rows are unit length, so one
+    matrix-vector product gives the cosine similarity to every course, and
+    argpartition picks the top k without sorting the catalog.
+    """
+
+    def __init__(self, codes, matrix):
+        self.codes = tuple(codes)
+        self.matrix = matrix
+        self.rows = {code: i for i, code in enumerate(self.codes)}
+        departments = {}
+        for i, code in enumerate(self.codes):
+            departments.setdefault(code.split(" ")[0], []).append(i)
+        self.departments = {dept: np.array(rows, dtype=np.int64) for dept, rows in departments.items()}
+
+    @classmethod
+    def load(cls, vectors_path=COURSE_VECTORS_PATH):
+        """
+        Map a built index, or None when there isn't a complete one.
+        """
+        index = _read_index(vectors_path)
+        if index is None:
+            return None
+        meta, matrix = index
+        return cls(meta["codes"], matrix)
+
+    def __contains__(self, code):
+        return code in self.rows
+
+    def similar(self, code, k=DEFAULT_K, department=None):
+        """
+        The k courses whose descriptions are closest to `code`'s, best first.
+
+        :param department: Only courses of this subject ("CE"), e.g. for technical electives.
+        :return: [(code, cosine similarity)], or None when the course isn't indexed.
+        """
+        row = self.rows.get(code)
+        if row is None:
+            return None
+        vector = self.matrix[row]
+        if department is not None:
+            candidates = self.departments.get(department.upper())
+            if candidates is None:
+                return []
+            scores = self.matrix[candidates] @ vector
+        else:
+            candidates = None
+            scores = self.matrix @ vector
+        if candidates is None:
+            scores[row] = -np.inf
+        else:
+            scores[candidates == row] = -np.inf
+
+        k = min(k, len(scores) - 1) if len(scores) > 1 else len(scores)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        indexes = top if candidates is None else candidates[top]
+        # Courses without a description have zero rows and score 0 against everything
+        return [(self.codes[i], round(float(score), 4)) for i, score in zip(indexes, scores[top]) if score > 0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the course description similarity index.")
+    parser.add_argument("course", nargs="?", help="Show the courses most similar to this one instead of building.")
+    parser.add_argument("--db", default=CLASSES_DB_PATH, help="Path to classes.db.")
+    parser.add_argument("--vectors", default=COURSE_VECTORS_PATH, help="Path to the vector matrix file.")
+    parser.add_argument("--full", action="store_true", help="Re-embed every course.")
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    args = parser.parse_args(argv)
+
+    if args.course is None:
+        start = time.perf_counter()
+        total, embedded = build_vectors(args.db, args.vectors, full=args.full)
+        print(f"Indexed {total} courses ({embedded} embedded) in {time.perf_counter() - start:.1f}s to {args.vectors}")
+        return 0
+
+    index = CourseSimilarity.load(args.vectors)
+    if index is None:
+        print(f"No vector index at {args.vectors}; build it first")
+        return 1
+    code = normalize_course_id(args.course)
+    start = time.perf_counter()
+    found = index.similar(code, k=args.k)
+    elapsed = time.perf_counter() - start
+    if found is None:
+        print(f"{code} is not in the index")
+        return 1
+    for similar_code, score in found:
+        print(f"{score:6.3f}  {similar_code}")
+    print(f"{len(found)} course(s) in {elapsed * 1000:.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
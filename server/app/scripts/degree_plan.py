@@ -0,0 +1,117 @@
+import ast
+import csv
+import re
+
+from .prereq_graph import normalize_course_id
+
+# "CE 4328", "CE4328", "UNIV-EN 1131"
+PLAN_COURSE_RE = re.compile(r'([A-Z]{2,4}(?:-[A-Z]{2})?)\s?(\d{4})')
+# "30 Semester Credit hours"
+CREDIT_HOURS_RE = re.compile(r'(\d+)\s+semester\s+credit\s+hours?', re.IGNORECASE)
+# "All CE 3000 level courses"
+LEVEL_RE = re.compile(r'all\s+([A-Z]{2,4})\s+(\d)000\s+level\s+courses', re.IGNORECASE)
+
+def is_placeholder(code):
+    """
+    True for elective slots such as "HIST 13XX" or "LPC XXXX".
+    """
+    return "X" in code.split(" ")[-1]
+
+def placeholder_pattern(code):
+    """
+    Compiled regex matching the real courses that fill a placeholder:
+    "HIST 13XX" matches "HIST 1301", "CE 43XX" matches "CE 4305".
+    """
+    dept, number = code.split(" ", 1)
+    return re.compile(re.escape(dept) + " " + number.replace("X", r"\d") + "$")
+
+def credit_hours(code):
+    """
+    UTA course numbers carry the credit hours in their second digit (CE 3305 -> 3).
+    Placeholders without a digit there count as 3 hours.
+    """
+    number = code.split(" ")[-1]
+    if len(number) == 4 and number[1].isdigit():
+        return int(number[1])
+    return 3
+
+def _parse_list(value):
+    """
+    "['CE 2311', 'MATH 2425']" -> ['CE 2311', 'MATH 2425']; "[None]" -> []
+    """
+    value = (value or "").strip()
+    if not value:
+        return []
+    try:
+        items = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        items = [value.strip("[]")]
+    if not isinstance(items, (list, tuple)):
+        items = [items]
+    return [str(item).strip() for item in items if item is not None and str(item).strip()]
+
+def _parse_requirements(items, required_codes):
+    """
+    Turn the plan's requisite entries into (groups, min_credits, notes).
+
+    Each group is a frozenset of alternatives; a requirement is met when every
+    group has at least one completed course. "X or Y" becomes one group,
+    "30 Semester Credit hours" a credit minimum, and "All CE 3000 level courses"
+    one group per matching required plan course. Anything else is kept as a note.
+    """
+    groups = []
+    min_credits = 0
+    notes = []
+
+    for item in items:
+        level = LEVEL_RE.search(item)
+        credits = CREDIT_HOURS_RE.search(item)
+        if level:
+            prefix = f"{level.group(1).upper()} {level.group(2)}"
+            groups.extend(frozenset([code]) for code in required_codes if code.startswith(prefix))
+        elif credits:
+            min_credits = max(min_credits, int(credits.group(1)))
+        else:
+            codes = [f"{dept} {num}" for dept, num in PLAN_COURSE_RE.findall(item)]
+            if codes:
+                groups.append(frozenset(codes))
+            else:
+                notes.append(item)
+
+    return groups, min_credits, notes
+
+def load_degree_plan(csv_path):
+    """
+    Read a degree plan CSV (Formal Name, Course Name, Prerequisites, Corequisites).
+
+    Rows up to the last placeholder ("CE 43XX", "CA XXXX", ...) are the required
+    curriculum; the rows after it are the courses that can fill those elective slots.
+
+    :return: {"required": [entry, ...], "electives": [entry, ...]} where each entry is
+             {"code", "name", "credits", "prereqs", "coreqs", "min_credits", "notes"}.
+    """
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip()]
+
+    rows = [(normalize_course_id(row[0]), row[1].strip(), row[2] if len(row) > 2 else "", row[3] if len(row) > 3 else "")
+            for row in rows[1:]]  # skip the header row
+
+    last_placeholder = max((i for i, row in enumerate(rows) if is_placeholder(row[0])), default=len(rows) - 1)
+    required_codes = [row[0] for row in rows[:last_placeholder + 1] if not is_placeholder(row[0])]
+
+    plan = {"required": [], "electives": []}
+    for i, (code, name, prereqs, coreqs) in enumerate(rows):
+        prereq_groups, min_credits, prereq_notes = _parse_requirements(_parse_list(prereqs), required_codes)
+        coreq_groups, _, coreq_notes = _parse_requirements(_parse_list(coreqs), required_codes)
+        entry = {
+            "code": code,
+            "name": name,
+            "credits": credit_hours(code),
+            "prereqs": prereq_groups,
+            "coreqs": coreq_groups,
+            "min_credits": min_credits,
+            "notes": prereq_notes + coreq_notes,
+        }
+        plan["required" if i <= last_placeholder else "electives"].append(entry)
+
+    return plan
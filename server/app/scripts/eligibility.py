@@ -0,0 +1,194 @@
+import numpy as np
+
+from .degree_plan import credit_hours, is_placeholder, placeholder_pattern
+from .prereq_graph import normalize_course_id, requisite_groups
+
+def _catalog_groups(course, required, text_groups):
+    """
+    AND-of-OR groups over a course's stored requisites (one kind, prerequisites or
+    corequisites): the description's groups cut down to those courses, and each
+    course the text doesn't mention as a group of its own. A course listing
+    itself ("or Student Group CHEM 1442") is left out.
+    """
+    required = {normalize_course_id(code) for code in required} - {course}
+    groups = [group & required for group in text_groups if group & required]
+    covered = set().union(*groups) if groups else set()
+    groups += [frozenset([code]) for code in sorted(required - covered)]
+    return list(dict.fromkeys(groups))
+
+class EligibilityEngine:
+    """
+    Decides which courses a student can take next.
+
+    Every course in the catalog and the degree plan gets a bit index. Requirements
+    are encoded once as matrices over those bits:
+
+      - G  (groups x courses): which courses satisfy each requirement group
+        (a group is a set of alternatives, e.g. {"CE 4328", "CE 4347"})
+      - Mp, Mc (courses x groups): which groups each course needs as
+        prerequisites / corequisites
+
+    A student's completed set is a 0/1 vector, so evaluating every course is a
+    couple of matrix products, and a batch of students is the same products
+    with one row per student.
+
+    Degree plan entries are authoritative for the courses they list. The edge
+    table doesn't keep and/or structure, so for catalog-only courses the groups
+    are read back from the description's requisite text (requisite_groups):
+    every listed course is its own group unless the text joins it to others
+    with "or". Placeholder slots ("CA XXXX") count as done when a course fills
+    them, but carry no credit hours of their own and are never recommended.
+    """
+
+    def __init__(self, requisites, plan=None, descriptions=None):
+        """
+        :param requisites: {course: (prereqs, coreqs)} from PrerequisiteGraph.requisites().
+        :param plan: Degree plan from load_degree_plan(), or None.
+        :param descriptions: {course: catalog description}, for the and/or structure
+                             of catalog-only requisites; without one every listed course is required.
+        """
+        descriptions = descriptions or {}
+        entries = {}  # code -> (prereq groups, coreq groups, min credits)
+        for course, (prereqs, coreqs) in requisites.items():
+            course = normalize_course_id(course)
+            text_groups = requisite_groups(descriptions.get(course))
+            entries[course] = (_catalog_groups(course, prereqs, text_groups),
+                               _catalog_groups(course, coreqs, text_groups), 0)
+
+        self.plan_codes = set()
+        self.names = {}
+        if plan is not None:
+            for entry in plan["required"] + plan["electives"]:
+                entries[entry["code"]] = (entry["prereqs"], entry["coreqs"], entry["min_credits"])
+                self.plan_codes.add(entry["code"])
+                self.names[entry["code"]] = entry["name"]
+
+        # Bit index for every course that is offered or required anywhere
+        codes = set(entries)
+        for prereq_groups, coreq_groups, _ in entries.values():
+            for group in prereq_groups + coreq_groups:
+                codes |= group
+        self.courses = sorted(codes)
+        self.index = {code: i for i, code in enumerate(self.courses)}
+        self.placeholders = [(self.index[code], placeholder_pattern(code)) for code in self.courses if is_placeholder(code)]
+
+        groups = {}
+        prereq_links, coreq_links = [], []
+        for code, (prereq_groups, coreq_groups, _) in entries.items():
+            for group in prereq_groups:
+                prereq_links.append((self.index[code], groups.setdefault(group, len(groups))))
+            for group in coreq_groups:
+                coreq_links.append((self.index[code], groups.setdefault(group, len(groups))))
+        self.groups = [None] * len(groups)
+        for group, g in groups.items():
+            self.groups[g] = group
+
+        n, g_count = len(self.courses), len(self.groups)
+        self.G = np.zeros((g_count, n), dtype=np.float32)
+        for group, g in groups.items():
+            for code in group:
+                self.G[g, self.index[code]] = 1
+        self.Mp = np.zeros((n, g_count), dtype=np.float32)
+        for course, g in prereq_links:
+            self.Mp[course, g] = 1
+        self.Mc = np.zeros((n, g_count), dtype=np.float32)
+        for course, g in coreq_links:
+            self.Mc[course, g] = 1
+
+        # Placeholder bits are set by the courses that fill them, whose own bits already carry the credits
+        self.credits = np.array([0 if is_placeholder(code) else credit_hours(code) for code in self.courses],
+                                dtype=np.float32)
+        self.min_credits = np.zeros(n, dtype=np.float32)
+        for code, (_, _, min_credits) in entries.items():
+            self.min_credits[self.index[code]] = min_credits
+
+        # Courses with a catalog or plan entry can be recommended; bare requisite codes can't
+        self.offered = np.zeros(n, dtype=bool)
+        for code in entries:
+            self.offered[self.index[code]] = True
+        self.in_plan = np.array([code in self.plan_codes for code in self.courses], dtype=bool)
+        self.recommendable = self.offered & ~np.array([is_placeholder(code) for code in self.courses], dtype=bool)
+
+        self._prereq_groups = [np.flatnonzero(row) for row in self.Mp]
+        self._coreq_groups = [np.flatnonzero(row) for row in self.Mc]
+
+    def encode(self, completed):
+        """
+        Completed course codes -> boolean vector over the course index. Unknown
+        codes are ignored; a placeholder counts as done when any completed course
+        fills it (HIST 1301 fills "HIST 13XX").
+        """
+        vector = np.zeros(len(self.courses), dtype=bool)
+        codes = [normalize_course_id(code) for code in completed]
+        for code in codes:
+            index = self.index.get(code)
+            if index is not None:
+                vector[index] = True
+        for index, pattern in self.placeholders:
+            if any(pattern.match(code) for code in codes):
+                vector[index] = True
+        return vector
+
+    def _evaluate_matrix(self, done):
+        """
+        :param done: (students x courses) boolean matrix of completed courses.
+        :return: (eligible, prereq_groups_met, coreq_groups_met, credits_done); eligible
+                 is (students x courses), the group matrices are (students x groups).
+        """
+        have = done.astype(np.float32)
+
+        # Prerequisites: every group needs one completed course, plus the credit minimum
+        prereq_groups_met = (have @ self.G.T) > 0
+        prereq_unmet = (~prereq_groups_met).astype(np.float32) @ self.Mp.T > 0
+        credits_done = have @ self.credits
+        prereq_unmet |= credits_done[:, None] < self.min_credits[None, :]
+
+        # Corequisites may be completed or taken in the same semester
+        available = done | ~prereq_unmet
+        coreq_groups_met = (available.astype(np.float32) @ self.G.T) > 0
+        coreq_unmet = (~coreq_groups_met).astype(np.float32) @ self.Mc.T > 0
+
+        eligible = ~prereq_unmet & ~coreq_unmet & ~done & self.recommendable[None, :]
+        return eligible, prereq_groups_met, coreq_groups_met, credits_done
+
+    def _missing(self, course, prereq_groups_met, coreq_groups_met, credits_done):
+        missing = [" or ".join(sorted(self.groups[g])) for g in self._prereq_groups[course] if not prereq_groups_met[g]]
+        missing += [f"{' or '.join(sorted(self.groups[g]))} (concurrent)"
+                    for g in self._coreq_groups[course] if not coreq_groups_met[g]]
+        if credits_done < self.min_credits[course]:
+            missing.append(f"{int(self.min_credits[course])} credit hours")
+        return missing
+
+    def _result(self, done, eligible, prereq_groups_met, coreq_groups_met, credits_done, scope):
+        scope_mask = self.offered & self.in_plan if scope == "plan" else self.offered
+        blocked = scope_mask & self.recommendable & ~done & ~eligible
+        return {
+            "completed": [self.courses[i] for i in np.flatnonzero(done & scope_mask)],
+            "eligible": [self.courses[i] for i in np.flatnonzero(eligible & scope_mask)],
+            "blocked": [
+                {"course": self.courses[i],
+                 "missing": self._missing(i, prereq_groups_met, coreq_groups_met, credits_done)}
+                for i in np.flatnonzero(blocked)
+            ],
+        }
+
+    def evaluate(self, completed, scope="catalog"):
+        """
+        Evaluate one student.
+
+        :param completed: Completed course codes, as returned by /api/process-file.
+        :param scope: "catalog" for every known course, "plan" for degree plan courses only.
+        :return: {"completed": [...], "eligible": [...], "blocked": [{"course", "missing"}]}
+        """
+        return self.evaluate_batch([completed], scope=scope)[0]
+
+    def evaluate_batch(self, students, scope="catalog"):
+        """
+        Evaluate many students at once; one row per student in the same matrix products.
+        """
+        done = np.array([self.encode(completed) for completed in students], dtype=bool).reshape(len(students), len(self.courses))
+        eligible, prereq_groups_met, coreq_groups_met, credits_done = self._evaluate_matrix(done)
+        return [
+            self._result(done[s], eligible[s], prereq_groups_met[s], coreq_groups_met[s], credits_done[s], scope)
+            for s in range(len(students))
+        ]
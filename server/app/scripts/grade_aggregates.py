@@ -0,0 +1,286 @@
+import argparse
+import json
+
+from ..config import Config
+from ..data import GRADES_DB_PATH, connect
+
+DEFAULT_DB_PATH = GRADES_DB_PATH
+
+# Expected source: an allgrades table in grades.db with one row per class section
+# and term, holding the subject ("CE"), course number, section number, year, term
+# ("Fall"), instructor name and the count of each final grade A, B, C, D, F and W.
+# Subject, course number, section and year are named as in the queries already run
+# against it (data/-- SQLite.sql); the term, instructor and grade column names
+# differ between grade exports, so those defaults are a guess to be mapped through
+# GRADE_COLUMNS, --columns or the `columns` argument. A refresh stops with the list
+# of mapped columns allgrades lacks, and adds an index on allgrades(year, term),
+# the only change it makes to the raw table.
+#
+# Logical field -> column in allgrades; GRADE_COLUMNS, then --columns or `columns`, override these
+DEFAULT_COLUMNS = {
+    "subject": "subject_id",
+    "course_number": "course_number",
+    "section": "section_number",
+    "year": "year",
+    "term": "semester",
+    "instructor": "instructor1",
+    "A": "A",
+    "B": "B",
+    "C": "C",
+    "D": "D",
+    "F": "F",
+    "W": "W",
+}
+CONFIG_COLUMNS = json.loads(Config.GRADE_COLUMNS) if Config.GRADE_COLUMNS else {}
+GRADE_FIELDS = ("A", "B", "C", "D", "F", "W")
+
+# --- Schema ---
+
+def create_aggregate_tables(cur):
+    """
+    GradeTermAggregates holds the grade counts per course, instructor and term;
+    the per-course and per-course+instructor tables are rollups of it, so a new
+    term only touches the rollup rows of the courses it contains.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS GradeTermAggregates (
+            Subject TEXT NOT NULL,
+            Course_Number TEXT NOT NULL,
+            Instructor TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            Term TEXT NOT NULL,
+            Sections INTEGER NOT NULL,
+            A INTEGER NOT NULL, B INTEGER NOT NULL, C INTEGER NOT NULL,
+            D INTEGER NOT NULL, F INTEGER NOT NULL, W INTEGER NOT NULL,
+            PRIMARY KEY (Subject, Course_Number, Instructor, Year, Term)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_grade_terms_term ON GradeTermAggregates(Year, Term)")
+    for table, key in (("CourseGradeAggregates", "Subject, Course_Number"),
+                       ("CourseInstructorGradeAggregates", "Subject, Course_Number, Instructor")):
+        instructor = "Instructor TEXT NOT NULL," if "Instructor" in key else ""
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                Subject TEXT NOT NULL,
+                Course_Number TEXT NOT NULL,
+                {instructor}
+                Terms INTEGER NOT NULL,
+                Sections INTEGER NOT NULL,
+                Graded INTEGER NOT NULL,
+                Enrolled INTEGER NOT NULL,
+                GPA REAL,
+                A_Rate REAL,
+                DFW_Rate REAL,
+                PRIMARY KEY ({key})
+            )
+        """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS GradeRefreshLog (
+            Year INTEGER NOT NULL,
+            Term TEXT NOT NULL,
+            Source_Rows INTEGER NOT NULL,
+            Source_Checksum TEXT,
+            Refreshed_At TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (Year, Term)
+        )
+    """)
+    # Logs written before the checksum was recorded; their terms are refreshed once
+    if "Source_Checksum" not in {row[1] for row in cur.execute("PRAGMA table_info(GradeRefreshLog)")}:
+        cur.execute("ALTER TABLE GradeRefreshLog ADD COLUMN Source_Checksum TEXT")
+
+def _check_columns(cur, columns):
+    """
+    Raise ValueError naming the mapped columns allgrades doesn't have.
+    """
+    present = {row[1].casefold() for row in cur.execute("PRAGMA table_info(allgrades)")}
+    if not present:
+        raise ValueError("No allgrades table in the grade database")
+    missing = sorted(f"{field}={column}" for field, column in columns.items() if column.casefold() not in present)
+    if missing:
+        raise ValueError(f"allgrades has no column for {', '.join(missing)}; map them with GRADE_COLUMNS or --columns")
+
+def _source_index(cur, columns):
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_allgrades_term ON allgrades({columns['year']}, {columns['term']})")
+
+# --- Refresh ---
+
+def _source_terms(cur, columns):
+    """
+    {(year, term): (row count, checksum)} in allgrades. The checksum combines the
+    highest rowid, the total of each grade column and the length of the
+    instructor names, so edits that keep a term's row count are noticed too.
+    """
+    c = columns
+    sums = ", ".join(f"TOTAL({c[field]})" for field in GRADE_FIELDS)
+    return {(int(year), str(term)): (count, ":".join(str(value) for value in checksum))
+            for year, term, count, *checksum in cur.execute(f"""
+                SELECT {c['year']}, {c['term']}, COUNT(*), MAX(rowid), {sums},
+                       TOTAL(LENGTH({c['instructor']})), TOTAL(LENGTH({c['section']}))
+                FROM allgrades GROUP BY 1, 2
+            """)}
+
+def _load_term(cur, columns, year, term):
+    """
+    Replace one term's rows in GradeTermAggregates.
+
+    :return: Set of (subject, course_number) keys the term touched, before and after.
+    """
+    c = columns
+    touched = set(cur.execute("SELECT Subject, Course_Number FROM GradeTermAggregates WHERE Year = ? AND Term = ?",
+                              (year, term)))
+    cur.execute("DELETE FROM GradeTermAggregates WHERE Year = ? AND Term = ?", (year, term))
+    cur.execute(f"""
+        INSERT INTO GradeTermAggregates (Subject, Course_Number, Instructor, Year, Term, Sections, A, B, C, D, F, W)
+        SELECT TRIM({c['subject']}), CAST({c['course_number']} AS TEXT), COALESCE(TRIM({c['instructor']}), ''),
+               ?, ?, COUNT(DISTINCT {c['section']}),
+               SUM(COALESCE({c['A']}, 0)), SUM(COALESCE({c['B']}, 0)), SUM(COALESCE({c['C']}, 0)),
+               SUM(COALESCE({c['D']}, 0)), SUM(COALESCE({c['F']}, 0)), SUM(COALESCE({c['W']}, 0))
+        FROM allgrades
+        WHERE {c['year']} = ? AND {c['term']} = ?
+        GROUP BY 1, 2, 3
+    """, (year, term, year, term))
+    touched |= set(cur.execute("SELECT Subject, Course_Number FROM GradeTermAggregates WHERE Year = ? AND Term = ?",
+                               (year, term)))
+    return touched
+
+ROLLUP_SELECT = """
+    COUNT(DISTINCT Year || ' ' || Term), SUM(Sections),
+    SUM(A + B + C + D + F), SUM(A + B + C + D + F + W),
+    CAST(SUM(4 * A + 3 * B + 2 * C + D) AS REAL) / NULLIF(SUM(A + B + C + D + F), 0),
+    CAST(SUM(A) AS REAL) / NULLIF(SUM(A + B + C + D + F), 0),
+    CAST(SUM(D + F + W) AS REAL) / NULLIF(SUM(A + B + C + D + F + W), 0)
+"""
+
+def _refresh_rollups(cur, courses):
+    """
+    Recompute the rollup rows of the given (subject, course_number) keys from GradeTermAggregates.
+    """
+    for subject, number in courses:
+        cur.execute("DELETE FROM CourseGradeAggregates WHERE Subject = ? AND Course_Number = ?", (subject, number))
+        cur.execute("DELETE FROM CourseInstructorGradeAggregates WHERE Subject = ? AND Course_Number = ?", (subject, number))
+        cur.execute(f"""
+            INSERT INTO CourseGradeAggregates
+            SELECT Subject, Course_Number, {ROLLUP_SELECT}
+            FROM GradeTermAggregates WHERE Subject = ? AND Course_Number = ?
+            GROUP BY Subject, Course_Number
+        """, (subject, number))
+        cur.execute(f"""
+            INSERT INTO CourseInstructorGradeAggregates
+            SELECT Subject, Course_Number, Instructor, {ROLLUP_SELECT}
+            FROM GradeTermAggregates WHERE Subject = ? AND Course_Number = ?
+            GROUP BY Subject, Course_Number, Instructor
+        """, (subject, number))
+
+def refresh_aggregates(db_path=DEFAULT_DB_PATH, columns=None, full=False):
+    """
+    Bring the aggregate tables up to date with allgrades.
+
+    Only terms that are new, or whose row count or checksum changed since the
+    last refresh, are re-aggregated, and only the rollup rows of the courses in those terms are
+    recomputed. Terms that disappeared from allgrades are removed. `full`
+    re-aggregates every term.
+
+    :return: {"terms": [(year, term), ...] refreshed, "courses": number of rollup keys recomputed}
+    """
+    columns = {**DEFAULT_COLUMNS, **CONFIG_COLUMNS, **(columns or {})}
+    conn = connect(db_path, readonly=False)
+    try:
+        with conn:
+            cur = conn.cursor()
+            _check_columns(cur, columns)
+            create_aggregate_tables(cur)
+            _source_index(cur, columns)
+
+            source = _source_terms(cur, columns)
+            logged = {(year, term): (rows, checksum) for year, term, rows, checksum in
+                      cur.execute("SELECT Year, Term, Source_Rows, Source_Checksum FROM GradeRefreshLog")}
+            stale = sorted(key for key, state in source.items() if full or logged.get(key) != state)
+            removed = sorted(key for key in logged if key not in source)
+
+            touched = set()
+            for year, term in stale:
+                touched |= _load_term(cur, columns, year, term)
+                cur.execute("INSERT OR REPLACE INTO GradeRefreshLog (Year, Term, Source_Rows, Source_Checksum) "
+                            "VALUES (?, ?, ?, ?)", (year, term, *source[(year, term)]))
+            for year, term in removed:
+                touched |= set(cur.execute("SELECT Subject, Course_Number FROM GradeTermAggregates WHERE Year = ? AND Term = ?",
+                                           (year, term)))
+                cur.execute("DELETE FROM GradeTermAggregates WHERE Year = ? AND Term = ?", (year, term))
+                cur.execute("DELETE FROM GradeRefreshLog WHERE Year = ? AND Term = ?", (year, term))
+            _refresh_rollups(cur, touched)
+        return {"terms": stale, "removed": removed, "courses": len(touched)}
+    finally:
+        conn.close()
+
+# --- Reads ---
+
+def _rates(row, offset):
+    terms, sections, graded, enrolled, gpa, a_rate, dfw_rate = row[offset:offset + 7]
+    return {
+        "terms": terms,
+        "sections": sections,
+        "graded": graded,
+        "enrolled": enrolled,
+        "gpa": None if gpa is None else round(gpa, 3),
+        "a_rate": None if a_rate is None else round(a_rate, 3),
+        "dfw_rate": None if dfw_rate is None else round(dfw_rate, 3),
+    }
+
+def course_grades(conn, subject, course_number):
+    """
+    Precomputed grade summary of a course and each of its instructors, read by
+    primary key. None when the course has no grade data.
+    """
+    row = conn.execute("SELECT * FROM CourseGradeAggregates WHERE Subject = ? AND Course_Number = ?",
+                       (subject, str(course_number))).fetchone()
+    if row is None:
+        return None
+    summary = _rates(row, 2)
+    summary["instructors"] = [
+        {"instructor": r[2], **_rates(r, 3)}
+        for r in conn.execute("""
+            SELECT * FROM CourseInstructorGradeAggregates WHERE Subject = ? AND Course_Number = ?
+            ORDER BY Graded DESC
+        """, (subject, str(course_number)))
+    ]
+    return summary
+
+def term_grades(conn, subject, course_number, instructor=None):
+    """
+    Per-term GPA, A-rate and DFW-rate of a course, optionally for one instructor.
+    """
+    params = [subject, str(course_number)]
+    where = "Subject = ? AND Course_Number = ?"
+    if instructor is not None:
+        where += " AND Instructor = ?"
+        params.append(instructor)
+    return [
+        {"year": year, "term": term, **_rates(row, 0)}
+        for year, term, *row in conn.execute(f"""
+            SELECT Year, Term, 1, SUM(Sections), SUM(A + B + C + D + F), SUM(A + B + C + D + F + W),
+                   CAST(SUM(4 * A + 3 * B + 2 * C + D) AS REAL) / NULLIF(SUM(A + B + C + D + F), 0),
+                   CAST(SUM(A) AS REAL) / NULLIF(SUM(A + B + C + D + F), 0),
+                   CAST(SUM(D + F + W) AS REAL) / NULLIF(SUM(A + B + C + D + F + W), 0)
+            FROM GradeTermAggregates WHERE {where}
+            GROUP BY Year, Term ORDER BY Year, Term
+        """, params)
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the grade distribution aggregates from allgrades.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database holding allgrades.")
+    parser.add_argument("--columns", help='JSON column mapping, e.g. \'{"term": "term_name"}\'.')
+    parser.add_argument("--full", action="store_true", help="Re-aggregate every term.")
+    args = parser.parse_args(argv)
+
+    try:
+        result = refresh_aggregates(args.db, json.loads(args.columns) if args.columns else None, full=args.full)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"Refreshed {len(result['terms'])} term(s), removed {len(result['removed'])}, "
+          f"recomputed {result['courses']} course rollup(s)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,433 @@
+import argparse
+import csv
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+
+from ..data import GRADES_DB_PATH, NAME_OVERRIDES_PATH, PROFESSORS_DB_PATH, connect, table_exists
+
+DEFAULT_DB_PATH = PROFESSORS_DB_PATH
+
+# Scores at or above this are accepted; the best candidate must also beat the runner-up by AMBIGUITY_MARGIN
+MATCH_THRESHOLD = 0.86
+AMBIGUITY_MARGIN = 0.02
+# Candidates from the trigram fallback must share at least this many surname trigrams
+MIN_SHARED_TRIGRAMS = 2
+
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "phd", "dr", "md"}
+
+# Common English short forms -> formal first name; other short forms are prefixes ("chris", "christopher").
+# Spellings particular to one person belong in the override file (read_overrides), not here.
+NICKNAMES = {
+    "andy": "andrew", "bill": "william", "bob": "robert", "dave": "david", "dick": "richard",
+    "jim": "james", "kathy": "katherine", "kate": "katherine", "liz": "elizabeth",
+    "beth": "elizabeth", "mike": "michael", "peggy": "margaret", "randy": "randall", "rick": "richard",
+    "steve": "stephen", "tom": "thomas", "tony": "anthony", "bert": "albert",
+}
+
+# Columns of the override file: an instructor name and the RMP professor id it always matches
+OVERRIDE_COLUMNS = ("instructor", "professor_id")
+
+# --- Normalization ---
+
+def name_tokens(name):
+    """
+    Normalize a person's name into lowercase tokens in "first ... last" order.
+
+    "Chao, Shih-Ho" -> ["shihho", "chao"]; "Cynthia St. John" -> ["cynthia", "st", "john"];
+    "José O'Neil Jr." -> ["jose", "oneil"]
+    """
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(ch for ch in name if not unicodedata.combining(ch)).casefold()
+    if "," in name:
+        last, _, first = name.partition(",")
+        name = f"{first} {last}"
+    name = re.sub(r"['.’`]", "", name)
+    words = name.split()
+    if not words:
+        return []
+    # Hyphenated given names are one name ("Yu-Wen" -> "yuwen"); hyphenated surnames split
+    words = [words[0].replace("-", "")] + words[1:]
+    name = re.sub(r"[^a-z]+", " ", " ".join(words))
+    return [token for token in name.split() if token not in NAME_SUFFIXES]
+
+def soundex(token):
+    """
+    American Soundex code of a token ("robert" -> "R163").
+    """
+    codes = {}
+    for letters, digit in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6")):
+        for letter in letters:
+            codes[letter] = digit
+    if not token:
+        return ""
+    result = token[0].upper()
+    previous = codes.get(token[0], "")
+    for letter in token[1:]:
+        digit = codes.get(letter, "")
+        if digit and digit != previous:
+            result += digit
+            if len(result) == 4:
+                break
+        if letter not in "hw":
+            previous = digit
+    return result.ljust(4, "0")
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _similarity(a, b):
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+def _first_similarity(a, b):
+    # An initial matches any first name starting with it, a short form its long form ("chris", "christopher")
+    if len(a) == 1 or len(b) == 1:
+        return 0.9 if a[0] == b[0] else 0.0
+    if min(len(a), len(b)) >= 3 and (a.startswith(b) or b.startswith(a)):
+        return 0.9
+    if NICKNAMES.get(a, a) == NICKNAMES.get(b, b):
+        return 0.9
+    return _similarity(a, b)
+
+def _surname_similarity(a, b):
+    # Misspellings that sound the same ("kunkel" / "kunkle", "espinoza" / "espinosa") count as close
+    similarity = _similarity(a, b)
+    if similarity < 0.9 and similarity >= 0.75 and soundex(a) == soundex(b):
+        return 0.9
+    return similarity
+
+def name_score(query, candidate):
+    """
+    Similarity in [0, 1] of two token lists: the first names weigh 0.4 and the
+    best-matching pair of surname tokens 0.6, so dropped or added middle names
+    ("Himan Hojat Jalali" / "Himan Jalali") don't count against a match. A
+    clearly different first name or surname ("Michael Morris" / "Michael
+    Morrison") is a different person, so it takes the score below the threshold.
+    """
+    if not query or not candidate:
+        return 0.0
+    first = _first_similarity(query[0], candidate[0])
+    query_rest, candidate_rest = query[1:] or query, candidate[1:] or candidate
+    surname = max(_surname_similarity(a, b) for a in query_rest for b in candidate_rest)
+    if query_rest[-1] != candidate_rest[-1] and surname == 1.0:
+        surname = 0.95  # only a middle or compound name part agrees
+    score = 0.4 * first + 0.6 * surname
+    if first < 0.85 or surname < 0.9:
+        score *= 0.8
+    return score
+
+def read_overrides(path=NAME_OVERRIDES_PATH):
+    """
+    {name tokens: professor_id} from the override file; empty when there is none.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return {tuple(name_tokens(row["instructor"])): row["professor_id"].strip()
+                for row in csv.DictReader(f) if name_tokens(row.get("instructor")) and (row.get("professor_id") or "").strip()}
+
+# --- Blocking index ---
+
+class NameIndex:
+    """
+    Blocking index over RateMyProfessors names.
+
+    Each name is filed under the Soundex code of every surname token plus the
+    first initial ("shih ho chao" -> "C000s", "H000s"), and every surname
+    token's trigrams. A query is only scored against the names in its own
+    phonetic blocks, falling back to names sharing surname trigrams when those
+    give nothing acceptable, so matching n names against m entries costs about
+    n times the block size instead of n * m.
+    """
+
+    def __init__(self, entries, overrides=None):
+        """
+        :param entries: (professor_id, name, department) tuples.
+        :param overrides: {name tokens: professor_id} matched before any scoring (see read_overrides()).
+        """
+        self.overrides = overrides or {}
+        self.entries = []
+        self.blocks = {}
+        self.grams = {}
+        for professor_id, name, department in entries:
+            tokens = name_tokens(name)
+            if not tokens:
+                continue
+            i = len(self.entries)
+            self.entries.append((professor_id, name, (department or "").casefold(), tokens))
+            for key in self._block_keys(tokens):
+                self.blocks.setdefault(key, []).append(i)
+            for token in tokens[1:] or tokens:
+                for gram in trigrams(token):
+                    self.grams.setdefault(gram, set()).add(i)
+        self.comparisons = 0
+
+    @staticmethod
+    def _block_keys(tokens):
+        return {soundex(token) + tokens[0][0] for token in tokens[1:] or tokens}
+
+    def _phonetic_candidates(self, tokens):
+        keys = self._block_keys(tokens)
+        # Names written surname-first without a comma ("CHAO SHIHHO")
+        if len(tokens) > 1:
+            keys |= self._block_keys(tokens[1:] + tokens[:1])
+        found = set()
+        for key in keys:
+            found.update(self.blocks.get(key, ()))
+        return found
+
+    def _trigram_candidates(self, tokens):
+        shared = Counter()
+        for token in tokens[1:] or tokens:
+            for gram in trigrams(token):
+                for i in self.grams.get(gram, ()):
+                    shared[i] += 1
+        return {i for i, count in shared.items() if count >= MIN_SHARED_TRIGRAMS}
+
+    def _best(self, tokens, candidates, department):
+        scored = []
+        for i in candidates:
+            self.comparisons += 1
+            entry_tokens = self.entries[i][3]
+            score = name_score(tokens, entry_tokens)
+            if len(tokens) > 1:
+                score = max(score, 0.97 * name_score(tokens[1:] + tokens[:1], entry_tokens))
+            if department and self.entries[i][2] == department:
+                score = min(1.0, score + 0.03)
+            scored.append((score, i))
+        scored.sort(reverse=True)
+        return scored
+
+    def match(self, name, department=None):
+        """
+        Best RMP entry for a name.
+
+        :return: (professor_id, score), or (None, best score) when nothing clears
+                 MATCH_THRESHOLD or two entries are too close to call.
+        """
+        tokens = name_tokens(name)
+        if not tokens:
+            return None, 0.0
+        if tuple(tokens) in self.overrides:
+            return self.overrides[tuple(tokens)], 1.0
+        department = (department or "").casefold()
+
+        scored = self._best(tokens, self._phonetic_candidates(tokens), department)
+        if not scored or scored[0][0] < MATCH_THRESHOLD:
+            scored = self._best(tokens, self._trigram_candidates(tokens), department)
+        if not scored:
+            return None, 0.0
+
+        best_score, best = scored[0]
+        if best_score < MATCH_THRESHOLD:
+            return None, best_score
+        runner_up = next((score for score, i in scored[1:] if self.entries[i][0] != self.entries[best][0]), 0.0)
+        if best_score - runner_up < AMBIGUITY_MARGIN:
+            return None, best_score
+        return self.entries[best][0], best_score
+
+# --- Match cache ---
+
+def create_match_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS NameMatches (
+            Source_Name TEXT PRIMARY KEY,
+            Professor_Id TEXT NOT NULL,
+            Score REAL NOT NULL,
+            Matched_At TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def load_index(conn, overrides=None):
+    return NameIndex(conn.execute("SELECT id, COALESCE(rmp_name, name), department FROM professors").fetchall(),
+                     overrides)
+
+def match_names(names, db_path=DEFAULT_DB_PATH, departments=None, save=False, overrides_path=NAME_OVERRIDES_PATH):
+    """
+    Match instructor names (e.g. from allgrades) to RMP professors.
+
+    Names in the override file always get their pinned id, cached or not.
+    Matches already cached in NameMatches are reused. Writing new ones there is
+    opt-in: professors.db is part of the app's data version, so a write from a
+    plain lookup would invalidate the app's caches.
+
+    :param departments: Optional {name: department} hint used to break near-ties.
+    :param save: Cache the accepted matches in NameMatches; names that fail are retried next time.
+    :param overrides_path: Override file (see read_overrides()).
+    :return: ({name: professor_id}, [unmatched names])
+    """
+    departments = departments or {}
+    overrides = read_overrides(overrides_path)
+    conn = connect(db_path, readonly=not save)
+    try:
+        cur = conn.cursor()
+        if save:
+            create_match_table(cur)
+        cached = dict(cur.execute("SELECT Source_Name, Professor_Id FROM NameMatches")) \
+            if table_exists(cur, "NameMatches") else {}
+        cached = {name: professor_id for name, professor_id in cached.items() if tuple(name_tokens(name)) not in overrides}
+        pending = [name for name in dict.fromkeys(names) if name not in cached]
+
+        matched = {name: cached[name] for name in names if name in cached}
+        unmatched = []
+        if pending:
+            index = load_index(conn, overrides)
+            new_matches = []
+            for name in pending:
+                professor_id, score = index.match(name, departments.get(name))
+                if professor_id is None:
+                    unmatched.append(name)
+                else:
+                    matched[name] = professor_id
+                    new_matches.append((name, professor_id, score))
+            if save and new_matches:
+                with conn:
+                    cur.executemany("INSERT OR REPLACE INTO NameMatches (Source_Name, Professor_Id, Score) VALUES (?, ?, ?)",
+                                    new_matches)
+        return matched, unmatched
+    finally:
+        conn.close()
+
+def retry_skipped(db_path=DEFAULT_DB_PATH):
+    """
+    Re-run the names the RMP scraper skipped through the matcher, caching the matches.
+
+    :return: ({name: professor_id} newly matched, number still unmatched)
+    """
+    conn = connect(db_path)
+    try:
+        names = [name for (name,) in conn.execute("SELECT name FROM skipped_profs")]
+    finally:
+        conn.close()
+    matched, unmatched = match_names(names, db_path, save=True)
+    return matched, len(unmatched)
+
+# --- Evaluation ---
+
+# Columns of a label file: an instructor name as spelled in the grade data, its
+# subject, and the RMP professor id a person checked it against (blank: no RMP entry)
+LABEL_COLUMNS = ("instructor", "subject", "professor_id")
+
+def grade_instructors(grades_db=GRADES_DB_PATH):
+    """
+    Distinct (instructor, subject) pairs of the grade data, spelled as the grade files spell them.
+    """
+    if not os.path.exists(grades_db):
+        return []
+    conn = connect(grades_db)
+    try:
+        if not table_exists(conn, "GradeTermAggregates"):
+            return []
+        return conn.execute("""
+            SELECT Instructor, MIN(Subject) FROM GradeTermAggregates
+            WHERE Instructor <> '' GROUP BY Instructor ORDER BY Instructor
+        """).fetchall()
+    finally:
+        conn.close()
+
+def write_label_sheet(path, grades_db=GRADES_DB_PATH):
+    """
+    Write the grade data's instructor names as a label file with professor_id
+    left blank for a person to fill in. The matcher's own answers are left out
+    so they can't steer the labels.
+
+    :return: Number of names written.
+    """
+    rows = grade_instructors(grades_db)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(LABEL_COLUMNS)
+        writer.writerows((name, subject, "") for name, subject in rows)
+    return len(rows)
+
+def read_labels(path):
+    """
+    [(instructor, subject, professor_id or None)] from a filled-in label file.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [(row["instructor"], row.get("subject") or "", (row.get("professor_id") or "").strip() or None)
+                for row in csv.DictReader(f) if (row.get("instructor") or "").strip()]
+
+def evaluate(labels_path, db_path=DEFAULT_DB_PATH, overrides_path=NAME_OVERRIDES_PATH):
+    """
+    Precision and recall against hand-labeled grade-data instructor names (see
+    write_label_sheet()). Names labeled with an id should match that professor;
+    names labeled blank have no RMP entry and should not match anything.
+    """
+    from .professor_ratings import SUBJECT_DEPARTMENTS
+
+    labels = read_labels(labels_path)
+    conn = connect(db_path)
+    try:
+        index = load_index(conn, read_overrides(overrides_path))
+    finally:
+        conn.close()
+
+    start = time.perf_counter()
+    true_positive = false_positive = false_negative = 0
+    mistakes = []
+    for name, subject, professor_id in labels:
+        department = next(iter(SUBJECT_DEPARTMENTS.get(subject.upper(), ())), None)
+        found, score = index.match(name, department)
+        if found is not None and found == professor_id:
+            true_positive += 1
+            continue
+        if found is not None:
+            false_positive += 1
+        if professor_id is not None:
+            false_negative += 1
+        if found != professor_id:
+            mistakes.append((name, professor_id, found, round(score, 3)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "queries": len(labels),
+        "labeled_matches": sum(1 for label in labels if label[2] is not None),
+        "precision": true_positive / ((true_positive + false_positive) or 1),
+        "recall": true_positive / ((true_positive + false_negative) or 1),
+        "seconds": elapsed,
+        "comparisons": index.comparisons,
+        "pairwise_comparisons": len(labels) * len(index.entries),
+        "mistakes": mistakes,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match instructor names to RateMyProfessors entries.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to professors.db.")
+    parser.add_argument("--grades-db", default=GRADES_DB_PATH, help="Grade database the label sheet is drawn from.")
+    parser.add_argument("--label-sheet", metavar="CSV", help="Write the grade data's instructor names for labeling.")
+    parser.add_argument("--evaluate", metavar="CSV", help="Report precision/recall against a filled-in label file.")
+    parser.add_argument("--retry-skipped", action="store_true", help="Retry the names in skipped_profs.")
+    parser.add_argument("--save", action="store_true", help="Cache the matches of the given names in NameMatches.")
+    parser.add_argument("--overrides", default=NAME_OVERRIDES_PATH,
+                        help=f"CSV of instructor names pinned to a professor id (default: {NAME_OVERRIDES_PATH}).")
+    parser.add_argument("names", nargs="*", help="Names to match.")
+    args = parser.parse_args(argv)
+
+    if args.label_sheet:
+        count = write_label_sheet(args.label_sheet, args.grades_db)
+        print(f"Wrote {count} instructor names to {args.label_sheet}")
+    if args.evaluate:
+        report = evaluate(args.evaluate, args.db, args.overrides)
+        for name, expected, found, score in report["mistakes"][:20]:
+            print(f"  {name!r}: expected {expected}, got {found} ({score})")
+        print(f"{report['queries']} names ({report['labeled_matches']} with an RMP entry) in {report['seconds']:.2f}s, "
+              f"{report['comparisons']} comparisons instead of {report['pairwise_comparisons']}")
+        print(f"precision {report['precision']:.3f}  recall {report['recall']:.3f}")
+    if args.retry_skipped:
+        matched, remaining = retry_skipped(args.db)
+        print(f"Matched {len(matched)} skipped names, {remaining} still unmatched")
+    if args.names:
+        matched, unmatched = match_names(args.names, args.db, save=args.save, overrides_path=args.overrides)
+        for name in args.names:
+            print(f"{name}: {matched.get(name, 'no match')}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -75,39 +75,464 @@
 # # also if you are a freshman, there might not be any grades attached to the courses
 # # also if the user has no classes, there should be an option called i'm new to UTA and we just send them to select the professor and courses attributes
 
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
 import pdfplumber
+import pypdfium2
 import re
-from typing import List
+from pdfminer.pdfdevice import PDFTextDevice
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
+
+from ..metrics import collect_stages, record_stages, stage
+
+semester_course_pattern = re.compile(r'^([A-Z]{2,4}(?:-[A-Z]{2})?)\s(\d{4}).*?\d+\.\d{3}\s+\d+\.\d{3}')
+transfer_test_pattern = re.compile(
+    r'Transferred to Term \d{4} (?:Summer|Spring|Fall) as\s*\n\s*([A-Z]{3,4}\s\d{4})',
+    re.IGNORECASE
+)
+
+# Transcripts with at least this many pages are split across the process pool
+PARALLEL_MIN_PAGES = int(os.getenv("TRANSCRIPT_PARALLEL_MIN_PAGES", "4"))
+TRANSCRIPT_WORKERS = int(os.getenv("TRANSCRIPT_WORKERS", str(os.cpu_count() or 1)))
+CACHE_SIZE = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "256"))
+# "fast" (pdfminer text stream, falls back to "layout") or "layout" (pdfplumber only)
+TRANSCRIPT_BACKEND = os.getenv("TRANSCRIPT_BACKEND", "fast")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# --- Result cache: SHA-256 of the PDF bytes -> sorted course list ---
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cache_get(digest):
+    with _cache_lock:
+        courses = _cache.get(digest)
+        if courses is not None:
+            _cache.move_to_end(digest)
+        return courses
+
+def _cache_put(digest, courses):
+    with _cache_lock:
+        _cache[digest] = courses
+        _cache.move_to_end(digest)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def get_pool():
+    """
+    Process pool shared by every request, created on first use. Workers are
+    spawned rather than forked so they don't inherit the web server's threads.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=TRANSCRIPT_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def courses_in_text(text):
+    """
+    Course codes on one page of transcript text.
+    """
+    found = set(transfer_test_pattern.findall(text))
+    for line in text.split('\n'):
+        match = semester_course_pattern.match(line.strip())
+        if match:
+            found.add(f"{match.group(1)} {match.group(2)}")
+    return found
+
+# --- Text extraction backends ---
+# Both take the PDF bytes and page indices (None for all pages) and return one
+# string per page. The regexes above only need line-ordered text. They also run
+# in the pool workers, so they only take and return picklable values.
+
+class _LineDevice(PDFTextDevice):
+    """
+    pdfminer device that only records where each glyph lands. It skips the
+    LTChar objects and layout analysis pdfplumber does, then groups the glyphs
+    into lines with the same tolerances extract_text(x_tolerance=2, y_tolerance=3) uses.
+    """
+
+    def __init__(self, rsrcmgr, x_tolerance=2, y_tolerance=3):
+        super().__init__(rsrcmgr)
+        self.x_tolerance = x_tolerance
+        self.y_tolerance = y_tolerance
+        self.chars = []
+
+    def begin_page(self, page, ctm):
+        self.chars = []
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            text = "\ufffd"
+        adv = font.char_width(cid) * fontsize * scaling
+        a, b, c, d, e, f = matrix
+        if not text.isspace():
+            # Blank glyphs only leave a gap, as with pdfplumber's keep_blank_chars=False
+            self.chars.append((f, e, e + adv * a, text))
+        return adv
+
+    def text(self):
+        lines = []
+        for y, x0, x1, char in sorted(self.chars, key=lambda ch: (-ch[0], ch[1])):
+            if lines and abs(lines[-1][0] - y) <= self.y_tolerance:
+                lines[-1][1].append((x0, x1, char))
+            else:
+                lines.append((y, [(x0, x1, char)]))
+
+        out = []
+        for _, chars in lines:
+            chars.sort()
+            line = ""
+            previous_end = None
+            for x0, x1, char in chars:
+                if previous_end is not None and x0 - previous_end > self.x_tolerance:
+                    line += " "
+                line += char
+                previous_end = x1
+            out.append(line)
+        return "\n".join(out)
+
+def page_texts_fast(data, page_numbers=None):
+    """
+    Page text straight from the pdfminer content stream interpreter.
+    """
+    wanted = None if page_numbers is None else set(page_numbers)
+    rsrcmgr = PDFResourceManager(caching=True)
+    device = _LineDevice(rsrcmgr)
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    with stage("transcript.open"):
+        document = PDFDocument(PDFParser(io.BytesIO(data)))
+
+    texts = []
+    for i, page in enumerate(PDFPage.create_pages(document)):
+        if wanted is not None and i not in wanted:
+            continue
+        with stage("transcript.extract_page"):
+            interpreter.process_page(page)
+            texts.append(device.text())
+    return texts
+
+def page_texts_layout(data, page_numbers=None):
+    """
+    Page text from pdfplumber's full character layout analysis.
+    """
+    texts = []
+    with stage("transcript.open"):
+        pdf = pdfplumber.open(io.BytesIO(data))
+    with pdf:
+        pages = pdf.pages if page_numbers is None else [pdf.pages[i] for i in page_numbers]
+        for page in pages:
+            with stage("transcript.extract_page_layout"):
+                texts.append(page.extract_text(x_tolerance=2, y_tolerance=3) or "")
+                page.close()
+    return texts
+
+BACKENDS = {
+    "fast": page_texts_fast,
+    "layout": page_texts_layout,
+}
+
+def looks_malformed(texts):
+    """
+    True when extracted text is empty or mostly undecodable glyphs, which happens
+    with fonts that have no Unicode mapping.
+    """
+    text = "".join(texts)
+    if not text.strip():
+        return True
+    bad = sum(1 for ch in text if ch == "\ufffd" or (ord(ch) < 32 and ch not in "\n\t"))
+    return bad / len(text) > 0.05
+
+def _courses_in_texts(texts):
+    found = set()
+    with stage("transcript.match"):
+        for text in texts:
+            found |= courses_in_text(text)
+    return found
+
+def _needs_layout(found, texts):
+    """
+    True when fast-backend text should be replaced by the layout path: it has no
+    course matches or looks malformed. Decided once over a whole document.
+    """
+    return not found or looks_malformed(texts)
+
+def parse_pages(data, page_numbers=None, backend=None, fallback=True):
+    """
+    Course codes on the given pages (all pages when None) of a PDF held in memory.
+
+    With the fast backend, the pdfplumber layout path is used instead when the fast
+    text has no course matches or looks malformed.
+    """
+    backend = backend or TRANSCRIPT_BACKEND
+    try:
+        texts = BACKENDS[backend](data, page_numbers)
+    except Exception as e:
+        if not fallback or backend == "layout":
+            raise
+        print(f"Fast transcript extraction failed, using layout: {e}")
+        return _courses_in_texts(page_texts_layout(data, page_numbers))
+
+    found = _courses_in_texts(texts)
+    if fallback and backend != "layout" and _needs_layout(found, texts):
+        found = _courses_in_texts(page_texts_layout(data, page_numbers))
+    return found
+
+def _page_count(data):
+    document = PDFDocument(PDFParser(io.BytesIO(data)))
+    count = resolve1(resolve1(document.catalog["Pages"]).get("Count"))
+    if isinstance(count, int):
+        return count
+    return sum(1 for _ in PDFPage.create_pages(document))
+
+def _in_worker(function, *args):
+    """
+    Run `function` in a pool worker and return (result, stages) so the parent can
+    record the worker's stage timings. Stages of a call that raises travel on the exception.
+    """
+    with collect_stages() as stages:
+        try:
+            return function(*args), stages
+        except Exception as e:
+            e.stages = stages
+            raise
+
+def _worker_result(future):
+    """
+    The result of an _in_worker() future, with the worker's stages recorded here.
+    """
+    try:
+        result, stages = future.result()
+    except Exception as e:
+        record_stages(getattr(e, "stages", ()))
+        raise
+    record_stages(stages)
+    return result
+
+def split_pdf(data, page_total, parts):
+    """
+    Cut a PDF into `parts` documents of consecutive pages, so each pool worker
+    is sent only its own pages (and the resources they use) instead of the whole file.
+    """
+    bounds = [page_total * i // parts for i in range(parts + 1)]
+    source = pypdfium2.PdfDocument(data)
+    try:
+        pieces = []
+        for start, end in zip(bounds, bounds[1:]):
+            piece = pypdfium2.PdfDocument.new()
+            try:
+                piece.import_pages(source, list(range(start, end)))
+                buffer = io.BytesIO()
+                piece.save(buffer)
+            finally:
+                piece.close()
+            pieces.append(buffer.getvalue())
+        return pieces
+    finally:
+        source.close()
+
+def _extract_in_pool(pieces, backend):
+    """
+    Page texts of every piece, extracted across the pool, in page order.
+    """
+    pool = get_pool()
+    futures = [pool.submit(_in_worker, BACKENDS[backend], piece) for piece in pieces]
+    texts = []
+    for future in futures:
+        texts.extend(_worker_result(future))
+    return texts
+
+def _parse_parallel(data, page_total):
+    """
+    Split the transcript into one run of consecutive pages per worker and extract
+    their text across the pool. The fast-or-layout decision is taken here over
+    the whole document, as parse_pages() takes it, never per piece: a piece of
+    only header pages has no courses without anything being wrong with it.
+    """
+    workers = min(TRANSCRIPT_WORKERS, page_total)
+    with stage("transcript.split"):
+        pieces = split_pdf(data, page_total, workers)
+    backend = TRANSCRIPT_BACKEND
+    if backend != "layout":
+        try:
+            texts = _extract_in_pool(pieces, backend)
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            print(f"Fast transcript extraction failed, using layout: {e}")
+        else:
+            found = _courses_in_texts(texts)
+            if not _needs_layout(found, texts):
+                return found
+    return _courses_in_texts(_extract_in_pool(pieces, "layout"))
+
+def parse_transcript_bytes(data: bytes) -> List[str]:
+    """
+    Course codes in a transcript PDF held in memory. Results are cached by the
+    SHA-256 of the bytes, so re-uploading the same transcript skips parsing.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    courses = _cache_get(digest)
+    if courses is not None:
+        return list(courses)
+
+    try:
+        with stage("transcript.page_count"):
+            page_total = _page_count(data)
+        if TRANSCRIPT_WORKERS > 1 and page_total >= PARALLEL_MIN_PAGES:
+            try:
+                # The workers' own stages are sent back and recorded by _parse_parallel
+                with stage("transcript.parallel"):
+                    found = _parse_parallel(data, page_total)
+            except BrokenProcessPool:
+                _reset_pool()
+                found = parse_pages(data)
+        else:
+            found = parse_pages(data)
+    except Exception as e:
+        print(f"Error parsing PDF: {e}")
+        return []
+
+    courses = sorted(found)
+    _cache_put(digest, tuple(courses))
+    return courses
 
-def extract_all_courses(pdf_path: str) -> List[str]:
+def extract_all_courses(pdf: Union[str, bytes]) -> List[str]:
     """
     Parses a UTA Unofficial Civil Engineering Undergrad transcript PDF to find all course codes.
+
+    :param pdf: Path to the PDF, or its contents as bytes.
     """
-    semester_course_pattern = re.compile(r'^([A-Z]{2,4}(?:-[A-Z]{2})?)\s(\d{4}).*?\d+\.\d{3}\s+\d+\.\d{3}')
-    transfer_test_pattern = re.compile(
-        r'Transferred to Term \d{4} (?:Summer|Spring|Fall) as\s*\n\s*([A-Z]{3,4}\s\d{4})',
-        re.IGNORECASE
-    )
+    if isinstance(pdf, (bytes, bytearray)):
+        return parse_transcript_bytes(bytes(pdf))
 
-    found_courses_set = set()
-    
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text(x_tolerance=2, y_tolerance=3)
-                if not text:
-                    continue
-                
-                for course_code in transfer_test_pattern.findall(text):
-                    found_courses_set.add(course_code)
-                
-                for line in text.split('\n'):
-                    match = semester_course_pattern.match(line.strip())
-                    if match:
-                        found_courses_set.add(f"{match.group(1)} {match.group(2)}")
-                        
+        with open(pdf, "rb") as f:
+            data = f.read()
     except Exception as e:
         print(f"Error parsing PDF: {e}")
         return []
+    return parse_transcript_bytes(data)
+
+# --- Batches ---
+
+def _parse_whole(data):
+    """
+    Sorted course codes of one transcript; runs in a pool worker and lets errors propagate.
+    """
+    return sorted(parse_pages(data))
+
+def extract_batch(transcripts: Iterable[Tuple[str, Callable[[], bytes]]],
+                  max_pending: int = None) -> Iterator[dict]:
+    """
+    Parse many transcripts across the process pool, yielding each result as soon
+    as it is ready (so not in input order).
+
+    Transcripts are read lazily: `read()` is only called when fewer than
+    `max_pending` transcripts are queued or parsing, so at most that many PDFs
+    are held in memory however long the batch is. Each transcript is parsed
+    whole by one worker; cached transcripts are answered without the pool.
 
-    return sorted(list(found_courses_set))
\ No newline at end of file
+    :param transcripts: (name, read) pairs, where read() returns the PDF bytes.
+    :param max_pending: Transcripts in flight; defaults to twice the worker count.
+    :return: {"index", "file", "courses", "error"} per transcript; "error" is None
+             on success, and "courses" is empty when it isn't.
+    """
+    max_pending = max_pending or 2 * TRANSCRIPT_WORKERS
+    transcripts = iter(enumerate(transcripts))
+    pending = {}  # future -> (index, name, digest, pool it was submitted to)
+
+    def result(index, name, courses=(), error=None):
+        return {"index": index, "file": name, "courses": list(courses), "error": error}
+
+    try:
+        exhausted = False
+        while not exhausted or pending:
+            while not exhausted and len(pending) < max_pending:
+                item = next(transcripts, None)
+                if item is None:
+                    exhausted = True
+                    break
+                index, (name, read) = item
+                try:
+                    data = read()
+                except Exception as e:
+                    yield result(index, name, error=str(e))
+                    continue
+                if not data.startswith(b"%PDF"):
+                    yield result(index, name, error="Not a PDF file")
+                    continue
+
+                digest = hashlib.sha256(data).hexdigest()
+                courses = _cache_get(digest)
+                if courses is not None:
+                    yield result(index, name, courses)
+                    continue
+                if TRANSCRIPT_WORKERS <= 1:
+                    try:
+                        courses = _parse_whole(data)
+                    except Exception as e:
+                        yield result(index, name, error=f"Could not parse PDF: {e}")
+                        continue
+                    _cache_put(digest, tuple(courses))
+                    yield result(index, name, courses)
+                    continue
+                pool = get_pool()
+                try:
+                    future = pool.submit(_in_worker, _parse_whole, data)
+                except BrokenProcessPool:
+                    _reset_pool()
+                    pool = get_pool()
+                    future = pool.submit(_in_worker, _parse_whole, data)
+                pending[future] = (index, name, digest, pool)
+
+            if not pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, name, digest, pool = pending.pop(future)
+                try:
+                    courses = _worker_result(future)
+                except BrokenProcessPool:
+                    if pool is _pool:  # every future of a crashed pool fails; replace it once
+                        _reset_pool()
+                    yield result(index, name, error="Transcript worker crashed")
+                    continue
+                except Exception as e:
+                    yield result(index, name, error=f"Could not parse PDF: {e}")
+                    continue
+                _cache_put(digest, tuple(courses))
+                yield result(index, name, courses)
+    finally:
+        # The caller stopped early (e.g. the client disconnected): drop queued work
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,247 @@
+import math
+
+from .degree_plan import credit_hours, is_placeholder, placeholder_pattern
+from .prereq_graph import normalize_course_id
+
+DEFAULT_CREDIT_CAP = 15
+
+class DegreePlanner:
+    """
+    Builds a semester-by-semester plan to finish a degree plan.
+
+    The plan is list-scheduled: each semester takes the courses whose
+    prerequisites are done, highest priority first, until the credit cap is hit.
+    Priority is the course's critical-path length (how many semesters of
+    courses still chain after it) and then how many courses it unlocks, which
+    keeps the longest prerequisite chains moving and so shortens the plan.
+    Corequisites are scheduled in the same semester as the course that needs
+    them. Placeholder slots ("HIST 13XX") are filled by matching completed
+    courses; slots with elective options in the plan ("CE 43XX") are assigned
+    the options with the shortest prerequisite chains.
+
+    Critical paths and unlock counts are computed once for the whole plan, so a
+    call to plan() only does the semester loop. The reported lower bound is the
+    larger of the longest remaining chain and remaining credits / cap; it treats
+    "X or Y" prerequisites as needing both, so it can overshoot slightly.
+    """
+
+    def __init__(self, plan):
+        """
+        :param plan: Degree plan from load_degree_plan().
+        """
+        self.required = plan["required"]
+        self.electives = plan["electives"]
+        self.entries = {entry["code"]: entry for entry in self.required + self.electives if not is_placeholder(entry["code"])}
+        self.slots = [entry for entry in self.required if is_placeholder(entry["code"])]
+        self.required_codes = [entry["code"] for entry in self.required if not is_placeholder(entry["code"])]
+
+        # Elective options per placeholder code, e.g. "CE 43XX" -> [CE 4305, CE 4306, ...]
+        required_set = set(self.required_codes)
+        self.options = {}
+        for slot in self.slots:
+            pattern = placeholder_pattern(slot["code"])
+            self.options[slot["code"]] = [
+                entry["code"] for entry in self.electives
+                if pattern.match(entry["code"]) and entry["code"] not in required_set
+            ]
+
+        self._compute_priorities()
+
+    def _compute_priorities(self):
+        """
+        Critical-path length and transitive unlock count of every plan course.
+        """
+        dependents = {code: set() for code in self.entries}
+        for code, entry in self.entries.items():
+            for group in entry["prereqs"]:
+                for required in group:
+                    if required in dependents:
+                        dependents[required].add(code)
+
+        self.critical_path = {}
+        self.unlocks = {}
+        self.chain_depth = {}
+
+        def visit(code, stack):
+            if code in self.critical_path:
+                return
+            stack.add(code)
+            below = set()
+            longest = 0
+            for dependent in dependents[code]:
+                if dependent in stack:
+                    continue  # ignore a cycle in the plan data rather than recurse forever
+                visit(dependent, stack)
+                longest = max(longest, self.critical_path[dependent])
+                below |= {dependent} | self._descendants[dependent]
+            stack.discard(code)
+            self.critical_path[code] = longest + 1
+            self._descendants[code] = below
+            self.unlocks[code] = len(below)
+
+        self._descendants = {}
+        for code in self.entries:
+            visit(code, set())
+
+        def depth(code, stack):
+            if code in self.chain_depth:
+                return self.chain_depth[code]
+            stack.add(code)
+            deepest = 0
+            for group in self.entries[code]["prereqs"]:
+                options = [c for c in group if c in self.entries and c not in stack]
+                if options:
+                    deepest = max(deepest, 1 + min(depth(c, stack) for c in options))
+            stack.discard(code)
+            self.chain_depth[code] = deepest
+            return deepest
+
+        for code in self.entries:
+            depth(code, set())
+
+    def _assign_slots(self, completed):
+        """
+        Fill placeholder slots with completed courses first, then with elective options.
+
+        :return: (courses to schedule, slots still open as generic placeholders, fills)
+                 where fills maps each chosen elective option to the slot it fills.
+        """
+        to_schedule = [code for code in self.required_codes if code not in completed]
+        used = set(self.required_codes)
+        open_slots = []
+        fills = {}
+
+        for slot in self.slots:
+            pattern = placeholder_pattern(slot["code"])
+            match = next((code for code in sorted(completed) if code not in used and pattern.match(code)), None)
+            if match is not None:
+                used.add(match)
+                continue
+
+            options = [code for code in self.options[slot["code"]] if code not in used]
+            if options:
+                done = [code for code in options if code in completed]
+                choice = done[0] if done else min(options, key=lambda code: (self.chain_depth[code], code))
+                used.add(choice)
+                if choice not in completed:
+                    to_schedule.append(choice)
+                    fills[choice] = slot["code"]
+            else:
+                open_slots.append(slot)
+
+        return to_schedule, open_slots, fills
+
+    def plan(self, completed, credit_cap=DEFAULT_CREDIT_CAP, max_semesters=16):
+        """
+        Plan the remaining semesters for a student.
+
+        :param completed: Completed course codes, as returned by /api/process-file.
+        :param credit_cap: Maximum credit hours per semester.
+        :param max_semesters: Stop planning after this many semesters.
+        :return: {"semesters": [{"term", "credits", "courses": [{"code", "name", "credits", ...}]}],
+                  "total_semesters", "lower_bound_semesters", "assumed", "unscheduled"}
+        """
+        completed = {normalize_course_id(code) for code in completed}
+        to_schedule, open_slots, fills = self._assign_slots(completed)
+        remaining = set(to_schedule)
+        total_credits = sum(self.entries[code]["credits"] for code in to_schedule) + \
+            sum(credit_hours(slot["code"]) for slot in open_slots)
+        plan_codes = remaining | completed
+
+        done = set(completed)
+        credits_done = sum(credit_hours(code) for code in completed)
+        assumed = set()
+
+        def group_met(group, available):
+            if group & available:
+                return True
+            if not group & plan_codes:
+                # Nothing in the plan or transcript can satisfy it (e.g. placement
+                # into MATH 1421); assume it is met and report it.
+                assumed.update(group)
+                return True
+            return False
+
+        def prereqs_met(code):
+            entry = self.entries[code]
+            return credits_done >= entry["min_credits"] and all(group_met(group, done) for group in entry["prereqs"])
+
+        def bundle_for(code, ready, chosen):
+            """
+            The course plus every corequisite that has to be added with it this semester,
+            or None if a corequisite can't be taken yet.
+            """
+            bundle = [code]
+            pending = [code]
+            while pending:
+                current = pending.pop()
+                for group in self.entries[current]["coreqs"]:
+                    in_semester = done | chosen | set(bundle)
+                    if group_met(group, in_semester):
+                        continue
+                    candidates = sorted(c for c in group if c in ready)
+                    if not candidates:
+                        return None
+                    bundle.append(candidates[0])
+                    pending.append(candidates[0])
+            return bundle
+
+        def priority(code):
+            return (-self.critical_path[code], -self.unlocks[code], code)
+
+        semesters = []
+        while (remaining or open_slots) and len(semesters) < max_semesters:
+            ready = {code for code in remaining if prereqs_met(code)}
+            chosen = set()
+            load = 0
+            for code in sorted(ready, key=priority):
+                if code in chosen:
+                    continue
+                bundle = bundle_for(code, ready, chosen)
+                if bundle is None:
+                    continue
+                bundle_credits = sum(self.entries[c]["credits"] for c in bundle if c not in chosen)
+                if load + bundle_credits <= credit_cap:
+                    chosen.update(bundle)
+                    load += bundle_credits
+
+            # Generic slots (HIST 13XX, LPC XXXX, ...) have no requisites; they fill spare room
+            while open_slots and load + credit_hours(open_slots[0]["code"]) <= credit_cap:
+                slot = open_slots.pop(0)
+                chosen.add(slot["code"] + f"#{len(semesters)}-{len(chosen)}")
+                load += credit_hours(slot["code"])
+
+            if not chosen:
+                break
+
+            courses = []
+            for code in sorted(chosen, key=lambda c: (is_placeholder(c.split("#")[0]), c)):
+                base = code.split("#")[0]
+                entry = self.entries.get(base)
+                course = {
+                    "code": base,
+                    "name": entry["name"] if entry else next(s["name"] for s in self.slots if s["code"] == base),
+                    "credits": entry["credits"] if entry else credit_hours(base),
+                }
+                if base in fills:
+                    course["fills"] = fills[base]
+                courses.append(course)
+            semesters.append({"term": len(semesters) + 1, "credits": load, "courses": courses})
+
+            real = {code for code in chosen if "#" not in code}
+            remaining -= real
+            done |= real
+            credits_done += load
+
+        lower_bound = max(
+            max((self.critical_path[code] for code in to_schedule), default=0),
+            math.ceil(total_credits / credit_cap) if credit_cap else 0,
+        )
+
+        return {
+            "semesters": semesters,
+            "total_semesters": len(semesters),
+            "lower_bound_semesters": lower_bound,
+            "assumed": sorted(assumed - plan_codes),
+            "unscheduled": sorted(remaining) + [slot["code"] for slot in open_slots],
+        }
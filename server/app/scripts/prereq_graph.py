@@ -0,0 +1,507 @@
+import os
+import re
+
+from ..data import connect, query, table_exists
+
+# Edges live in one table for the whole catalog:
+#   CourseRequisites(Course_Num, Required_Course, Kind)
+# where Kind is 'prereq' or 'coreq' and course ids use a plain space ("MATH 1426").
+PREREQ = "prereq"
+COREQ = "coreq"
+
+# A course id as users type it: any case, with or without the space ("ce3305")
+TYPED_COURSE_RE = re.compile(r'([A-Za-z]{2,4})\s*(\d{4})')
+
+def normalize_course_id(course_id):
+    """
+    Collapse whitespace, including the catalog's non-breaking spaces, and spell
+    a course id the catalog's way: "ce3305" and "CE\u00A03305" become "CE 3305".
+    """
+    course_id = " ".join(course_id.replace('\u00A0', ' ').split())
+    match = TYPED_COURSE_RE.fullmatch(course_id)
+    if match:
+        return f"{match.group(1).upper()} {match.group(2)}"
+    return course_id
+
+# Course codes in catalog text, with a regular or non-breaking space ("MATH\u00A01426")
+TEXT_COURSE_RE = re.compile(r'\b([A-Z]{2,4})\s(\d{4})\b')
+# Where a description's requisite block starts
+REQUISITE_START_RE = re.compile(r'prerequisite|corequisite|concurrent', re.IGNORECASE)
+# Grade qualifiers, whose "or" doesn't join two courses ("C or better")
+GRADE_QUALIFIER_RE = re.compile(r'\b[A-F][+-]?\s+or\s+better\b', re.IGNORECASE)
+# Text between two codes that ends a group of alternatives; "and/or" is an "or"
+AND_RE = re.compile(r'\band\b(?!/or)|[;.]', re.IGNORECASE)
+# Text between two codes that makes them alternatives: an "or" right before the second code
+OR_GAP_RE = re.compile(r'\bor\s*(?:either\s*)?\(?\s*$', re.IGNORECASE)
+# A bare list comma, and the ", or" that closes a list of alternatives ("A, B, or C")
+LIST_COMMA_RE = re.compile(r'^\s*,\s*$')
+OXFORD_OR_RE = re.compile(r'^\s*,\s*or\b', re.IGNORECASE)
+
+def requisite_groups(description):
+    """
+    The course codes of a description's requisite block as AND-of-OR groups:
+    every group must be met by one of its courses. Codes only share a group
+    when an "or" directly precedes the second one, or in a list closed by
+    ", or"; anything else between two codes ("or consent of instructor,")
+    separates them.
+
+    "CE 2311; MATH 2425" -> [{CE 2311}, {MATH 2425}]
+    "MATH 1421 or MATH 1426, and PHYS 1443" -> [{MATH 1421, MATH 1426}, {PHYS 1443}]
+    "CSE 3318, IE 3301 or MATH 3313" -> [{CSE 3318}, {IE 3301, MATH 3313}]
+    "CE 3305, CE 3334, or CE 3343" -> [{CE 3305, CE 3334, CE 3343}]
+    """
+    start = REQUISITE_START_RE.search(description or "")
+    if start is None:
+        return []
+    text = description[start.start():]
+    matches = list(TEXT_COURSE_RE.finditer(text))
+    if not matches:
+        return []
+
+    connectors = []
+    following = "and"
+    gaps = [GRADE_QUALIFIER_RE.sub(" ", text[previous.end():current.start()])
+            for previous, current in zip(matches, matches[1:])]
+    for gap in reversed(gaps):
+        if LIST_COMMA_RE.match(gap):
+            connectors.append(following)  # a list comma joins like the list's closing connector
+            continue
+        connector = "or" if OR_GAP_RE.search(gap) and not AND_RE.search(gap) else "and"
+        following = "or" if connector == "or" and OXFORD_OR_RE.match(gap) else "and"
+        connectors.append(connector)
+    connectors.reverse()
+
+    groups = [{f"{matches[0].group(1)} {matches[0].group(2)}"}]
+    for connector, match in zip(connectors, matches[1:]):
+        code = f"{match.group(1)} {match.group(2)}"
+        if connector == "or":
+            groups[-1].add(code)
+        else:
+            groups.append({code})
+    return list(dict.fromkeys(frozenset(group) for group in groups))
+
+def split_requisites(value):
+    """
+    Split a legacy comma-joined Pre_Requisites/Co_Requisites column into course ids.
+    """
+    if not value:
+        return set()
+    return {normalize_course_id(item) for item in value.split(",") if item.strip()}
+
+def create_requisite_table(cur):
+    """
+    Create the edge table with indexes in both directions. When the table is new,
+    it is backfilled from the legacy string columns of every ClassesFor{dept} table.
+    """
+    exists = table_exists(cur, "CourseRequisites")
+
+    cur.execute("""CREATE TABLE IF NOT EXISTS CourseRequisites(
+                                    Course_Num VARCHAR(10) NOT NULL,
+                                    Required_Course VARCHAR(10) NOT NULL,
+                                    Kind VARCHAR(6) NOT NULL,
+                                    PRIMARY KEY(Course_Num, Required_Course, Kind)
+                                    )""")
+    # The primary key covers "what does X require"; this one covers "what requires X"
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_requisites_required ON CourseRequisites(Required_Course, Kind)")
+
+    if not exists:
+        backfill_requisites(cur)
+
+def backfill_requisites(cur):
+    """
+    Fill CourseRequisites from the Pre_Requisites/Co_Requisites strings of every
+    ClassesFor{dept} table.
+    """
+    cur.execute(query("course_tables"))
+    for (table,) in cur.fetchall():
+        cur.execute(query("requisite_columns", table[len("ClassesFor"):]))
+        for course_num, prereqs, coreqs in cur.fetchall():
+            replace_requisites(cur, course_num, split_requisites(prereqs), split_requisites(coreqs))
+
+def replace_requisites(cur, course_num, prereqs, coreqs):
+    """
+    Make the stored edges of one course match `prereqs`/`coreqs`.
+
+    :return: True if the course's edges changed.
+    """
+    course_num = normalize_course_id(course_num)
+    new_edges = {(normalize_course_id(c), PREREQ) for c in prereqs} | {(normalize_course_id(c), COREQ) for c in coreqs}
+
+    cur.execute("SELECT Required_Course, Kind FROM CourseRequisites WHERE Course_Num = ?", (course_num,))
+    old_edges = set(cur.fetchall())
+    if old_edges == new_edges:
+        return False
+
+    cur.execute("DELETE FROM CourseRequisites WHERE Course_Num = ?", (course_num,))
+    cur.executemany(
+        "INSERT INTO CourseRequisites (Course_Num, Required_Course, Kind) VALUES (?, ?, ?)",
+        [(course_num, required, kind) for required, kind in sorted(new_edges)],
+    )
+    return True
+
+def delete_requisites(cur, course_num):
+    cur.execute("DELETE FROM CourseRequisites WHERE Course_Num = ?", (normalize_course_id(course_num),))
+
+def load_requisites(conn, courses=None):
+    """
+    Read {course: (prereqs, coreqs)} from the database, for every course or only
+    for `courses`. Databases scraped before the edge table existed are read from
+    the legacy string columns instead.
+    """
+    cur = conn.cursor()
+    if not table_exists(cur, "CourseRequisites"):
+        requisites = {}
+        cur.execute(query("course_tables"))
+        for (table,) in cur.fetchall():
+            cur.execute(query("requisite_columns", table[len("ClassesFor"):]))
+            for course_num, prereqs, coreqs in cur.fetchall():
+                requisites[normalize_course_id(course_num)] = (split_requisites(prereqs), split_requisites(coreqs))
+    else:
+        requisites = {}
+        if courses is None:
+            cur.execute("SELECT Course_Num, Required_Course, Kind FROM CourseRequisites")
+            rows = cur.fetchall()
+        else:
+            courses = [normalize_course_id(course) for course in courses]
+            rows = []
+            for course in courses:
+                requisites[course] = (set(), set())
+                cur.execute("SELECT Course_Num, Required_Course, Kind FROM CourseRequisites WHERE Course_Num = ?", (course,))
+                rows.extend(cur.fetchall())
+        for course_num, required, kind in rows:
+            prereqs, coreqs = requisites.setdefault(course_num, (set(), set()))
+            (coreqs if kind == COREQ else prereqs).add(required)
+
+    if courses is not None:
+        requisites = {course: requisites.get(course, (set(), set())) for course in courses}
+    return requisites
+
+def _iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class PrerequisiteGraph:
+    """
+    Compiled prerequisite DAG of the catalog.
+
+    Every course gets a bit index. The transitive closure over prerequisite edges
+    is precomputed as integer bitsets (upstream = everything a course ultimately
+    depends on, downstream = everything that ultimately depends on it), together
+    with each course's topological depth, so chain lookups are set lookups rather
+    than repeated SQL and string parsing. Corequisites are kept as direct edges.
+
+    Prerequisite cycles are detected with Tarjan's SCC algorithm and reported in
+    `cycles`; courses in a cycle share the cycle's upstream set and depth.
+    """
+
+    def __init__(self, requisites=None):
+        """
+        :param requisites: {course: (prereqs, coreqs)}, as returned by load_requisites.
+        """
+        self._build(requisites or {})
+
+    @classmethod
+    def from_db(cls, db_path):
+        """
+        Build the graph from a classes database; a missing file gives an empty graph.
+        """
+        if not os.path.exists(db_path):
+            return cls()
+        conn = connect(db_path)
+        try:
+            return cls(load_requisites(conn))
+        finally:
+            conn.close()
+
+    # --- Construction ---
+
+    def _index_of(self, course):
+        index = self.index.get(course)
+        if index is None:
+            index = len(self.courses)
+            self.index[course] = index
+            self.courses.append(course)
+            self._prereqs.append(set())
+            self._coreqs.append(set())
+        return index
+
+    def _build(self, requisites):
+        self.index = {}
+        self.courses = []
+        self._prereqs = []  # bit index -> set of direct prerequisite indexes
+        self._coreqs = []   # bit index -> set of direct corequisite indexes
+
+        for course, (prereqs, coreqs) in requisites.items():
+            index = self._index_of(normalize_course_id(course))
+            for required in prereqs:
+                self._prereqs[index].add(self._index_of(normalize_course_id(required)))
+            for required in coreqs:
+                self._coreqs[index].add(self._index_of(normalize_course_id(required)))
+
+        self._compile()
+
+    def _compile(self):
+        count = len(self.courses)
+        self._upstream = [0] * count
+        self._downstream = [0] * count
+        self._depth = [0] * count
+        self._rank = [0] * count     # position of the course's SCC in topological order
+        self._cyclic = [False] * count
+        self.cycles = []
+
+        for rank, component in enumerate(self._strongly_connected_components()):
+            members = set(component)
+            members_mask = 0
+            for v in component:
+                members_mask |= 1 << v
+            cyclic = len(component) > 1 or any(v in self._prereqs[v] for v in component)
+
+            upstream = 0
+            depth = 0
+            for v in component:
+                for u in self._prereqs[v]:
+                    if u not in members:
+                        upstream |= self._upstream[u] | (1 << u)
+                        depth = max(depth, self._depth[u] + 1)
+
+            if cyclic:
+                self.cycles.append(sorted(self.courses[v] for v in component))
+
+            for v in component:
+                self._upstream[v] = upstream | (members_mask & ~(1 << v) if cyclic else 0)
+                self._depth[v] = depth
+                self._rank[v] = rank
+                self._cyclic[v] = cyclic
+
+        for v in range(count):
+            for a in _iter_bits(self._upstream[v]):
+                self._downstream[a] |= 1 << v
+
+    def _strongly_connected_components(self):
+        """
+        Iterative Tarjan over "requires" edges. Components come out sinks first,
+        i.e. every course's prerequisites are emitted before the course itself.
+        """
+        count = len(self.courses)
+        index_of = [-1] * count
+        lowlink = [0] * count
+        on_stack = [False] * count
+        stack = []
+        components = []
+        counter = 0
+
+        for root in range(count):
+            if index_of[root] != -1:
+                continue
+            work = [(root, iter(self._prereqs[root]))]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                v, children = work[-1]
+                advanced = False
+                for u in children:
+                    if index_of[u] == -1:
+                        index_of[u] = lowlink[u] = counter
+                        counter += 1
+                        stack.append(u)
+                        on_stack[u] = True
+                        work.append((u, iter(self._prereqs[u])))
+                        advanced = True
+                        break
+                    if on_stack[u]:
+                        lowlink[v] = min(lowlink[v], index_of[u])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[v])
+                if lowlink[v] == index_of[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+
+        return components
+
+    # --- Incremental updates ---
+
+    def apply_changes(self, changes):
+        """
+        Replace the direct requisites of the given courses and update the closure.
+
+        Only the changed courses and their downstream courses are recomputed. A full
+        rebuild is done instead when a change adds new courses, touches a cycle, or
+        adds an edge that goes against the current topological order.
+
+        :param changes: {course: (prereqs, coreqs)}
+        """
+        changes = {
+            normalize_course_id(course): ({normalize_course_id(c) for c in prereqs}, {normalize_course_id(c) for c in coreqs})
+            for course, (prereqs, coreqs) in changes.items()
+        }
+        known = self.index
+        new_courses = any(
+            course not in known or any(c not in known for c in prereqs | coreqs)
+            for course, (prereqs, coreqs) in changes.items()
+        )
+
+        needs_rebuild = new_courses
+        if not needs_rebuild:
+            for course, (prereqs, _) in changes.items():
+                v = known[course]
+                if self._cyclic[v] or any(self._rank[known[c]] >= self._rank[v] for c in prereqs):
+                    needs_rebuild = True
+                    break
+
+        if needs_rebuild:
+            requisites = self.requisites()
+            requisites.update(changes)
+            self._build(requisites)
+            return
+
+        changed = 0
+        for course, (prereqs, coreqs) in changes.items():
+            v = known[course]
+            self._prereqs[v] = {known[c] for c in prereqs}
+            self._coreqs[v] = {known[c] for c in coreqs}
+            changed |= 1 << v
+
+        # Changing a course's prerequisites doesn't change who depends on it, so the
+        # affected set is the changed courses plus their existing downstream courses
+        affected = changed
+        for v in _iter_bits(changed):
+            affected |= self._downstream[v]
+        affected_nodes = list(_iter_bits(affected))
+        if any(self._cyclic[v] for v in affected_nodes):
+            requisites = self.requisites()
+            requisites.update(changes)
+            self._build(requisites)
+            return
+
+        for v in sorted(affected_nodes, key=self._rank.__getitem__):
+            old_upstream = self._upstream[v]
+            upstream = 0
+            depth = 0
+            for u in self._prereqs[v]:
+                upstream |= self._upstream[u] | (1 << u)
+                depth = max(depth, self._depth[u] + 1)
+            self._upstream[v] = upstream
+            self._depth[v] = depth
+
+            bit = 1 << v
+            for a in _iter_bits(old_upstream & ~upstream):
+                self._downstream[a] &= ~bit
+            for a in _iter_bits(upstream & ~old_upstream):
+                self._downstream[a] |= bit
+
+    def updated(self, requisites):
+        """
+        Graph for a newer `requisites`, derived from this one: the courses whose
+        direct requisites differ go through apply_changes() on a copy, so only
+        they and their downstream courses are recomputed. This graph is left as
+        it is for the requests still reading it. A course that disappeared from
+        the catalog makes it a full rebuild.
+
+        :param requisites: {course: (prereqs, coreqs)}, as returned by load_requisites.
+        """
+        requisites = {
+            normalize_course_id(course): ({normalize_course_id(c) for c in prereqs}, {normalize_course_id(c) for c in coreqs})
+            for course, (prereqs, coreqs) in requisites.items()
+        }
+        universe = set(requisites)
+        for prereqs, coreqs in requisites.values():
+            universe |= prereqs | coreqs
+        if not universe.issuperset(self.courses):
+            return PrerequisiteGraph(requisites)
+
+        empty = (set(), set())
+        changes = {course: edges for course, edges in requisites.items() if self._edges(course) != edges}
+        changes.update({course: empty for course in self.courses
+                        if course not in requisites and self._edges(course) != empty})
+        if not changes:
+            return self
+
+        graph = PrerequisiteGraph.__new__(PrerequisiteGraph)
+        graph.index = dict(self.index)
+        graph.courses = list(self.courses)
+        graph._prereqs = [set(edges) for edges in self._prereqs]
+        graph._coreqs = [set(edges) for edges in self._coreqs]
+        graph._upstream, graph._downstream = list(self._upstream), list(self._downstream)
+        graph._depth, graph._rank, graph._cyclic = list(self._depth), list(self._rank), list(self._cyclic)
+        graph.cycles = [list(cycle) for cycle in self.cycles]
+        graph.apply_changes(changes)
+        return graph
+
+    def _edges(self, course):
+        v = self.index.get(course)
+        if v is None:
+            return None
+        return {self.courses[u] for u in self._prereqs[v]}, {self.courses[u] for u in self._coreqs[v]}
+
+    # --- Lookups ---
+
+    def __contains__(self, course):
+        return normalize_course_id(course) in self.index
+
+    def __len__(self):
+        return len(self.courses)
+
+    def _names(self, mask):
+        return {self.courses[i] for i in _iter_bits(mask)}
+
+    def requisites(self):
+        """
+        The direct requisites of every course: {course: (prereqs, coreqs)}.
+        """
+        return {
+            course: ({self.courses[u] for u in self._prereqs[v]}, {self.courses[u] for u in self._coreqs[v]})
+            for v, course in enumerate(self.courses)
+        }
+
+    def prerequisites(self, course):
+        return {self.courses[u] for u in self._prereqs[self.index[normalize_course_id(course)]]}
+
+    def corequisites(self, course):
+        return {self.courses[u] for u in self._coreqs[self.index[normalize_course_id(course)]]}
+
+    def upstream_mask(self, course):
+        return self._upstream[self.index[normalize_course_id(course)]]
+
+    def downstream_mask(self, course):
+        return self._downstream[self.index[normalize_course_id(course)]]
+
+    def upstream(self, course):
+        """
+        Every course `course` ultimately depends on through prerequisites.
+        """
+        return self._names(self.upstream_mask(course))
+
+    def downstream(self, course):
+        """
+        Every course that ultimately depends on `course` through prerequisites.
+        """
+        return self._names(self.downstream_mask(course))
+
+    def depends_on(self, course, required):
+        """
+        True if `required` is anywhere in the prerequisite chain of `course`.
+        """
+        index = self.index.get(normalize_course_id(required))
+        return index is not None and bool(self.upstream_mask(course) >> index & 1)
+
+    def depth(self, course):
+        """
+        Length of the longest prerequisite chain below `course` (0 = no prerequisites).
+        """
+        return self._depth[self.index[normalize_course_id(course)]]
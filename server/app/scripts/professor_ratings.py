@@ -0,0 +1,383 @@
+import argparse
+import heapq
+import os
+import re
+
+import numpy as np
+
+from ..data import PROFESSORS_DB_PATH, connect, table_exists
+
+DEFAULT_DB_PATH = PROFESSORS_DB_PATH
+
+# SQLite integers are signed 64-bit, so a professor's tag bitset holds at most 63 tags
+MAX_TAGS = 63
+
+# Course subject -> RateMyProfessors departments that teach it
+SUBJECT_DEPARTMENTS = {
+    "CE": ("Engineering", "Civil Engineering"),
+    "ENGR": ("Engineering",),
+    "IE": ("Industrial Engineering",),
+    "ME": ("Mechanical Engineering",),
+    "EE": ("Electrical Engineering",),
+    "CSE": ("Computer Science", "Computer Science Engineering", "Computer Science & Engineering"),
+    "BE": ("Bioengineering",),
+    "MATH": ("Mathematics",),
+    "PHYS": ("Physics",),
+    "CHEM": ("Chemistry",),
+    "GEOL": ("Geology",),
+    "ENGL": ("English",),
+    "HIST": ("History",),
+    "POLS": ("Political Science",),
+    "COMS": ("Communication",),
+    "ECON": ("Economics",),
+}
+
+# Recognized answers of the ranking preferences, as preference_key() folds them
+PREFERENCE_OPTIONS = {
+    "assessmentType": ("test heavy", "assignment heavy"),
+    "attendanceRequired": ("required", "not required"),
+    "classSize": ("small", "medium", "large"),
+}
+PREFERENCE_FIELDS = tuple(PREFERENCE_OPTIONS)
+
+# Onboarding preference (folded) -> tag weights. Positive weights favour professors with the tag.
+PREFERENCE_TAG_WEIGHTS = {
+    ("assessmentType", "test heavy"): {
+        "Test heavy": 1.0, "Tests are tough": 0.5, "Lots of homework": -0.5, "So many papers": -0.5,
+    },
+    ("assessmentType", "assignment heavy"): {
+        "Lots of homework": 1.0, "So many papers": 0.5, "Group projects": 0.5,
+        "Tests? Not many": 0.5, "Test heavy": -1.0, "Tests are tough": -0.5,
+    },
+    ("attendanceRequired", "required"): {
+        "Participation matters": 1.0, "Skip class? You won't pass.": 0.5,
+    },
+    ("attendanceRequired", "not required"): {
+        "Participation matters": -1.0, "Skip class? You won't pass.": -1.0, "Online Savvy": 0.5,
+    },
+}
+
+# Score weights: rating quality, would-take-again, tag preferences, class size
+QUALITY_WEIGHT = 0.6
+TAKE_AGAIN_WEIGHT = 0.2
+TAG_WEIGHT = 0.1
+CLASS_SIZE_WEIGHT = 0.1
+# Ratings count a professor needs before their own average outweighs the overall mean
+PRIOR_RATINGS = 5
+
+# --- Parsing the raw scraped columns ---
+
+def parse_number(value):
+    """
+    "3.8" -> 3.8; "84%" -> 0.84; "N/A", "" or None -> None
+    """
+    value = (value or "").strip()
+    if not value or value.upper() == "N/A":
+        return None
+    try:
+        if value.endswith("%"):
+            return float(value[:-1]) / 100
+        return float(value)
+    except ValueError:
+        return None
+
+def normalize_department(department):
+    """
+    "Mathematicsdepartment" -> "Mathematics", "Computer Science amp Engineering" -> "Computer Science & Engineering"
+    """
+    department = re.sub(r'department$', '', (department or "").strip())
+    department = re.sub(r'\bamp\b', '&', department)
+    return " ".join(department.split())
+
+def split_tags(tags):
+    return [tag.strip() for tag in (tags or "").split(", ") if tag.strip()]
+
+def _tag_key(tag):
+    return tag.casefold()
+
+def preference_key(preferences):
+    """
+    (assessmentType, attendanceRequired, classSize) of a preferences dict folded
+    to PREFERENCE_OPTIONS: case and spacing are ignored and only the first word
+    of a class size counts ("Small (25)" -> "small"). Any other value, or one
+    that isn't a string, is None. Everything that caches results by preferences
+    keys on this, so two spellings share an entry exactly when they rank the same.
+    """
+    preferences = preferences if isinstance(preferences, dict) else {}
+    key = []
+    for field in PREFERENCE_FIELDS:
+        value = preferences.get(field)
+        value = " ".join(value.split()).casefold() if isinstance(value, str) else ""
+        if field == "classSize":
+            value = value.split(" ")[0]
+        key.append(value if value in PREFERENCE_OPTIONS[field] else None)
+    return tuple(key)
+
+# --- Ingest ---
+
+def create_ratings_tables(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS Tags (
+            Tag_Id INTEGER PRIMARY KEY,
+            Tag TEXT NOT NULL UNIQUE
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ProfessorRatings (
+            Professor_Id TEXT PRIMARY KEY,
+            Name TEXT NOT NULL,
+            Department TEXT NOT NULL,
+            Quality REAL,
+            Difficulty REAL,
+            Total_Ratings INTEGER NOT NULL DEFAULT 0,
+            Would_Take_Again REAL,
+            Tag_Bits INTEGER NOT NULL DEFAULT 0,
+            Url TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_professor_ratings_department ON ProfessorRatings(Department)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_professor_ratings_name ON ProfessorRatings(Name)")
+
+def typed_rows(raw_rows):
+    """
+    Parse raw professors rows (id, name, url, department, quality, difficulty,
+    total_ratings, would_take_again, tags) into typed rows plus the tag dictionary.
+
+    Tags that differ only by case ("Tough grader" / "Tough Grader") share one id;
+    the most common spelling is kept. Ids are assigned by frequency, so if there
+    are ever more than MAX_TAGS tags the rarest ones are dropped.
+
+    :return: (tags, rows) where tags is a list of tag names indexed by tag id.
+    """
+    spellings = {}
+    parsed = []
+    for prof_id, name, url, department, quality, difficulty, total, take_again, tags in raw_rows:
+        names = split_tags(tags)
+        for tag in names:
+            counts = spellings.setdefault(_tag_key(tag), {})
+            counts[tag] = counts.get(tag, 0) + 1
+        parsed.append((prof_id, name, url, normalize_department(department), parse_number(quality),
+                       parse_number(difficulty), int(parse_number(total) or 0), parse_number(take_again), names))
+
+    by_frequency = sorted(spellings.items(), key=lambda item: (-sum(item[1].values()), item[0]))
+    if len(by_frequency) > MAX_TAGS:
+        print(f"Warning: {len(by_frequency)} distinct tags, keeping the {MAX_TAGS} most common")
+        by_frequency = by_frequency[:MAX_TAGS]
+    tags = [max(counts, key=counts.get) for _, counts in by_frequency]
+    tag_ids = {key: i for i, (key, _) in enumerate(by_frequency)}
+
+    rows = []
+    for prof_id, name, url, department, quality, difficulty, total, take_again, names in parsed:
+        bits = 0
+        for tag in names:
+            tag_id = tag_ids.get(_tag_key(tag))
+            if tag_id is not None:
+                bits |= 1 << tag_id
+        rows.append((prof_id, name, department, quality, difficulty, total, take_again, bits, url))
+    return tags, rows
+
+def _read_raw_professors(conn):
+    return conn.execute("""
+        SELECT id, name, url, department, quality_rating,
+               difficulty_rating, total_ratings, would_take_again, tags
+        FROM professors
+    """).fetchall()
+
+def load_ratings(conn):
+    """
+    (tags, rows) from ProfessorRatings, or from the raw professors table parsed in
+    memory when the typed table hasn't been built yet.
+    """
+    if not table_exists(conn, "ProfessorRatings"):
+        return typed_rows(_read_raw_professors(conn))
+    tags = [tag for (tag,) in conn.execute("SELECT Tag FROM Tags ORDER BY Tag_Id")]
+    rows = conn.execute("""
+        SELECT Professor_Id, Name, Department, Quality, Difficulty, Total_Ratings,
+               Would_Take_Again, Tag_Bits, Url
+        FROM ProfessorRatings ORDER BY Professor_Id
+    """).fetchall()
+    return tags, rows
+
+def build_ratings_table(db_path=DEFAULT_DB_PATH):
+    """
+    Rebuild ProfessorRatings and Tags from the raw professors table in one transaction.
+
+    :return: Number of professors written.
+    """
+    conn = connect(db_path, readonly=False)
+    try:
+        tags, rows = typed_rows(_read_raw_professors(conn))
+        with conn:
+            cur = conn.cursor()
+            create_ratings_tables(cur)
+            cur.execute("DELETE FROM ProfessorRatings")
+            cur.execute("DELETE FROM Tags")
+            cur.executemany("INSERT INTO Tags (Tag_Id, Tag) VALUES (?, ?)", list(enumerate(tags)))
+            cur.executemany("""
+                INSERT INTO ProfessorRatings (Professor_Id, Name, Department, Quality, Difficulty,
+                                              Total_Ratings, Would_Take_Again, Tag_Bits, Url)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        return len(rows)
+    finally:
+        conn.close()
+
+# --- Ranking ---
+
+class ProfessorRanker:
+    """
+    Ranks professors against a student's onboarding preferences.
+
+    The typed ratings are loaded once into NumPy arrays: a base score per
+    professor (confidence-weighted quality plus would-take-again), a professor x
+    tag 0/1 matrix, and a class-size signal. Preferences become a tag weight
+    vector, so scoring a department is one matrix-vector product, and the top k
+    come out of a heap rather than a full sort.
+
+    RateMyProfessors has no class sizes; the number of ratings stands in for
+    them, since bigger sections leave more reviews.
+    """
+
+    def __init__(self, tags, rows):
+        """
+        :param tags: Tag names indexed by tag id.
+        :param rows: (id, name, department, quality, difficulty, total, take_again, tag_bits, url) tuples.
+        """
+        self.tags = tags
+        self.tag_ids = {_tag_key(tag): i for i, tag in enumerate(tags)}
+        self.rows = rows
+        n = len(rows)
+
+        quality = np.array([row[3] if row[3] is not None else np.nan for row in rows], dtype=np.float32)
+        total = np.array([row[5] for row in rows], dtype=np.float32)
+        take_again = np.array([row[6] if row[6] is not None else np.nan for row in rows], dtype=np.float32)
+
+        rated = ~np.isnan(quality) & (total > 0)
+        mean_quality = float(quality[rated].mean()) if rated.any() else 0.0
+        mean_take_again = float(np.nanmean(take_again)) if (~np.isnan(take_again)).any() else 0.0
+        # Shrink averages built on a handful of ratings toward the overall mean
+        shrunk = np.where(rated, (np.nan_to_num(quality) * total + mean_quality * PRIOR_RATINGS) / (total + PRIOR_RATINGS),
+                          mean_quality)
+        take_again = np.where(np.isnan(take_again), mean_take_again, take_again)
+        self.base = (QUALITY_WEIGHT * shrunk / 5 + TAKE_AGAIN_WEIGHT * take_again).astype(np.float32)
+
+        bits = np.array([row[7] for row in rows], dtype=np.uint64)
+        self.tag_matrix = ((bits[:, None] >> np.arange(len(tags), dtype=np.uint64)[None, :]) & np.uint64(1)).astype(np.float32)
+
+        # Class size signal in [-1, 1]: log ratings count, centred and scaled
+        log_total = np.log1p(total)
+        spread = float(log_total.std()) or 1.0
+        self.size_signal = np.clip((log_total - float(log_total.mean())) / (2 * spread), -1, 1).astype(np.float32)
+
+        self.departments = {}
+        for i, row in enumerate(rows):
+            self.departments.setdefault(row[2].casefold(), []).append(i)
+        self.departments = {dept: np.array(indexes, dtype=np.int64) for dept, indexes in self.departments.items()}
+        self.all_indexes = np.arange(n, dtype=np.int64)
+        self._weights = {}
+
+    @classmethod
+    def from_db(cls, db_path=DEFAULT_DB_PATH):
+        """
+        Load from ProfessorRatings, or parse the raw professors table in memory when
+        the typed table hasn't been built yet. A missing database gives an empty ranker.
+        """
+        if not os.path.exists(db_path):
+            return cls([], [])
+        conn = connect(db_path)
+        try:
+            tags, rows = load_ratings(conn)
+        finally:
+            conn.close()
+        return cls(tags, rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def preference_weights(self, preferences):
+        """
+        Tag weight vector and class-size direction for a preferences dict, cached
+        because the dashboard asks with the same preferences many times. The cache
+        is keyed by preference_key(), so it holds at most one entry per option combination.
+        """
+        key = preference_key(preferences)
+        cached = self._weights.get(key)
+        if cached is not None:
+            return cached
+
+        weights = np.zeros(len(self.tags), dtype=np.float32)
+        for field, value in (("assessmentType", key[0]), ("attendanceRequired", key[1])):
+            for tag, weight in PREFERENCE_TAG_WEIGHTS.get((field, value), {}).items():
+                tag_id = self.tag_ids.get(_tag_key(tag))
+                if tag_id is not None:
+                    weights[tag_id] += weight
+        scale = np.abs(weights).sum()
+        if scale:
+            weights /= scale
+
+        size = key[2]
+        direction = {"small": -1.0, "large": 1.0}.get(size, 0.0)
+        self._weights[key] = (weights, direction, size == "medium")
+        return self._weights[key]
+
+    def candidates(self, department=None, course=None):
+        """
+        Row indexes of professors in a department, or in the departments teaching a
+        course's subject ("CE 3305" -> Engineering, Civil Engineering). All when neither is given.
+        """
+        if course:
+            subject = course.replace("\u00A0", " ").split(" ")[0].upper()
+            departments = SUBJECT_DEPARTMENTS.get(subject, ())
+        elif department:
+            departments = (normalize_department(department),)
+        else:
+            return self.all_indexes
+        indexes = [self.departments[dept.casefold()] for dept in departments if dept.casefold() in self.departments]
+        return np.concatenate(indexes) if indexes else np.zeros(0, dtype=np.int64)
+
+    def scores(self, indexes, preferences=None):
+        weights, direction, medium = self.preference_weights(preferences)
+        size = self.size_signal[indexes]
+        size_score = -np.abs(size) if medium else direction * size
+        return self.base[indexes] + TAG_WEIGHT * (self.tag_matrix[indexes] @ weights) + CLASS_SIZE_WEIGHT * size_score
+
+    def rank(self, preferences=None, department=None, course=None, k=10):
+        """
+        Top k professors for a department or course.
+
+        :param preferences: Onboarding preferences (assessmentType, attendanceRequired, classSize).
+        :return: [{"id", "name", "department", "quality", "difficulty", "total_ratings",
+                   "would_take_again", "tags", "score"}, ...] best first.
+        """
+        indexes = self.candidates(department=department, course=course)
+        if not len(indexes):
+            return []
+        scores = self.scores(indexes, preferences).tolist()
+        top = heapq.nlargest(k, range(len(scores)), key=scores.__getitem__)
+        return [self._describe(int(indexes[i]), scores[i]) for i in top]
+
+    def _describe(self, index, score):
+        prof_id, name, department, quality, difficulty, total, take_again, bits, url = self.rows[index]
+        return {
+            "id": prof_id,
+            "name": name,
+            "department": department,
+            "quality": quality,
+            "difficulty": difficulty,
+            "total_ratings": total,
+            "would_take_again": None if take_again is None else round(take_again * 100),
+            "tags": [tag for i, tag in enumerate(self.tags) if bits >> i & 1],
+            "url": url,
+            "score": round(float(score), 4),
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the typed ProfessorRatings table from the scraped professors table.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to professors.db.")
+    args = parser.parse_args(argv)
+    count = build_ratings_table(args.db)
+    print(f"Wrote {count} professors to ProfessorRatings in {args.db}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
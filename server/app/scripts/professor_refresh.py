@@ -0,0 +1,401 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+import requests
+
+from ..data import GRADES_DB_PATH, PROFESSORS_DB_PATH, connect, table_exists
+from .professor_ratings import SUBJECT_DEPARTMENTS, build_ratings_table
+
+DEFAULT_DB_PATH = PROFESSORS_DB_PATH
+
+RMP_URL = "https://www.ratemyprofessors.com/professor/{professor_id}"
+
+# Politeness: requests in flight, and the token bucket's sustained rate and burst
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 2.0  # requests per second
+DEFAULT_BURST = 4
+# Professors written per transaction
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 4
+# A professor still failing transiently after MAX_ATTEMPTS stays pending for the
+# next call of the run, up to this many calls, and is then marked failed
+MAX_CALLS = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 1.0  # seconds, doubled per attempt
+TOP_TAGS = 5
+
+# Instructors of this subject in the latest grade data are refreshed first
+PRIORITY_SUBJECT = "CE"
+PRIORITY_YEARS = 2
+
+# The rating page embeds its data as JSON in this script assignment
+RELAY_STORE_RE = re.compile(r'window\.__RELAY_STORE__\s*=\s*(\{.*?\});\s*(?:window\.|</script>)', re.DOTALL)
+
+# --- Checkpoint tables ---
+
+def create_refresh_tables(cur):
+    """
+    ProfessorRefreshRuns has one row per run, finished or not. A run's queue is
+    ProfessorRefreshQueue in priority order; a row stays 'pending' until its
+    result is committed, so an interrupted run resumes with exactly the
+    professors it hadn't finished. Rows whose fetches only failed transiently
+    (throttled, server errors, connection errors) stay pending too, with their
+    attempts counted, so the run isn't complete until they succeed or use up
+    MAX_CALLS calls' worth of attempts. ProfessorRefreshLog remembers when each
+    professor was last refreshed, which orders the next run.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ProfessorRefreshRuns (
+            Run_Id INTEGER PRIMARY KEY,
+            Started_At TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            Finished_At TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ProfessorRefreshQueue (
+            Run_Id INTEGER NOT NULL,
+            Professor_Id TEXT NOT NULL,
+            Priority INTEGER NOT NULL,
+            Status TEXT NOT NULL DEFAULT 'pending',  -- pending, done, gone (404) or failed
+            Attempts INTEGER NOT NULL DEFAULT 0,
+            Error TEXT,
+            PRIMARY KEY (Run_Id, Professor_Id)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_refresh_queue_pending ON ProfessorRefreshQueue(Run_Id, Status, Priority)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ProfessorRefreshLog (
+            Professor_Id TEXT PRIMARY KEY,
+            Refreshed_At TEXT NOT NULL
+        )
+    """)
+
+def priority_professors(db_path=DEFAULT_DB_PATH, grades_db=GRADES_DB_PATH, subject=PRIORITY_SUBJECT):
+    """
+    Ids of the professors who taught `subject` courses in the last PRIORITY_YEARS
+    years of grade data, matched to RMP through name_matching. Empty without grade data.
+    """
+    if not os.path.exists(grades_db):
+        return set()
+    conn = connect(grades_db)
+    try:
+        if not table_exists(conn, "GradeTermAggregates"):
+            return set()
+        names = [name for (name,) in conn.execute("""
+            SELECT DISTINCT Instructor FROM GradeTermAggregates
+            WHERE Subject = ? AND Year > (SELECT MAX(Year) FROM GradeTermAggregates) - ?
+        """, (subject, PRIORITY_YEARS))]
+    finally:
+        conn.close()
+    if not names:
+        return set()
+    from .name_matching import match_names
+
+    matched, _ = match_names(names, db_path)
+    return set(matched.values())
+
+def _start_run(cur, teaching, subject):
+    """
+    Queue every professor: teaching the priority subject first, then the rest of
+    its departments, then everyone else; never-refreshed and oldest data first
+    within each group.
+    """
+    departments = {department.casefold() for department in SUBJECT_DEPARTMENTS.get(subject, ())}
+    rows = cur.execute("""
+        SELECT p.id, p.department, l.Refreshed_At FROM professors AS p
+        LEFT JOIN ProfessorRefreshLog AS l ON l.Professor_Id = p.id
+    """).fetchall()
+
+    def order(row):
+        professor_id, department, refreshed_at = row
+        group = 0 if professor_id in teaching else 1 if (department or "").casefold() in departments else 2
+        return group, refreshed_at or "", professor_id
+
+    cur.execute("INSERT INTO ProfessorRefreshRuns DEFAULT VALUES")
+    run_id = cur.lastrowid
+    cur.executemany("INSERT INTO ProfessorRefreshQueue (Run_Id, Professor_Id, Priority) VALUES (?, ?, ?)",
+                    [(run_id, row[0], priority) for priority, row in enumerate(sorted(rows, key=order))])
+    return run_id
+
+def _current_run(cur):
+    row = cur.execute("SELECT Run_Id FROM ProfessorRefreshRuns WHERE Finished_At IS NULL ORDER BY Run_Id DESC LIMIT 1").fetchone()
+    return row[0] if row else None
+
+# --- Rating pages ---
+
+def parse_rating_page(html):
+    """
+    The professor fields of a RateMyProfessors rating page, in the text formats
+    of the professors table ("3.8", "84%", "N/A", comma-separated top tags).
+
+    :return: {"name", "department", "quality_rating", "difficulty_rating",
+              "total_ratings", "would_take_again", "tags"}, or None if the page has no professor data.
+    """
+    match = RELAY_STORE_RE.search(html)
+    if match is None:
+        return None
+    store = json.loads(match.group(1))
+    teacher = next((node for node in store.values()
+                    if isinstance(node, dict) and node.get("__typename") == "Teacher"), None)
+    if teacher is None:
+        return None
+
+    total = int(teacher.get("numRatings") or 0)
+    take_again = teacher.get("wouldTakeAgainPercent")
+    tag_refs = (teacher.get("teacherRatingTags") or {}).get("__refs", [])
+    tags = [store[ref] for ref in tag_refs if ref in store]
+    tags.sort(key=lambda tag: -int(tag.get("tagCount") or 0))
+    return {
+        "name": f"{teacher.get('firstName', '').strip()} {teacher.get('lastName', '').strip()}".strip(),
+        "department": teacher.get("department") or "",
+        "quality_rating": f"{float(teacher['avgRating']):.1f}" if total and teacher.get("avgRating") is not None else "N/A",
+        "difficulty_rating": (f"{float(teacher['avgDifficulty']):.1f}"
+                              if total and teacher.get("avgDifficulty") is not None else "N/A"),
+        "total_ratings": str(total),
+        "would_take_again": f"{round(float(take_again))}%" if take_again is not None and take_again >= 0 else "N/A",
+        "tags": ", ".join(tag["tagName"] for tag in tags[:TOP_TAGS]),
+    }
+
+# --- Rate limiting ---
+
+class TokenBucket:
+    """
+    Asyncio token bucket: `rate` requests per second on average, up to `burst`
+    at once after a quiet spell. pause() empties the bucket for a while, so a
+    429's Retry-After holds back every worker, not just the one that got it.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        # Tokens start accruing again when the pause ends
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+def _retry_after(response):
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+# --- Refresh ---
+
+class ProfessorRefresher:
+    """
+    One refresh run over professors.db. Pages are fetched on a pooled requests
+    session from asyncio, with a semaphore bounding requests in flight and a
+    TokenBucket bounding their rate. Throttled (429) and server-error responses
+    are retried with exponential backoff and jitter. Results are committed
+    BATCH_SIZE professors per transaction together with their checkpoint rows.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, base_url=RMP_URL, concurrency=DEFAULT_CONCURRENCY,
+                 rate=DEFAULT_RATE, burst=DEFAULT_BURST, batch_size=BATCH_SIZE, http=None):
+        self.db_path = db_path
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.batch_size = batch_size
+        if http is None:
+            from .scraping import build_session
+            # No retries in the adapter: _fetch retries, and pauses every worker on a 429
+            http = build_session(pool_size=concurrency, retries=0)
+        self.http = http
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "done": 0, "gone": 0, "deferred": 0, "failed": 0}
+
+    def prepare(self, new_run=False, grades_db=GRADES_DB_PATH, subject=PRIORITY_SUBJECT):
+        """
+        Resume the unfinished run, or queue a new one.
+
+        :param new_run: Abandon an unfinished run and start over.
+        :return: The run id.
+        """
+        conn = connect(self.db_path, readonly=False)
+        try:
+            with conn:
+                cur = conn.cursor()
+                create_refresh_tables(cur)
+                run_id = _current_run(cur)
+                if run_id is not None and new_run:
+                    cur.execute("UPDATE ProfessorRefreshRuns SET Finished_At = CURRENT_TIMESTAMP WHERE Run_Id = ?", (run_id,))
+                    run_id = None
+            if run_id is None:
+                # Outside the transaction: name matching reads this database on its own connection
+                teaching = priority_professors(self.db_path, grades_db, subject)
+                with conn:
+                    run_id = _start_run(conn.cursor(), teaching, subject)
+            return run_id
+        finally:
+            conn.close()
+
+    def run(self, run_id, limit=None):
+        """
+        Refresh the run's pending professors in priority order.
+
+        :param limit: Stop after this many professors; the rest stay pending for the next call.
+        :return: True when the run is complete; False while professors are pending,
+                 including ones deferred after transient failures.
+        """
+        conn = connect(self.db_path, readonly=False)
+        try:
+            sql = "SELECT Professor_Id FROM ProfessorRefreshQueue WHERE Run_Id = ? AND Status = 'pending' ORDER BY Priority"
+            pending = [professor_id for (professor_id,) in conn.execute(sql + (" LIMIT ?" if limit else ""),
+                                                                        (run_id, limit) if limit else (run_id,))]
+            asyncio.run(self._refresh(conn, run_id, pending))
+            remaining = conn.execute("SELECT COUNT(*) FROM ProfessorRefreshQueue WHERE Run_Id = ? AND Status = 'pending'",
+                                     (run_id,)).fetchone()[0]
+            if remaining:
+                return False
+            with conn:
+                conn.execute("UPDATE ProfessorRefreshRuns SET Finished_At = CURRENT_TIMESTAMP WHERE Run_Id = ?", (run_id,))
+        finally:
+            conn.close()
+        # The typed table the app reads is rebuilt once per completed run
+        build_ratings_table(self.db_path)
+        return True
+
+    async def _refresh(self, conn, run_id, pending):
+        bucket = TokenBucket(self.rate, self.burst)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = []
+
+        async def refresh_one(professor_id):
+            async with semaphore:
+                results.append((professor_id, *await self._fetch(professor_id, bucket)))
+            if len(results) >= self.batch_size:
+                batch = results[:]
+                results.clear()
+                self._write(conn, run_id, batch)
+
+        try:
+            await asyncio.gather(*(refresh_one(professor_id) for professor_id in pending))
+        finally:
+            # Interrupted or not, everything fetched so far is committed
+            self._write(conn, run_id, results)
+
+    async def _fetch(self, professor_id, bucket):
+        """
+        :return: (status, fields or None, attempts, error); status is "deferred"
+                 when every attempt failed transiently.
+        """
+        url = self.base_url.format(professor_id=professor_id)
+        error = None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await bucket.acquire()
+            self.stats["requests"] += 1
+            try:
+                response = await asyncio.to_thread(self.http.get, url, timeout=30)
+            except requests.exceptions.RequestException as e:
+                error, delay = str(e), None
+            else:
+                if response.status_code == 200:
+                    try:
+                        fields = parse_rating_page(response.text)
+                    except (ValueError, KeyError, TypeError) as e:
+                        return "failed", None, attempt, f"Unreadable rating page: {e}"
+                    if fields is None:
+                        return "failed", None, attempt, "No professor data on the page"
+                    return "done", fields, attempt, None
+                if response.status_code == 404:
+                    return "gone", None, attempt, None
+                if response.status_code not in RETRY_STATUSES:
+                    return "failed", None, attempt, f"HTTP {response.status_code}"
+                error, delay = f"HTTP {response.status_code}", _retry_after(response)
+                if response.status_code == 429:
+                    self.stats["throttled"] += 1
+                    bucket.pause(delay if delay is not None else BACKOFF_BASE * 2 ** attempt)
+            if attempt < MAX_ATTEMPTS:
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay if delay is not None else BACKOFF_BASE * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        return "deferred", None, MAX_ATTEMPTS, error
+
+    def _write(self, conn, run_id, batch):
+        if not batch:
+            return
+        with conn:
+            for professor_id, status, fields, attempts, error in batch:
+                # Attempts add up over the calls of a run
+                attempts += conn.execute("SELECT Attempts FROM ProfessorRefreshQueue WHERE Run_Id = ? AND Professor_Id = ?",
+                                         (run_id, professor_id)).fetchone()[0]
+                if status == "deferred":
+                    status = "pending" if attempts < MAX_ATTEMPTS * MAX_CALLS else "failed"
+                self.stats["deferred" if status == "pending" else status] += 1
+                if fields is not None:
+                    # The name the app shows is kept; RMP's spelling goes to rmp_name
+                    conn.execute("""
+                        UPDATE professors SET rmp_name = ?, department = ?, quality_rating = ?, difficulty_rating = ?,
+                                              total_ratings = ?, would_take_again = ?, tags = ?
+                        WHERE id = ?
+                    """, (fields["name"], fields["department"], fields["quality_rating"], fields["difficulty_rating"],
+                          fields["total_ratings"], fields["would_take_again"], fields["tags"], professor_id))
+                if status in ("done", "gone"):
+                    conn.execute("INSERT OR REPLACE INTO ProfessorRefreshLog (Professor_Id, Refreshed_At) "
+                                 "VALUES (?, CURRENT_TIMESTAMP)", (professor_id,))
+                conn.execute("UPDATE ProfessorRefreshQueue SET Status = ?, Attempts = ?, Error = ? "
+                             "WHERE Run_Id = ? AND Professor_Id = ?", (status, attempts, error, run_id, professor_id))
+
+def refresh_professors(db_path=DEFAULT_DB_PATH, limit=None, new_run=False, grades_db=GRADES_DB_PATH, **options):
+    """
+    Resume or start a refresh run and work through it.
+
+    :param limit: Professors to refresh in this call; None for the whole run.
+    :param options: Passed to ProfessorRefresher (base_url, concurrency, rate, burst, batch_size, http).
+    :return: (run id, complete, stats)
+    """
+    refresher = ProfessorRefresher(db_path, **options)
+    run_id = refresher.prepare(new_run=new_run, grades_db=grades_db)
+    complete = refresher.run(run_id, limit=limit)
+    return run_id, complete, refresher.stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh professor ratings in professors.db from RateMyProfessors.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to professors.db.")
+    parser.add_argument("--grades-db", default=GRADES_DB_PATH, help="Grade data used to find who teaches CE courses.")
+    parser.add_argument("--base-url", default=RMP_URL, help="Rating page URL with a {professor_id} placeholder.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Requests per second.")
+    parser.add_argument("--limit", type=int, help="Stop after this many professors; run again to resume.")
+    parser.add_argument("--new-run", action="store_true", help="Abandon an unfinished run and start over.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        run_id, complete, stats = refresh_professors(args.db, limit=args.limit, new_run=args.new_run,
+                                                     grades_db=args.grades_db, base_url=args.base_url,
+                                                     concurrency=args.concurrency, rate=args.rate)
+    except KeyboardInterrupt:
+        print("Interrupted; finished professors are saved and the run resumes next time")
+        return 130
+    print(f"Run {run_id} {'complete' if complete else 'paused'} in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{key} {value}" for key, value in stats.items()))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,87 +1,138 @@
-from bs4 import BeautifulSoup
-import requests
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import argparse
+import hashlib
 import re
-import sqlite3
-import spacy
+import requests
+import threading
+import time
 
-# --- New Code: Load spaCy Model Globally ---
-# This loads the model once when the script starts, which is much more efficient.
-# It will download the model if you don't have it installed.
-try:
-    nlp = spacy.load("en_core_web_lg")
-except OSError:
-    print("Downloading spaCy model 'en_core_web_lg'...")
-    print("This may take a minute and only needs to run once.")
-    spacy.cli.download("en_core_web_lg")
-    nlp = spacy.load("en_core_web_lg")
+from ..data import CLASSES_DB_PATH, connect, department_table
+from ..metrics import stage
+from .course_search import create_search_tables, delete_course, upsert_course
+from .prereq_graph import create_requisite_table, delete_requisites, normalize_course_id, replace_requisites
+
+# Default database: <repo>/data/classes.db
+DEFAULT_DB_PATH = CLASSES_DB_PATH
+
+# --- spaCy model, loaded lazily ---
+# Importing this module must stay cheap (the Flask app and tools import it), so the
+# model is only loaded the first time requisites actually need the parser.
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """
+    Return the shared en_core_web_lg pipeline, loading it on first use.
+    It will download the model if you don't have it installed.
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                try:
+                    _nlp = spacy.load("en_core_web_lg")
+                except OSError:
+                    print("Downloading spaCy model 'en_core_web_lg'...")
+                    print("This may take a minute and only needs to run once.")
+                    spacy.cli.download("en_core_web_lg")
+                    _nlp = spacy.load("en_core_web_lg")
+    return _nlp
 
 # Regex to find course codes (e.g., CEE 1234, MATH 2425)
 # This is often more reliable than just spaCy's POS tagging for this specific format
 COURSE_RE = re.compile(r'([A-Z]{2,4})\s(\d{4})')
 
-# --- New Code: Requisite Extraction Function ---
-# --- New Code: Requisite Extraction Function (Modified) ---
-# --- New Code: Requisite Extraction Function (State Machine) ---
-def extract_requisites(description_text):
-    """
-    Uses spaCy to parse the *entire requisite block* (not just the last line)
-    and uses a state machine to categorize courses.
+# Keywords that open a requisite block; "concurrent" counts as a corequisite keyword
+PREREQ_KEYWORDS = ("prerequisite",)
+COREQ_KEYWORDS = ("corequisite", "concurrent")
+
+# Only the dependency parser's sentence boundaries are used, so the rest of the
+# en_core_web_lg pipeline is skipped when extracting requisites
+UNUSED_PIPES = ("tagger", "attribute_ruler", "lemmatizer", "ner")
+
+# A sentence-ending mark followed by more text; blocks without one are a single
+# sentence. The parser also splits requisite lists at semicolons.
+SENTENCE_BREAK_RE = re.compile(r'[.!?;]\s+\S')
+
+# Requisite results memoized by description hash: {digest: (prereqs, coreqs)}, least
+# recently used first; a full catalog scrape is a few thousand descriptions
+REQUISITE_CACHE_SIZE = 8192
+_requisite_cache = OrderedDict()
+_requisite_cache_lock = threading.Lock()
+
+def _cached_requisites(digest):
+    with _requisite_cache_lock:
+        cached = _requisite_cache.get(digest)
+        if cached is not None:
+            _requisite_cache.move_to_end(digest)
+        return cached
+
+def _cache_requisites(digest, result):
+    with _requisite_cache_lock:
+        _requisite_cache[digest] = result
+        _requisite_cache.move_to_end(digest)
+        while len(_requisite_cache) > REQUISITE_CACHE_SIZE:
+            _requisite_cache.popitem(last=False)
+
+def _requisite_block(description_text):
     """
-    prereqs = set()
-    coreqs = set()
+    Find the start of the *entire requisite block* (not just the last line).
 
-    # --- Step 1: Find the start of the entire requisite block ---
+    Returns (block_text, initial_mode, has_both_kinds), or None when the
+    description has no requisite keyword at all.
+    """
     lower_text = description_text.lower()
-    
-    # Find the first occurrence of any requisite keyword
-    indices = [
-        lower_text.find("prerequisite"),
-        lower_text.find("corequisite"),
-        lower_text.find("concurrent")
-    ]
-    
-    # Filter out -1 (not found)
-    valid_indices = [idx for idx in indices if idx != -1]
-    
+
+    # Find the first occurrence of any requisite keyword, filtering out -1 (not found)
+    prereq_indices = [idx for idx in (lower_text.find(k) for k in PREREQ_KEYWORDS) if idx != -1]
+    coreq_indices = [idx for idx in (lower_text.find(k) for k in COREQ_KEYWORDS) if idx != -1]
+    valid_indices = prereq_indices + coreq_indices
+
     if not valid_indices:
         # No requisite keywords found at all in the description
-        return {"prereqs": prereqs, "coreqs": coreqs}
-    
-    # Get the index of the first keyword
+        return None
+
+    # Extract the entire block of text from the first keyword forward
     start_index = min(valid_indices)
-    
-    # Extract the entire block of text from that point forward
     req_block_text = description_text[start_index:]
-    # --- End Step 1 ---
 
-    # --- Step 2: Process this block with spaCy ---
-    doc = nlp(req_block_text)
-    
-    # --- Step 3: Track the "state" as we read sentences ---
-    # 0 = prerequisite mode (default)
-    # 1 = corequisite mode
-    current_mode = 0 
-    
+    # 0 = prerequisite mode (default), 1 = corequisite mode.
     # Set default mode based on the *first* keyword found
     first_keyword = lower_text[start_index:start_index+20]
+    current_mode = 0
     if "corequisite" in first_keyword or "concurrent" in first_keyword:
         current_mode = 1
-    
-    for sent in doc.sents:
-        sent_text = sent.text.lower()
-        
+
+    return req_block_text, current_mode, bool(prereq_indices and coreq_indices)
+
+def _classify_sentences(sentences, current_mode):
+    """
+    The state machine: track prerequisite/corequisite mode while reading the
+    sentences of a requisite block and file each course code found under it.
+    """
+    prereqs = set()
+    coreqs = set()
+
+    for sent_text in sentences:
+        lower_sent = sent_text.lower()
+
         # Check for keywords to *change* the state
         # (This handles "Prerequisite... Corequisite...")
-        if "corequisite" in sent_text or "concurrent" in sent_text:
+        if "corequisite" in lower_sent or "concurrent" in lower_sent:
             current_mode = 1 # Now we are in coreq mode
-        elif "prerequisite" in sent_text:
+        elif "prerequisite" in lower_sent:
             current_mode = 0 # Now we are in prereq mode
-            
+
         # Find all course codes in this sentence
-        found_codes = COURSE_RE.findall(sent.text)
+        found_codes = COURSE_RE.findall(sent_text)
         if not found_codes:
             continue
-            
+
         formatted_codes = {f"{dept} {num}" for dept, num in found_codes}
 
         # Apply codes based on the current_mode
@@ -90,70 +141,464 @@ def extract_requisites(description_text):
         else:
             prereqs.update(formatted_codes)
 
-    return {"prereqs": prereqs, "coreqs": coreqs}
+    return prereqs, coreqs
+
+def extract_requisites_batch(descriptions, batch_size=64):
+    """
+    Extract {"prereqs": set, "coreqs": set} for every description, in order.
+
+    Sentence boundaries only matter when a block mixes prerequisite and
+    corequisite keywords across several sentences, so every other block is
+    classified directly with COURSE_RE. The remaining blocks go through
+    nlp.pipe in one batch with the unused pipeline components disabled.
+    Results are memoized by description hash.
+    """
+    results = [None] * len(descriptions)
+    pending = {}  # digest -> (block_text, initial_mode, [result indices])
+
+    for i, description_text in enumerate(descriptions):
+        digest = hashlib.sha1(description_text.encode("utf-8")).hexdigest()
+        cached = _cached_requisites(digest)
+        if cached is not None:
+            results[i] = cached
+            continue
+        if digest in pending:
+            pending[digest][2].append(i)
+            continue
+
+        block = _requisite_block(description_text)
+        if block is None:
+            cached = (frozenset(), frozenset())
+        else:
+            req_block_text, current_mode, has_both_kinds = block
+            if has_both_kinds and SENTENCE_BREAK_RE.search(req_block_text):
+                pending[digest] = (req_block_text, current_mode, [i])
+                continue
+            # One kind of keyword, or one sentence: the whole block is read in one mode
+            prereqs, coreqs = _classify_sentences([req_block_text], current_mode)
+            cached = (frozenset(prereqs), frozenset(coreqs))
+
+        _cache_requisites(digest, cached)
+        results[i] = cached
+
+    if pending:
+        digests = list(pending)
+        with stage("scraper.nlp"):
+            docs = get_nlp().pipe((pending[d][0] for d in digests), batch_size=batch_size, disable=UNUSED_PIPES)
+            for digest, doc in zip(digests, docs):
+                _, current_mode, indices = pending[digest]
+                prereqs, coreqs = _classify_sentences((sent.text for sent in doc.sents), current_mode)
+                cached = (frozenset(prereqs), frozenset(coreqs))
+                _cache_requisites(digest, cached)
+                for i in indices:
+                    results[i] = cached
+
+    return [{"prereqs": set(prereqs), "coreqs": set(coreqs)} for prereqs, coreqs in results]
+
+def extract_requisites(description_text):
+    """
+    Categorize the course codes in one description's requisite block.
+    See extract_requisites_batch, which should be preferred for whole pages.
+    """
+    return extract_requisites_batch([description_text])[0]
+
+# --- Catalog page parsing: one streaming pass over the course blocks ---
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:  # lxml is optional; html.parser is the fallback
+    _lxml_etree = None
+
+TITLE_CLASS = "courseblocktitle"
+DESC_CLASS = "courseblockdesc"
+# "3 Hours.", "1-4 Hours." (UTA; variable credit counts its minimum) or a trailing "(3-2) 3"
+CREDIT_HOURS_RE = re.compile(r'(\d+)(?:-\d+)?\s+Hours?\.?\s*$|\(\d+-\d+\)\s*(\d+)\s*$', re.IGNORECASE)
+# Void elements never get an end tag, so they must not open a capture
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+PARSE_CHUNK_SIZE = 64 * 1024
+
+def parse_title(title_text):
+    """
+    "CE 3305.  BASIC FLUID MECHANICS.  3 Hours." -> ("CE 3305", "BASIC FLUID MECHANICS.  3 Hours.", 3).
+    The name keeps what the scraper has always stored; credit hours are None when
+    the title doesn't state them. None for a title without a period or course number.
+    """
+    delimited_list = title_text.split(".", 1)
+    if len(delimited_list) < 2 or not re.search(r'\d', delimited_list[0]):
+        return None
+    course_id = delimited_list[0].strip()
+    # Strip whitespace and remove a "(3-2) 3" credit suffix
+    course_name = re.sub(r'\s+\(.*\)\s*\d*$', '', delimited_list[1]).strip()
+    credits = CREDIT_HOURS_RE.search(delimited_list[1])
+    hours = int(credits.group(1) or credits.group(2)) if credits else None
+    return course_id, course_name, hours
+
+class _BlockPairer:
+    """
+    Turns the title/description texts of a page, in document order, into
+    (code, name, credit hours, description) records. A description belongs to
+    the title before it, so a malformed or skipped title never shifts the
+    descriptions of the courses after it.
+    """
+
+    def __init__(self):
+        self.title = None
+
+    def title_text(self, text):
+        records = self.flush()
+        self.title = parse_title(text) or False  # False: skipped title, swallow its description
+        return records
+
+    def desc_text(self, text):
+        title, self.title = self.title, None
+        return [(*title, text)] if title else []
+
+    def flush(self):
+        title, self.title = self.title, None
+        return [(*title, "")] if title else []
+
+def _block_class(classes):
+    classes = (classes or "").split()
+    if TITLE_CLASS in classes:
+        return TITLE_CLASS
+    if DESC_CLASS in classes:
+        return DESC_CLASS
+    return None
+
+def _iter_blocks_lxml(html_content):
+    parser = _lxml_etree.HTMLPullParser(events=("end",))
+    pairer = _BlockPairer()
+    for offset in range(0, len(html_content), PARSE_CHUNK_SIZE):
+        parser.feed(html_content[offset:offset + PARSE_CHUNK_SIZE])
+        for _, element in parser.read_events():
+            kind = _block_class(element.get("class"))
+            if kind is None:
+                if "courseblock" in (element.get("class") or "").split():
+                    # Finished blocks are dropped so the tree stays small on long pages
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
+                continue
+            text = "".join(element.itertext())
+            yield from (pairer.title_text(text) if kind == TITLE_CLASS else pairer.desc_text(text))
+            element.clear()
+    parser.close()
+    yield from pairer.flush()
+
+class _BlockParser(HTMLParser):
+    """
+    html.parser fallback: collects the text of courseblocktitle/courseblockdesc
+    elements as the page streams through, without building a tree.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pairer = _BlockPairer()
+        self.records = []
+        self._capture = None  # (kind, tag, nesting depth of tag)
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._capture is not None:
+            kind, open_tag, depth = self._capture
+            if tag == open_tag and tag not in VOID_TAGS:
+                self._capture = (kind, open_tag, depth + 1)
+            return
+        if tag in VOID_TAGS:
+            return
+        kind = _block_class(dict(attrs).get("class"))
+        if kind is not None:
+            self._capture = (kind, tag, 0)
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if self._capture is None:
+            return
+        kind, open_tag, depth = self._capture
+        if tag != open_tag:
+            return
+        if depth:
+            self._capture = (kind, open_tag, depth - 1)
+            return
+        self._capture = None
+        text = "".join(self._text)
+        self.records.extend(self.pairer.title_text(text) if kind == TITLE_CLASS else self.pairer.desc_text(text))
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._text.append(data)
+
+def _iter_blocks_html_parser(html_content):
+    parser = _BlockParser()
+    for offset in range(0, len(html_content), PARSE_CHUNK_SIZE):
+        parser.feed(html_content[offset:offset + PARSE_CHUNK_SIZE])
+        yield from parser.records
+        parser.records = []
+    parser.close()
+    yield from parser.records
+    yield from parser.pairer.flush()
+
+PARSER_BACKENDS = {"html.parser": _iter_blocks_html_parser}
+if _lxml_etree is not None:
+    PARSER_BACKENDS["lxml"] = _iter_blocks_lxml
+
+def iter_course_blocks(html_content, backend=None):
+    """
+    Stream the course blocks of a department page as (code, name, credit hours,
+    description) records, in page order. Titles and descriptions are paired
+    within a single pass, and only the block being read is held in memory.
+
+    :param backend: "lxml" (the default when installed) or "html.parser".
+    """
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode("utf-8", errors="replace")
+    backend = backend or ("lxml" if "lxml" in PARSER_BACKENDS else "html.parser")
+    return PARSER_BACKENDS[backend](html_content)
+
+def parse_courses(html_content, backend=None):
+    """
+    Find the (Course_Num, Course_Name) titles and descriptions of a department page,
+    without extracting requisites. Returned as list_of_titles and list_of_desc.
+    """
+    list_of_titles, list_of_desc = [], []
+    for course_id, course_name, _, description in iter_course_blocks(html_content, backend):
+        course_num_str = re.findall(r'\d+', course_id)[0]
+        if int(course_num_str) > 5000:
+            break  # Stop if we hit grad-level courses
+        list_of_titles.append([course_id, course_name])
+        list_of_desc.append(description)
+    return list_of_titles, list_of_desc
 
 def find_data(html_content):
     """
     Find the (Course_Num, Course_Name) and (Prerequisites, Corequisites)
     Returned as list_of_titles and list_of_reqs respectively
     """
-    # print(html_content)
-    soup = BeautifulSoup(html_content, 'html.parser')
-    titles_of_courses = soup.find_all(class_="courseblocktitle")
+    with stage("scraper.parse"):
+        list_of_titles, list_of_desc = parse_courses(html_content)
 
+    # Extract requisites for the whole page in one batch
+    list_of_reqs = extract_requisites_batch(list_of_desc)
+
+    return list_of_titles, list_of_reqs, list_of_desc
+
+def course_block_hash(title, description):
     """
-    Find the Course Numbers and Names of all Classes in the chosen department
+    Content hash of one course block (number, name and description). Requisites
+    are derived from the description, so an unchanged hash means an unchanged row.
     """
-    list_of_titles = []
+    content = f"{title[0]}\x1f{title[1]}\x1f{description}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
 
-    for i in titles_of_courses:
-        # Split only on the first period
-        delimited_list = i.text.split(".", 1)
-        
-        try:
-            # Check for valid course num
-            course_num_str = re.findall(r'\d+', delimited_list[0])[0]
-            if int(course_num_str) > 5000:
-                break  # Stop if we hit grad-level courses
-                
-            # [0] is "CSE 1320", [1] is "    Introduction to Programming    (3-2) 3"
-            course_id = delimited_list[0].strip()
-            
-            # Clean the course name
-            # "    Introduction to Programming    (3-2) 3"
-            # Strip whitespace and remove the credit hours at the end
-            course_name = re.sub(r'\s+\(.*\)\s*\d*$', '', delimited_list[1]).strip()
-            
-            list_of_titles.append([course_id, course_name])
 
-        except (IndexError, ValueError):
-            # Skip invalid formats (e.g., a title block without a period or number)
-            continue
+# --- Catalog fetching: pooled session, politeness limit, per-run page cache ---
+CATALOG_URL = "https://catalog.uta.edu/coursedescriptions/{department}"
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
 
+# Connection errors and these statuses are retried with exponential backoff
+# (backoff, 2 * backoff, ...) before a page counts as failed for the run
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def build_session(pool_size=16, retries=3, backoff=0.5):
     """
-    Find the Pre-Requisites and Co-requisites of a Class
+    Create a requests.Session whose keep-alive connection pool is large enough
+    for every scraper worker to hold its own connection to the catalog host.
+    Transient failures are retried `retries` times; Retry-After is honoured.
     """
-    list_of_reqs = []
-    list_of_desc = []
-    
-    # Get descriptions, but only for the courses we've already processed
-    desc_of_courses = soup.find_all(class_="courseblockdesc")[:len(list_of_titles)]
-    
-    for desc_html in desc_of_courses:
-        desc_text = desc_html.text
-        list_of_desc.append(desc_text)
-        
-        # --- Updated Code: Call the new spaCy function ---
-        reqs = extract_requisites(desc_text)
-        list_of_reqs.append(reqs)
+    http = requests.Session()
+    http.headers.update(HEADERS)
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                  allowed_methods=("GET",), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    return http
 
-    # TODO
-    # IF THE Department from Prerequisite is not the same as the current department then grab the data for that department and add on the prerequisite
-    # (This logic is complex and would require a recursive scraper)
-    
-    return list_of_titles, list_of_reqs, list_of_desc
+# One pooled session shared by every request, created on first use
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """
+    Return the shared pooled session, creating it on first use.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
 
-def find_prereqs(prerequisites, main_course_department, safe_table_name, cur):
+class RateLimiter:
+    """
+    Spaces out request start times by at least `min_interval` seconds across all
+    worker threads, so a concurrent run stays polite to the catalog server.
+    """
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def index_courses(list_of_titles, list_of_reqs, list_of_desc):
+    """
+    Turn the parallel lists returned by find_data into a dict of
+    {course_id: (title, reqs, description)}, keyed by the course id with the
+    catalog's non-breaking space normalized (e.g. "MATH 1426").
+    """
+    courses = {}
+    for title, reqs, desc in zip(list_of_titles, list_of_reqs, list_of_desc):
+        course_id = title[0].replace('\u00A0', ' ').strip()
+        courses[course_id] = (title, reqs, desc)
+    return courses
+
+class CatalogScraper:
+    """
+    Fetches and parses department pages for one scrape run.
+
+    Every department page is downloaded and run through find_data at most once;
+    the parsed courses are memoized per department, so cross-department
+    prerequisites become dictionary lookups instead of new downloads.
+    Departments that are not cached yet are fetched concurrently on a bounded
+    worker pool, with a RateLimiter spacing out the requests.
+    """
+
+    def __init__(self, http=None, base_url=CATALOG_URL, max_workers=8, min_interval=0.25):
+        self.http = http or get_session()
+        self.base_url = base_url
+        self.limiter = RateLimiter(min_interval)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="catalog")
+        self._pages = {}  # department -> Future resolving to parsed courses (or None)
+        self._html = {}   # department -> downloaded page that has not been parsed yet
+        self._lock = threading.Lock()
+        self.validators = {}  # department -> (ETag, Last-Modified) of the fetched page
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _load(self, department):
+        with self._lock:
+            html = self._html.pop(department, None)
+        if html is None:
+            response = fetch_page(department, http=self.http, base_url=self.base_url, limiter=self.limiter)
+            if response is None:
+                return None
+            html = response.text
+            self.validators[department] = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        try:
+            return index_courses(*find_data(html))
+        except Exception as e:
+            print(f"Error parsing {department} page: {e}")
+            return None
+
+    def _submit(self, department):
+        department = department.upper()
+        with self._lock:
+            future = self._pages.get(department)
+            if future is None:
+                future = self._executor.submit(self._load, department)
+                self._pages[department] = future
+        return future
+
+    def add_page(self, department, courses):
+        """
+        Seed the cache with a department page that was already fetched and parsed.
+        """
+        future = Future()
+        future.set_result(courses)
+        with self._lock:
+            self._pages.setdefault(department.upper(), future)
+
+    def add_html(self, department, html):
+        """
+        Seed the cache with a downloaded page; it is only parsed if a lookup needs it.
+        """
+        with self._lock:
+            self._html.setdefault(department.upper(), html)
+
+    def fetch_conditional(self, validators):
+        """
+        Conditionally GET several department pages concurrently.
+
+        :param validators: {department: (etag, last_modified) or None}
+        :return: {department: Response with status 200 or 304, or None if the fetch failed}
+        """
+        futures = {
+            department: self._executor.submit(
+                fetch_page, department, self.http, self.base_url, self.limiter, *(cached or (None, None))
+            )
+            for department, cached in validators.items()
+        }
+        return {department: future.result() for department, future in futures.items()}
+
+    def get_department(self, department):
+        """
+        Return the parsed courses of a department, or None if it could not be fetched.
+        """
+        return self._submit(department).result()
+
+    def get_course(self, course_id):
+        """
+        Return (title, reqs, description) for a course id such as "MATH 1426", or None.
+        """
+        courses = self.get_department(course_id.split(" ")[0])
+        if courses is None:
+            return None
+        return courses.get(course_id)
+
+    def prefetch(self, departments):
+        """
+        Fetch every listed department concurrently and wait for all of them.
+        """
+        wait([self._submit(department) for department in departments])
+
+    def prefetch_requisites(self, requisites, department, skip=None):
+        """
+        Walk the cross-department prerequisite chain breadth-first, fetching each
+        wave of newly reached departments concurrently, so that find_prereqs
+        never has to wait on the network one page at a time.
+
+        :param requisites: Course IDs required by courses of `department`.
+        :param department: The department those requisites were found in.
+        :param skip: Optional predicate; course IDs it accepts (e.g. already stored) are not followed.
+        """
+        frontier = {(course_id, department) for course_id in requisites}
+        seen = set()
+        while frontier:
+            frontier -= seen
+            seen |= frontier
+
+            # Same rule as find_prereqs: only other departments are followed
+            cross_department = {
+                course_id for course_id, dept in frontier
+                if dept not in course_id and not (skip and skip(course_id))
+            }
+            self.prefetch({course_id.split(" ")[0] for course_id in cross_department})
+
+            next_frontier = set()
+            for course_id in cross_department:
+                course = self.get_course(course_id)
+                if course is None:
+                    continue
+                reqs = course[1]
+                course_dept = course_id.split(" ")[0]
+                next_frontier |= {(req, course_dept) for req in reqs["prereqs"] | reqs["coreqs"]}
+            frontier = next_frontier
+
+def find_prereqs(prerequisites, main_course_department, safe_table_name, cur, catalog, visited=None, edges_changed=None):
     """
     Recursively finds and inserts prerequisite courses from other departments.
     
@@ -161,6 +606,9 @@ def find_prereqs(prerequisites, main_course_department, safe_table_name, cur):
     :param main_course_department: The department of the course we're checking, e.g., "CE"
     :param safe_table_name: The name of the SQL table to insert into.
     :param cur: The active database cursor.
+    :param catalog: The CatalogScraper holding this run's parsed department pages.
+    :param visited: Course IDs already handled during this run (prevents cycles).
+    :param edges_changed: Optional set collecting courses whose requisite edges changed.
     """
     
     # Use the same INSERT OR REPLACE strategy as insert_courses
@@ -173,6 +621,9 @@ def find_prereqs(prerequisites, main_course_department, safe_table_name, cur):
     if not prerequisites:
         return  # Base case: no prerequisites
 
+    if visited is None:
+        visited = set()
+
     # Loop through each prerequisite course ID in the set
     for prereq_course_id in prerequisites:
         # prereq_course_id is a string, e.g., "MATH 1426"
@@ -183,64 +634,53 @@ def find_prereqs(prerequisites, main_course_department, safe_table_name, cur):
                 prereq_dept = prereq_course_id.split(" ")[0] # e.g., "MATH"
 
                 # --- VITAL CHECK: PREVENT INFINITE RECURSION ---
-                # Check if we have *already* inserted this course.
-                cur.execute(f"SELECT 1 FROM {safe_table_name} WHERE Course_Num = ?", (prereq_course_id,))
-                if cur.fetchone():
+                # Skip courses already handled in this run or already in the table.
+                if prereq_course_id in visited:
+                    continue
+                visited.add(prereq_course_id)
+
+                if _course_exists(cur, safe_table_name, prereq_course_id):
                     # If it exists, we're done. Skip to the next prerequisite.
                     continue 
                 
-                # --- We don't have it. Scrape the new department. ---
+                # --- Look the course up in the memoized department pages ---
                 print(f"--- Finding prereq: {prereq_course_id} from {prereq_dept} department...")
-                html = get_html_content(prereq_dept)
-                if not html:
+                courses = catalog.get_department(prereq_dept)
+                if courses is None:
                     print(f"Warning: Could not fetch {prereq_dept}. Skipping {prereq_course_id}.")
                     continue # Skip this prerequisite
 
-                # Parse the *entire* department page
-                new_titles, new_preqs, new_descs = find_data(html)
-                
-                # Find the specific course we're looking for
-                found_course = False
-                for k in range(len(new_titles)):
-                    
-                    clean_title_from_scrape = new_titles[k][0].replace('\u00A0', ' ').strip()
-                    
-                    # If we find the matching course (e.g., "MATH 1426")
-                    if prereq_course_id == clean_title_from_scrape:
-                        found_course = True
-                        
-                        # Get its data and prereqs
-                        prereqs_for_this_prereq_set = new_preqs[k]["prereqs"]
-                        coreqs_for_this_prereq_set = new_preqs[k]["coreqs"]
-                        
-                        prereqs_str = ', '.join(prereqs_for_this_prereq_set)
-                        coreqs_str = ', '.join(coreqs_for_this_prereq_set)
-                        
-                        data_tuple_for_prereq = (
-                            new_titles[k][0],      # Course_Num
-                            new_titles[k][1],      # Course_Name
-                            prereqs_str,           # Pre_Requisites 
-                            coreqs_str,            # Co_Requisites 
-                            str(new_descs[k]).strip() # Description
-                        )
-                        
-                        # --- 1. Insert this prerequisite course (e.g., "MATH 1426") ---
-                        try:
-                            cur.execute(sql_insert, data_tuple_for_prereq)
-                        except Exception as e:
-                            print(f"Error inserting prereq {data_tuple_for_prereq[0]}: {e}")
-
-                        # --- 2. NOW, recursively find *its* prerequisites ---
-                        all_prereqs_for_prereq = prereqs_for_this_prereq_set.union(coreqs_for_this_prereq_set)
-                        if all_prereqs_for_prereq:
-                            # The 'department' for this recursive call is "MATH" (prereq_dept)
-                            find_prereqs(all_prereqs_for_prereq, prereq_dept, safe_table_name, cur)
-                        
-                        # We found our course, so break from the inner 'for k' loop
-                        break 
-                
-                if not found_course:
+                if prereq_course_id not in courses:
                     print(f"Warning: Could not find {prereq_course_id} on {prereq_dept} page.")
+                    continue
+
+                title, reqs, desc = courses[prereq_course_id]
+                prereqs_for_this_prereq_set = reqs["prereqs"]
+                coreqs_for_this_prereq_set = reqs["coreqs"]
+
+                data_tuple_for_prereq = (
+                    title[0],                             # Course_Num
+                    title[1],                             # Course_Name
+                    ', '.join(prereqs_for_this_prereq_set), # Pre_Requisites
+                    ', '.join(coreqs_for_this_prereq_set),  # Co_Requisites
+                    str(desc).strip()                     # Description
+                )
+
+                # --- 1. Insert this prerequisite course (e.g., "MATH 1426") ---
+                try:
+                    cur.execute(sql_insert, data_tuple_for_prereq)
+                    upsert_course(cur, title[0], title[1], data_tuple_for_prereq[4])
+                    changed = replace_requisites(cur, title[0], prereqs_for_this_prereq_set, coreqs_for_this_prereq_set)
+                    if changed and edges_changed is not None:
+                        edges_changed.add(prereq_course_id)
+                except Exception as e:
+                    print(f"Error inserting prereq {data_tuple_for_prereq[0]}: {e}")
+
+                # --- 2. NOW, recursively find *its* prerequisites ---
+                all_prereqs_for_prereq = prereqs_for_this_prereq_set.union(coreqs_for_this_prereq_set)
+                if all_prereqs_for_prereq:
+                    # The 'department' for this recursive call is "MATH" (prereq_dept)
+                    find_prereqs(all_prereqs_for_prereq, prereq_dept, safe_table_name, cur, catalog, visited, edges_changed)
                     
             except Exception as e:
                 print(f"Recursive scrape error on {prereq_course_id}: {e}")
@@ -251,96 +691,347 @@ def find_prereqs(prerequisites, main_course_department, safe_table_name, cur):
     return
             
 
-def insert_courses(html_content, department):
-    
-    db_path = "SmartAdvisors/data/classes.db"
-    
-    db = sqlite3.connect(db_path)
-    cur = db.cursor()
-    
+def insert_courses(html_content, department, catalog=None, db_path=DEFAULT_DB_PATH):
+    """
+    Parse one department page and save its courses, plus the cross-department
+    prerequisites they reach, to ClassesFor{department}.
+    """
     list_of_titles, list_of_preqs, description = find_data(html_content)
     
     print(f"Found {len(list_of_titles)} titles.")
     print(f"Found {len(list_of_preqs)} requisite lists.")
     print(f"Found {len(description)} descriptions.")
 
-    # Sanitize department name for table name (basic)
-    safe_table_name = re.sub(r'[^a-zA-Z0-9_]', '', f"ClassesFor{department}")
+    owns_catalog = catalog is None
+    if owns_catalog:
+        catalog = CatalogScraper()
+
+    try:
+        # Seed the run cache with this page so it is never fetched again
+        catalog.add_page(department, index_courses(list_of_titles, list_of_preqs, description))
+        _store_department(department, list_of_titles, list_of_preqs, description, catalog, db_path)
+    finally:
+        if owns_catalog:
+            catalog.close()
+
+def scrape_departments(departments, db_path=DEFAULT_DB_PATH, **scraper_options):
+    """
+    Scrape several departments in one run and save each to ClassesFor{dept}.
+
+    All department pages are fetched concurrently and share one page cache, so
+    prerequisite departments (MATH, PHYS, ...) are downloaded once for the run.
+
+    :param departments: Department codes, e.g. ["CE", "CSE"].
+    :param db_path: SQLite database to write to.
+    :param scraper_options: Passed to CatalogScraper (base_url, max_workers, min_interval, ...).
+    :return: The departments that were fetched and saved.
+    """
+    departments = [department.upper() for department in departments]
+    saved = []
+
+    with CatalogScraper(**scraper_options) as catalog:
+        catalog.prefetch(departments)
+
+        for department in departments:
+            courses = catalog.get_department(department)
+            if not courses:
+                print(f"Warning: No courses found for {department}. Skipping.")
+                continue
+
+            list_of_titles, list_of_preqs, description = (list(column) for column in zip(*courses.values()))
+            print(f"Found {len(list_of_titles)} courses for {department}.")
+            _store_department(department, list_of_titles, list_of_preqs, description, catalog, db_path,
+                              validators=catalog.validators.get(department))
+            saved.append(department)
+
+    return saved
+
+def _course_exists(cur, safe_table_name, course_id):
+    """
+    True if `course_id` ("MATH 1426") is already stored. Rows keep the catalog's
+    non-breaking space, so both spellings are checked.
+    """
+    cur.execute(
+        f"SELECT 1 FROM {safe_table_name} WHERE Course_Num IN (?, ?)",
+        (course_id, course_id.replace(' ', '\u00A0')),
+    )
+    return cur.fetchone() is not None
 
+def _create_tables(cur, safe_table_name):
     # Creates the Classes Table if not already present
+    cur.execute(f"""CREATE TABLE IF NOT EXISTS {safe_table_name}(
+                                    Course_Num VARCHAR(10) NOT NULL PRIMARY KEY, 
+                                    Course_Name VARCHAR(100) NOT NULL, 
+                                    Pre_Requisites VARCHAR(200),
+                                    Co_Requisites VARCHAR(200),
+                                    Description VARCHAR(1000)
+                                    )""")
+    create_requisite_table(cur)
+    create_search_tables(cur)
+    _create_refresh_tables(cur)
+
+def _create_refresh_tables(cur):
+    # Validators of each department page, for conditional requests
+    cur.execute("""CREATE TABLE IF NOT EXISTS CatalogPages(
+                                    Department VARCHAR(10) NOT NULL PRIMARY KEY,
+                                    ETag VARCHAR(200),
+                                    Last_Modified VARCHAR(100),
+                                    Fetched_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                                    )""")
+
+    # Content hash of every course block seen on a department page
+    cur.execute("""CREATE TABLE IF NOT EXISTS CourseBlocks(
+                                    Department VARCHAR(10) NOT NULL,
+                                    Course_Num VARCHAR(10) NOT NULL,
+                                    Block_Hash CHAR(40) NOT NULL,
+                                    PRIMARY KEY(Department, Course_Num)
+                                    )""")
+
+def _store_department(department, list_of_titles, list_of_preqs, description, catalog, db_path,
+                      removed=(), validators=None):
+    """
+    Save courses of one department page to ClassesFor{department} in one transaction.
+
+    :param removed: Course_Num values that disappeared from the page and are deleted.
+    :param validators: (ETag, Last-Modified) of the page, kept for the next conditional request.
+    :return: Course IDs whose requisite edges changed (for PrerequisiteGraph.apply_changes).
+    """
+    db = connect(db_path, readonly=False)
+    cur = db.cursor()
+
+    safe_table_name = department_table(department)
+
     try:
-        cur.execute(f"""CREATE TABLE IF NOT EXISTS {safe_table_name}(
-                                        Course_Num VARCHAR(10) NOT NULL PRIMARY KEY, 
-                                        Course_Name VARCHAR(100) NOT NULL, 
-                                        Pre_Requisites VARCHAR(200),
-                                        Co_Requisites VARCHAR(200),
-                                        Description VARCHAR(1000)
-                                        )""")
+        _create_tables(cur, safe_table_name)
     except Exception as e:
         print(f"Error creating table: {e}")
         db.close()
-        return
+        return set()
+
+    # Fetch every department the prerequisite chain reaches up front, concurrently.
+    # Courses already in the table are skipped by find_prereqs, so they aren't followed.
+    all_reqs = set()
+    for reqs in list_of_preqs:
+        all_reqs |= reqs["prereqs"] | reqs["coreqs"]
+    catalog.prefetch_requisites(all_reqs, department,
+                                skip=lambda course_id: _course_exists(cur, safe_table_name, course_id))
 
     sql_insert = f"""
         INSERT OR REPLACE INTO {safe_table_name} 
         (Course_Num, Course_Name, Pre_Requisites,Co_Requisites, Description)
         VALUES (?, ?, ?, ?, ?)
     """
-    i = 0
-    while i < len(list_of_titles):
-        prereqs_set = list_of_preqs[i]["prereqs"] # Get the set
-        coreqs_set = list_of_preqs[i]["coreqs"]   # Get the set
+    sql_hash = """
+        INSERT OR REPLACE INTO CourseBlocks (Department, Course_Num, Block_Hash)
+        VALUES (?, ?, ?)
+    """
+    with stage("scraper.db_write"):
+        visited = set()
+        edges_changed = set()
+        i = 0
+        while i < len(list_of_titles):
+            prereqs_set = list_of_preqs[i]["prereqs"] # Get the set
+            coreqs_set = list_of_preqs[i]["coreqs"]   # Get the set
         
-        prereqs_str = ', '.join([str(item) for item in prereqs_set])
-        coreqs_str = ', '.join([str(item) for item in coreqs_set])
+            prereqs_str = ', '.join([str(item) for item in prereqs_set])
+            coreqs_str = ', '.join([str(item) for item in coreqs_set])
         
-        # --- This is the Depth-First Search part ---
-        # 1. First, find and insert all prerequisites for this course
-        # We combine prereqs and coreqs to process them all
-        all_reqs_set = prereqs_set.union(coreqs_set)
+            # --- This is the Depth-First Search part ---
+            # 1. First, find and insert all prerequisites for this course
+            # We combine prereqs and coreqs to process them all
+            all_reqs_set = prereqs_set.union(coreqs_set)
         
-        # Call the recursive function. It doesn't return anything.
-        find_prereqs(all_reqs_set, department, safe_table_name, cur)
+            # Call the recursive function. It doesn't return anything.
+            find_prereqs(all_reqs_set, department, safe_table_name, cur, catalog, visited, edges_changed)
         
-        # 2. Now that all prerequisites are in the DB, insert the main course
-        data = (
-            list_of_titles[i][0],         # Course_Num
-            list_of_titles[i][1],         # Course_Name
-            str(prereqs_str),             # Pre_Requisites 
-            str(coreqs_str),              # Co_Requisites 
-            str(description[i]).strip()   # Description
-        )
-        try:
-            cur.execute(sql_insert, data)
-            i += 1
-        except Exception as e:
-            print(f"Error inserting {data[0]}: {e}")
-            i += 1 # Increment to avoid an infinite loop on a failing row
+            # 2. Now that all prerequisites are in the DB, insert the main course
+            data = (
+                list_of_titles[i][0],         # Course_Num
+                list_of_titles[i][1],         # Course_Name
+                str(prereqs_str),             # Pre_Requisites 
+                str(coreqs_str),              # Co_Requisites 
+                str(description[i]).strip()   # Description
+            )
+            try:
+                cur.execute(sql_insert, data)
+                upsert_course(cur, data[0], data[1], data[4])
+                cur.execute(sql_hash, (department, data[0], course_block_hash(list_of_titles[i], description[i])))
+                if replace_requisites(cur, data[0], prereqs_set, coreqs_set):
+                    edges_changed.add(normalize_course_id(data[0]))
+                i += 1
+            except Exception as e:
+                print(f"Error inserting {data[0]}: {e}")
+                i += 1 # Increment to avoid an infinite loop on a failing row
 
-    db.commit()
+        for course_num in removed:
+            cur.execute(f"DELETE FROM {safe_table_name} WHERE Course_Num = ?", (course_num,))
+            cur.execute("DELETE FROM CourseBlocks WHERE Department = ? AND Course_Num = ?", (department, course_num))
+            delete_requisites(cur, course_num)
+            delete_course(cur, course_num)
+            edges_changed.add(normalize_course_id(course_num))
+
+        if validators is not None:
+            cur.execute(
+                "INSERT OR REPLACE INTO CatalogPages (Department, ETag, Last_Modified, Fetched_At) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                (department, validators[0], validators[1]),
+            )
+
+        db.commit()
     db.close()
     print(f"Successfully processed and saved data for {department} to {db_path}")
-def get_html_content(department):
+    return edges_changed
+
+def refresh_departments(departments, db_path=DEFAULT_DB_PATH, **scraper_options):
+    """
+    Incrementally refresh departments that were scraped before.
+
+    Each page is requested conditionally with the ETag/Last-Modified stored from the
+    last run, so an unchanged page costs one bodiless 304. For pages that did change,
+    every course block is hashed and only added or changed courses go through
+    requisite extraction and get written; courses gone from the page are deleted.
+    The first refresh of a department records every course as added.
+
+    :return: {department: summary}, where summary has a "status" of "not_modified",
+             "refreshed" or "failed", and for refreshed pages the "added", "changed"
+             and "removed" course numbers, an "unchanged" count and the courses
+             whose requisite edges changed ("edges_changed").
+    """
+    departments = [department.upper() for department in departments]
+
+    db = connect(db_path, readonly=False)
+    cur = db.cursor()
+    _create_refresh_tables(cur)
+    db.commit()
+    cur.execute("SELECT Department, ETag, Last_Modified FROM CatalogPages")
+    stored_validators = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+    db.close()
+
+    summary = {}
+    with CatalogScraper(**scraper_options) as catalog:
+        responses = catalog.fetch_conditional({department: stored_validators.get(department) for department in departments})
+
+        for department in departments:
+            response = responses[department]
+            if response is None:
+                summary[department] = {"status": "failed"}
+            elif response.status_code == 304:
+                summary[department] = {"status": "not_modified"}
+            else:
+                summary[department] = _refresh_department(department, response, catalog, db_path)
+
+    print_refresh_summary(summary)
+    return summary
+
+def _refresh_department(department, response, catalog, db_path):
+    html = response.text
+    catalog.add_html(department, html)
+    validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    list_of_titles, list_of_desc = parse_courses(html)
+    current = {title[0]: (title, desc) for title, desc in zip(list_of_titles, list_of_desc)}
+
+    db = connect(db_path)
+    cur = db.cursor()
+    cur.execute("SELECT Course_Num, Block_Hash FROM CourseBlocks WHERE Department = ?", (department,))
+    stored_hashes = dict(cur.fetchall())
+    db.close()
+
+    added, changed = [], []
+    for course_num, (title, desc) in current.items():
+        stored_hash = stored_hashes.get(course_num)
+        if stored_hash is None:
+            added.append(course_num)
+        elif stored_hash != course_block_hash(title, desc):
+            changed.append(course_num)
+    removed = [course_num for course_num in stored_hashes if course_num not in current]
+
+    # Only added and changed courses are re-extracted and written
+    titles = [current[course_num][0] for course_num in added + changed]
+    descriptions = [current[course_num][1] for course_num in added + changed]
+    reqs = extract_requisites_batch(descriptions)
+    edges_changed = _store_department(department, titles, reqs, descriptions, catalog, db_path,
+                                      removed=removed, validators=validators)
+
+    return {
+        "status": "refreshed",
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "unchanged": len(current) - len(added) - len(changed),
+        "edges_changed": sorted(edges_changed),
+    }
+
+def print_refresh_summary(summary):
+    print("\n--- Catalog refresh summary ---")
+    for department, result in summary.items():
+        if result["status"] == "refreshed":
+            print(f"{department}: {len(result['added'])} added, {len(result['changed'])} changed, "
+                  f"{len(result['removed'])} removed, {result['unchanged']} unchanged, "
+                  f"{len(result['edges_changed'])} with new requisites")
+        else:
+            print(f"{department}: {result['status'].replace('_', ' ')}")
+
+def fetch_page(department, http=None, base_url=CATALOG_URL, limiter=None, etag=None, last_modified=None):
+    """
+    GET a department page. When validators from an earlier fetch are given the
+    request is conditional, and an unchanged page comes back as a bodiless 304.
+
+    :return: The Response (status 200 or 304), or None if the request failed.
+    """
     department = department.lower()
-    website = f"https://catalog.uta.edu/coursedescriptions/{department}"
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+    website = base_url.format(department=department)
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    if limiter is not None:
+        limiter.wait()
 
     print(f"Requesting data from {website}...")
     try:
-        response = requests.get(website, headers=headers)
-        response.raise_for_status()  # Will raise an error for bad responses (404, 500, etc.)
-        print("Success.")
-        return response.text
+        with stage("scraper.fetch"):
+            response = (http or get_session()).get(website, headers=headers, timeout=30)
+            response.raise_for_status()  # Will raise an error for bad responses (404, 500, etc.)
+        print("Not modified." if response.status_code == 304 else "Success.")
+        return response
     except requests.exceptions.RequestException as e:
         print(f"Error fetching URL: {e}")
         return None
 
+def get_html_content(department, http=None, base_url=CATALOG_URL, limiter=None):
+    response = fetch_page(department, http=http, base_url=base_url, limiter=limiter)
+    if response is None:
+        return None
+    return response.text
+
+def main(argv=None):
+    """
+    Command line entry point, run from the server directory:
+
+        python -m app.scripts.scraping --dept CE --dept CSE --db ../data/classes.db
+    """
+    parser = argparse.ArgumentParser(description="Scrape UTA catalog departments into the classes database.")
+    parser.add_argument("--dept", action="append", required=True, help="Department code to scrape; repeat for several.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"SQLite database path (default: {DEFAULT_DB_PATH}).")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum concurrent page downloads.")
+    parser.add_argument("--delay", type=float, default=0.25, help="Minimum seconds between request starts.")
+    parser.add_argument("--base-url", default=CATALOG_URL, help="Catalog URL template with a {department} field.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-download changed pages and only rewrite changed courses.")
+    args = parser.parse_args(argv)
+
+    if args.incremental:
+        summary = refresh_departments(args.dept, db_path=args.db, base_url=args.base_url,
+                                      max_workers=args.workers, min_interval=args.delay)
+        return 0 if all(result["status"] != "failed" for result in summary.values()) else 1
+
+    saved = scrape_departments(args.dept, db_path=args.db, base_url=args.base_url,
+                               max_workers=args.workers, min_interval=args.delay)
+    return 0 if len(saved) == len(args.dept) else 1
+
 # --- Main execution ---
-department = "CSE" # Example department
-
-"""
-Insert the into the database for any department
-"""
-html = get_html_content(department)
-if html:
-    insert_courses(html, department)
\ No newline at end of file
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,403 @@
+import argparse
+import csv
+import heapq
+import os
+import re
+import time
+
+from ..data import PROFESSORS_DB_PATH, SECTIONS_PATH
+from .name_matching import NameIndex, read_overrides
+from .prereq_graph import normalize_course_id
+from .professor_ratings import SUBJECT_DEPARTMENTS, ProfessorRanker, preference_key
+
+DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+# Longest spellings first, so "Th" is read as Thursday rather than T + h
+DAY_RE = re.compile(r'monday|tuesday|wednesday|thursday|friday|saturday|sunday|thurs|thur|tues|'
+                    r'mon|tue|wed|thu|fri|sat|sun|mo|tu|we|th|fr|sa|su|[mtwrfsu]')
+DAY_INDEX = {
+    "m": 0, "mo": 0, "mon": 0, "monday": 0,
+    "t": 1, "tu": 1, "tue": 1, "tues": 1, "tuesday": 1,
+    "w": 2, "we": 2, "wed": 2, "wednesday": 2,
+    "r": 3, "th": 3, "thu": 3, "thur": 3, "thurs": 3, "thursday": 3,
+    "f": 4, "fr": 4, "fri": 4, "friday": 4,
+    "s": 5, "sa": 5, "sat": 5, "saturday": 5,
+    "u": 6, "su": 6, "sun": 6, "sunday": 6,
+}
+# "14:00", "2:00 PM", "2pm"
+TIME_RE = re.compile(r'^(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?$', re.IGNORECASE)
+# Day strings of sections without a set meeting time
+UNSCHEDULED_DAYS = {"", "tba", "arr", "online", "web"}
+
+# A week is 7 days of SLOT_MINUTES slots; a meeting's mask has the bits of the slots it touches
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Onboarding class size -> section capacities that fit it
+CLASS_SIZE_CAPACITY = {"small": (0, 35), "medium": (36, 80), "large": (81, 10 ** 6)}
+
+# Section score weights: preferred days, professor rating and preferences, class size
+DAY_WEIGHT = 1.0
+PROFESSOR_WEIGHT = 1.0
+SIZE_WEIGHT = 0.25
+
+DEFAULT_SCHEDULES = 5
+DEFAULT_BUDGET_MS = 200
+# Nodes searched between time budget checks
+CHECK_EVERY = 64
+
+# --- Sections file ---
+
+def parse_days(text):
+    """
+    "MWF" -> (0, 2, 4); "TTh" or "TR" -> (1, 3); "Mon/Wed" -> (0, 2); "TBA" -> ()
+    """
+    text = (text or "").strip().casefold()
+    if text in UNSCHEDULED_DAYS:
+        return ()
+    days, position = set(), 0
+    for match in DAY_RE.finditer(text):
+        if text[position:match.start()].strip(" /,&-"):
+            raise ValueError(f"Unreadable meeting days: {text!r}")
+        days.add(DAY_INDEX[match.group()])
+        position = match.end()
+    if not days or text[position:].strip(" /,&-"):
+        raise ValueError(f"Unreadable meeting days: {text!r}")
+    return tuple(sorted(days))
+
+def parse_time(text):
+    """
+    Minutes after midnight: "14:00" -> 840, "2:00 PM" -> 840, "9am" -> 540
+    """
+    match = TIME_RE.match((text or "").strip())
+    if not match:
+        raise ValueError(f"Unreadable time: {text!r}")
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem[0].lower() == "p" else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Unreadable time: {text!r}")
+    return hour * 60 + minute
+
+def format_time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def meeting_mask(days, start, end):
+    """
+    Week bitmask of a meeting. Start and end are widened to whole slots, so two
+    meetings less than SLOT_MINUTES apart can count as overlapping.
+    """
+    first, last = start // SLOT_MINUTES, -(-end // SLOT_MINUTES)
+    span = ((1 << (last - first)) - 1) << first
+    mask = 0
+    for day in days:
+        mask |= span << (day * SLOTS_PER_DAY)
+    return mask
+
+def _int_or_none(value):
+    value = (value or "").strip()
+    return int(value) if value.isdigit() else None
+
+def load_sections(csv_path):
+    """
+    Read a sections CSV with the columns course, section, days, start, end,
+    instructor, capacity and enrolled. A section meeting at different times
+    (a lecture and a lab) has one row per meeting; rows with days "TBA" or
+    "Online" are sections without a meeting time. Rows whose days or times
+    can't be read are skipped.
+
+    :return: {course code: [section, ...]} where each section is {"course",
+             "section", "instructor", "capacity", "enrolled", "meetings": [(days,
+             start, end), ...], "mask"}.
+    """
+    sections = {}
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            row = {(key or "").strip().casefold(): (value or "").strip() for key, value in row.items()}
+            code = normalize_course_id(row.get("course", ""))
+            if not code or not row.get("section"):
+                continue
+            try:
+                days = parse_days(row.get("days"))
+                meeting = (days, parse_time(row["start"]), parse_time(row["end"])) if days else None
+            except (KeyError, ValueError):
+                continue
+            if meeting is not None and meeting[2] <= meeting[1]:
+                continue
+
+            by_number = sections.setdefault(code, {})
+            section = by_number.get(row["section"])
+            if section is None:
+                section = by_number[row["section"]] = {
+                    "course": code, "section": row["section"], "instructor": row.get("instructor") or None,
+                    "capacity": _int_or_none(row.get("capacity")), "enrolled": _int_or_none(row.get("enrolled")),
+                    "meetings": [], "mask": 0,
+                }
+            if meeting is not None:
+                section["meetings"].append(meeting)
+                section["mask"] |= meeting_mask(*meeting)
+    return {code: list(by_number.values()) for code, by_number in sections.items()}
+
+# --- Search ---
+
+class TimetableBuilder:
+    """
+    Finds the best conflict-free weekly schedules for a set of courses.
+
+    Every section's meetings are one bitmask over the week's 5-minute slots, so
+    a conflict test is one AND of two integers. A schedule's score is the sum
+    of its sections' scores: how many of a section's meeting days are preferred
+    days, how its instructor ranks under the student's preferences (through
+    ProfessorRanker, with the instructor matched to RateMyProfessors by name)
+    and how its capacity fits the preferred class size.
+
+    The search is a depth-first branch and bound. Courses are taken fewest
+    sections first and sections best first. At every node, each remaining
+    course's best section that still fits the schedule so far is looked up:
+    a course with none ends the branch, and the sum of those sections' scores
+    is the bound that cuts branches unable to beat the n-th best schedule
+    found. The search stops at its time budget and returns what it has.
+
+    Instructors are matched to professors once, when the builder is made, so
+    name matching never counts against a request's time budget.
+    """
+
+    def __init__(self, sections, ranker):
+        """
+        :param sections: {course code: [section, ...]} from load_sections().
+        :param ranker: ProfessorRanker the instructors are scored with.
+        """
+        self.sections = sections
+        self.ranker = ranker
+        self.professors = self._match_instructors()
+        self._scores = {}
+
+    @classmethod
+    def from_files(cls, sections_path=SECTIONS_PATH, professors_db=PROFESSORS_DB_PATH):
+        sections = load_sections(sections_path) if os.path.exists(sections_path) else {}
+        return cls(sections, ProfessorRanker.from_db(professors_db))
+
+    def _match_instructors(self):
+        """
+        {(instructor, subject): ranker row} of every section instructor that
+        matches a professor, with the subject's departments breaking near-ties.
+        """
+        if not len(self.ranker):
+            return {}
+        names = NameIndex(((row[0], row[1], row[2]) for row in self.ranker.rows), read_overrides())
+        rows = {row[0]: i for i, row in enumerate(self.ranker.rows)}
+        matched = {}
+        for sections in self.sections.values():
+            for section in sections:
+                key = (section["instructor"], section["course"].split(" ")[0])
+                if not section["instructor"] or key in matched:
+                    continue
+                departments = SUBJECT_DEPARTMENTS.get(key[1], ())
+                professor_id, _ = names.match(section["instructor"], departments[0] if departments else None)
+                matched[key] = rows.get(professor_id)
+        return {key: index for key, index in matched.items() if index is not None}
+
+    def professor_index(self, section):
+        """
+        Ranker row of a section's instructor, or None when the name matched no professor.
+        """
+        return self.professors.get((section["instructor"], section["course"].split(" ")[0]))
+
+    def _professor_scores(self, sections, preferences):
+        """
+        Ranker scores of the sections' instructors under the preferences; an
+        instructor without a match gets the mean over every professor. Scores of
+        every professor are computed once per preference_key(), so there are at
+        most as many entries as option combinations.
+        """
+        if not len(self.ranker):
+            return [0.0] * len(sections)
+        key = preference_key(preferences)
+        cached = self._scores.get(key)
+        if cached is None:
+            scores = self.ranker.scores(self.ranker.all_indexes, preferences)
+            cached = self._scores[key] = (scores.tolist(), float(scores.mean()))
+        scores, fallback = cached
+        indexes = [self.professor_index(section) for section in sections]
+        return [fallback if index is None else scores[index] for index in indexes]
+
+    def candidates(self, course, preferences, preferred_days=(), strict_days=False, include_full=False):
+        """
+        A course's sections that can be taken, with their scores, best first.
+
+        :return: ([(score, mask, section)], reason) where reason explains an
+                 empty list: "no sections", "full" or "no sections on preferred days".
+        """
+        sections = self.sections.get(course, [])
+        if not sections:
+            return [], "no sections"
+        if not include_full:
+            sections = [s for s in sections if s["capacity"] is None or s["enrolled"] is None
+                        or s["enrolled"] < s["capacity"]]
+            if not sections:
+                return [], "full"
+        preferred = set(preferred_days)
+        if preferred and strict_days:
+            sections = [s for s in sections if all(set(days) <= preferred for days, _, _ in s["meetings"])]
+            if not sections:
+                return [], "no sections on preferred days"
+
+        capacity_range = CLASS_SIZE_CAPACITY.get(preference_key(preferences)[2])
+        professor_scores = self._professor_scores(sections, preferences)
+        scored = []
+        for section, professor_score in zip(sections, professor_scores):
+            score = PROFESSOR_WEIGHT * professor_score
+            meeting_days = {day for days, _, _ in section["meetings"] for day in days}
+            if preferred:
+                score += DAY_WEIGHT * (len(meeting_days & preferred) / len(meeting_days) if meeting_days else 1.0)
+            if capacity_range is not None:
+                capacity = section["capacity"]
+                fit = 0.5 if capacity is None else float(capacity_range[0] <= capacity <= capacity_range[1])
+                score += SIZE_WEIGHT * fit
+            scored.append((score, section["mask"], section))
+        scored.sort(key=lambda candidate: -candidate[0])
+        return scored, None
+
+    def build(self, courses, preferences=None, n=DEFAULT_SCHEDULES, strict_days=False, include_full=False,
+              budget_ms=DEFAULT_BUDGET_MS):
+        """
+        The n best conflict-free schedules taking one section of every course.
+
+        :param courses: Course codes, e.g. picked from /api/eligible-courses.
+        :param preferences: Onboarding preferences; preferredDays, classSize,
+                            assessmentType and attendanceRequired are used.
+        :param strict_days: Only use sections meeting on preferred days.
+        :param include_full: Also use sections at capacity.
+        :param budget_ms: Milliseconds the search may take; past it the best
+                          schedules found so far are returned with "complete" false.
+        :return: {"schedules": [{"score", "days", "sections": [...]}], "unscheduled":
+                  [{"course", "reason"}], "complete", "explored", "elapsed_ms"}
+        """
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000
+        preferences = preferences or {}
+        preferred_days = set()
+        for day in preferences.get("preferredDays") or []:
+            try:
+                preferred_days.update(parse_days(day) if isinstance(day, str) else ())
+            except ValueError:
+                continue
+
+        codes = list(dict.fromkeys(normalize_course_id(course) for course in courses))
+        options, unscheduled = [], []
+        for code in codes:
+            scored, reason = self.candidates(code, preferences, preferred_days, strict_days, include_full)
+            if scored:
+                options.append(scored)
+            else:
+                unscheduled.append({"course": code, "reason": reason})
+        options.sort(key=len)
+
+        best = []  # min-heap of (score, tiebreak, picks)
+        state = {"explored": 0, "complete": True, "found": 0}
+        depth_count = len(options)
+
+        def search(depth, occupied, score, picks):
+            state["explored"] += 1
+            if state["explored"] % CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                state["complete"] = False
+                raise TimeoutError
+            if depth == depth_count:
+                state["found"] += 1
+                entry = (score, -state["found"], tuple(picks))
+                if len(best) < n:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+                return
+
+            # Best still-fitting section of every remaining course: forward check and bound in one pass
+            bound = score
+            for remaining in options[depth + 1:]:
+                for candidate_score, mask, _ in remaining:
+                    if not mask & occupied:
+                        bound += candidate_score
+                        break
+                else:
+                    return
+
+            for candidate_score, mask, section in options[depth]:
+                if mask & occupied:
+                    continue
+                if len(best) == n and bound + candidate_score <= best[0][0]:
+                    return  # sections are best first, so no later one can do better
+                picks.append(section)
+                search(depth + 1, occupied | mask, score + candidate_score, picks)
+                picks.pop()
+
+        if options and n > 0:
+            try:
+                search(0, 0, 0.0, [])
+            except TimeoutError:
+                pass
+
+        order = {code: i for i, code in enumerate(codes)}
+        schedules = []
+        for score, _, picks in sorted(best, reverse=True):
+            picks = sorted(picks, key=lambda section: order[section["course"]])
+            days = sorted({day for section in picks for days, _, _ in section["meetings"] for day in days})
+            schedules.append({
+                "score": round(score, 4),
+                "days": [DAY_NAMES[day] for day in days],
+                "sections": [self._describe(section) for section in picks],
+            })
+        return {
+            "schedules": schedules,
+            "unscheduled": unscheduled,
+            "complete": state["complete"],
+            "explored": state["explored"],
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def _describe(self, section):
+        index = self.professor_index(section)
+        professor = None
+        if index is not None:
+            prof_id, name, _, quality, _, total, _, _, url = self.ranker.rows[index]
+            professor = {"id": prof_id, "name": name, "quality": quality, "total_ratings": total, "url": url}
+        return {
+            "course": section["course"],
+            "section": section["section"],
+            "instructor": section["instructor"],
+            "professor": professor,
+            "capacity": section["capacity"],
+            "enrolled": section["enrolled"],
+            "meetings": [{"days": [DAY_NAMES[day] for day in days], "start": format_time(start), "end": format_time(end)}
+                         for days, start, end in section["meetings"]],
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build conflict-free weekly schedules for a set of courses.")
+    parser.add_argument("courses", nargs="+", help='Course codes, e.g. "CE 3305" "CE 3334".')
+    parser.add_argument("--sections", default=SECTIONS_PATH, help="Path to the sections CSV.")
+    parser.add_argument("--db", default=PROFESSORS_DB_PATH, help="Path to professors.db.")
+    parser.add_argument("--days", nargs="*", default=[], help="Preferred days, e.g. Mon Wed.")
+    parser.add_argument("--strict-days", action="store_true", help="Only use sections on the preferred days.")
+    parser.add_argument("-n", type=int, default=DEFAULT_SCHEDULES)
+    parser.add_argument("--budget-ms", type=int, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.sections):
+        print(f"No sections file at {args.sections}")
+        return 1
+    builder = TimetableBuilder.from_files(args.sections, args.db)
+    result = builder.build(args.courses, {"preferredDays": args.days}, n=args.n, strict_days=args.strict_days,
+                           budget_ms=args.budget_ms)
+    for schedule in result["schedules"]:
+        print(f"{schedule['score']:.3f}  {'/'.join(schedule['days'])}")
+        for section in schedule["sections"]:
+            times = ", ".join(f"{''.join(day[:2] for day in meeting['days'])} {meeting['start']}-{meeting['end']}"
+                              for meeting in section["meetings"]) or "no meeting time"
+            print(f"       {section['course']}-{section['section']}  {times}  {section['instructor'] or ''}")
+    for course in result["unscheduled"]:
+        print(f"Not scheduled: {course['course']} ({course['reason']})")
+    print(f"{len(result['schedules'])} schedule(s), {result['explored']} nodes in {result['elapsed_ms']} ms"
+          f"{'' if result['complete'] else ' (time budget reached)'}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
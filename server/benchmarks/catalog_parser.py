@@ -0,0 +1,97 @@
+"""
+Throughput, peak memory and output equality of the catalog page parsers.
+
+Parses department pages with the legacy BeautifulSoup parser (a full
+html.parser tree and two find_all scans) and with each streaming backend of
+scraping.iter_course_blocks, checks that parse_courses returns exactly what the
+legacy parser did, and reports MB/s and tracemalloc peak per backend. Pages are
+saved catalog pages given on the command line, or else synthetic pages in the
+catalog's markup built from the courses in data/classes.db, repeated up to
+--courses blocks. Run from the server directory:
+
+    python benchmarks/catalog_parser.py [--courses 2000] [page.html ...]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.scripts.scraping import PARSER_BACKENDS, parse_courses  # noqa: E402
+from fixtures import catalog_page  # noqa: E402
+
+def legacy_parse_courses(html_content):
+    """
+    The parser this benchmark replaced, kept verbatim for comparison.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    titles_of_courses = soup.find_all(class_="courseblocktitle")
+    list_of_titles = []
+    for i in titles_of_courses:
+        delimited_list = i.text.split(".", 1)
+        try:
+            course_num_str = re.findall(r'\d+', delimited_list[0])[0]
+            if int(course_num_str) > 5000:
+                break
+            course_id = delimited_list[0].strip()
+            course_name = re.sub(r'\s+\(.*\)\s*\d*$', '', delimited_list[1]).strip()
+            list_of_titles.append([course_id, course_name])
+        except (IndexError, ValueError):
+            continue
+    desc_of_courses = soup.find_all(class_="courseblockdesc")[:len(list_of_titles)]
+    list_of_desc = [desc_html.text for desc_html in desc_of_courses]
+    return list_of_titles, list_of_desc
+
+def measure(parse, page, repeat):
+    """
+    (median seconds, tracemalloc peak bytes, result) of parse(page).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse(page)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    parse(page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="Saved catalog pages to parse.")
+    parser.add_argument("--courses", type=int, default=2000, help="Course blocks per synthetic page.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, encoding="utf-8") as f:
+                pages.append((os.path.basename(path), f.read()))
+    else:
+        pages = [(f"synthetic x{args.courses}", catalog_page(args.courses))]
+
+    differences = 0
+    for name, page in pages:
+        size_mb = len(page.encode("utf-8")) / 1e6
+        legacy_time, legacy_peak, expected = measure(legacy_parse_courses, page, args.repeat)
+        print(f"{name}: {size_mb:.2f} MB, {len(expected[0])} courses")
+        print(f"  {'legacy bs4':<12} {size_mb / legacy_time:7.1f} MB/s  peak {legacy_peak / 1e6:7.1f} MB")
+        for backend in PARSER_BACKENDS:
+            elapsed, peak, result = measure(lambda p: parse_courses(p, backend=backend), page, args.repeat)
+            same = result == expected
+            differences += not same
+            print(f"  {backend:<12} {size_mb / elapsed:7.1f} MB/s  peak {peak / 1e6:7.1f} MB  "
+                  f"{legacy_time / elapsed:4.1f}x  {'identical' if same else 'DIFFERENT'}")
+    return 1 if differences else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
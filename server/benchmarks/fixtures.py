@@ -0,0 +1,418 @@
+"""
+Synthetic fixtures for the benchmarks, all generated offline.
+
+- transcript_pdf(): UTA-style unofficial transcripts of a given page count
+  (see transcripts.py)
+- catalog_page() / department_pages(): catalog HTML in the catalog's course
+  block markup, built from the courses in data/classes.db
+- professor_db(): a raw professors table of N rows, as the RMP scraper writes it
+- sections_csv(): a sections file of N courses with M sections each, in the
+  layout timetable.load_sections reads
+- rating_page() / RatingServer: RateMyProfessors-style rating pages, served
+  from a local HTTP server that can throttle and fail on purpose
+- CatalogServer: department pages served with ETags from a local HTTP server
+  that answers conditional GETs and can fail on purpose
+- install_spacy_stub(): a sentence splitter standing in for en_core_web_lg
+  when the model isn't installed, so nothing is downloaded
+"""
+import csv
+import hashlib
+import html
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import Config  # noqa: E402
+from transcripts import make_transcript_pages  # noqa: E402
+
+# --- Transcripts ---
+
+def transcript_pdf(pages, seed=0):
+    """
+    (pdf bytes, expected course codes) of a transcript at least `pages` pages long.
+    """
+    return make_transcript_pages(pages, seed=seed)
+
+# --- Catalog pages ---
+
+def catalog_rows(db_path=Config.CLASSES_DB_PATH):
+    """
+    (Course_Num, Course_Name, Description) of every undergraduate course in a
+    classes database. Graduate numbers stop the page parser early, so they are left out.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        tables = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'ClassesFor%'")]
+        rows = {}
+        for table in tables:
+            for code, name, description in conn.execute(f"SELECT Course_Num, Course_Name, Description FROM {table}"):
+                rows.setdefault(code.replace("\u00A0", " "), (code, name, description))
+    finally:
+        conn.close()
+    return [row for code, row in sorted(rows.items()) if int(re.findall(r'\d+', code)[0]) <= 5000]
+
+def _linked(description):
+    # Course codes in descriptions are links in the catalog
+    return re.sub(r'([A-Z]{2,4}) (\d{4})',
+                  lambda m: f'<a href="/search/?P={m.group(1)}%20{m.group(2)}" class="bubblelink code">'
+                            f'{m.group(1)}&#160;{m.group(2)}</a>',
+                  html.escape(description.replace("\u00A0", " "), quote=False))
+
+def catalog_page(count=None, rows=None):
+    """
+    A department page in the catalog's markup with `count` course blocks (default:
+    one per row), cycling through (Course_Num, Course_Name, Description) rows.
+    """
+    rows = rows if rows is not None else catalog_rows()
+    count = len(rows) if count is None else count
+    blocks = []
+    for i in range(count):
+        code, name, description = rows[i % len(rows)]
+        code = html.escape(code.replace("\u00A0", " ")).replace(" ", "&#160;")
+        blocks.append(
+            '<div class="courseblock">\n'
+            f'<p class="courseblocktitle noindent"><strong>{code}.'
+            f'  {html.escape(name)}</strong></p>\n'
+            f'<p class="courseblockdesc noindent">\n{_linked(description or "")}</p>\n'
+            '</div>\n'
+        )
+    return ('<!doctype html><html lang="en"><head><meta charset="utf-8"><title>Courses</title></head>'
+            '<body><div id="content"><div class="sc_sccoursedescs">\n'
+            + "".join(blocks) + '</div></div><footer>UTA Catalog</footer></body></html>')
+
+def department_pages(rows=None):
+    """
+    {department: page} with each department's own courses, so a scrape of one
+    department finds its cross-department prerequisites without the network.
+    """
+    rows = rows if rows is not None else catalog_rows()
+    by_department = {}
+    for row in rows:
+        by_department.setdefault(row[0].replace("\u00A0", " ").split(" ")[0], []).append(row)
+    return {department: catalog_page(rows=dept_rows) for department, dept_rows in by_department.items()}
+
+class CatalogServer:
+    """
+    Local stand-in for the catalog serving /coursedescriptions/<department>/ pages.
+
+    :param pages: {department: html} (see department_pages()); may be edited while serving.
+    :param flaky: {department: n} answered with 503 for their first n requests.
+    Each page has an ETag of its content and If-None-Match is answered with 304.
+    Connections are kept alive (HTTP/1.1). Requests are logged as
+    (time, department, status, client port).
+    """
+
+    def __init__(self, pages, flaky=None):
+        self.pages = pages
+        self.flaky = dict(flaky or {})
+        self.log = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/coursedescriptions/{{department}}/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def requests_for(self, department):
+        return [entry for entry in self.log if entry[1] == department]
+
+    @staticmethod
+    def etag(page):
+        return '"%s"' % hashlib.sha1(page.encode("utf-8")).hexdigest()
+
+    def _respond(self, department, if_none_match):
+        with self._lock:
+            if self.flaky.get(department, 0) > 0:
+                self.flaky[department] -= 1
+                return 503, "", None
+        page = self.pages.get(department)
+        if page is None:
+            return 404, "Not found", None
+        etag = self.etag(page)
+        if if_none_match == etag:
+            return 304, "", etag
+        return 200, page, etag
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                department = self.path.strip("/").rsplit("/", 1)[-1].upper()
+                status, body, etag = server._respond(department, self.headers.get("If-None-Match"))
+                with server._lock:
+                    server.log.append((time.monotonic(), department, status, self.client_address[1]))
+                data = body.encode("utf-8") if status != 304 else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+# --- Professors ---
+
+DEPARTMENTS = ["Engineering", "Civil Engineering", "Mathematics", "Physics", "Chemistry", "English",
+               "History", "Political Science", "Computer Science", "Economics"]
+TAGS = ["Tough grader", "Get ready to read", "Participation matters", "Extra credit", "Group projects",
+        "Amazing lectures", "Clear grading criteria", "Gives good feedback", "Inspirational", "Lots of homework",
+        "Hilarious", "Beware of pop quizzes", "So many papers", "Caring", "Respected", "Lecture heavy",
+        "Test heavy", "Graded by few things", "Accessible outside class", "Online Savvy"]
+FIRST = ["Maria", "James", "Wei", "Priya", "Carlos", "Aisha", "John", "Elena", "Tomas", "Grace", "Omar", "Hannah"]
+LAST = ["Nguyen", "Smith", "Garcia", "Patel", "Chen", "Johnson", "Rodriguez", "Kim", "Okafor", "Muller", "Silva", "Brown"]
+
+def professor_db(path, count, seed=0):
+    """
+    Write a raw professors table of `count` rows (TEXT columns, as scraped) to `path`.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS professors")
+            conn.execute("""
+                CREATE TABLE professors (
+                    id TEXT PRIMARY KEY, name TEXT, rmp_name TEXT, url TEXT, department TEXT,
+                    quality_rating TEXT, difficulty_rating TEXT, total_ratings TEXT,
+                    would_take_again TEXT, tags TEXT
+                )
+            """)
+            rows = []
+            for i in range(count):
+                name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+                total = rng.choice([0, 1, 3, 8, 20, 45, 120])
+                rows.append((
+                    str(100000 + i), name, name, f"https://www.ratemyprofessors.com/professor/{100000 + i}",
+                    rng.choice(DEPARTMENTS),
+                    f"{rng.uniform(1, 5):.1f}" if total else "N/A",
+                    f"{rng.uniform(1, 5):.1f}" if total else "N/A",
+                    str(total),
+                    f"{rng.randint(0, 100)}%" if total else "N/A",
+                    ", ".join(rng.sample(TAGS, rng.randint(0, 5))),
+                ))
+            conn.executemany("INSERT INTO professors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    finally:
+        conn.close()
+    return path
+
+# --- Sections ---
+
+# Meeting patterns of a term: (days, start, length in minutes)
+SECTION_PATTERNS = ([("MWF", f"{hour}:00", 50) for hour in range(8, 16)]
+                    + [("TR", start, 80) for start in ("8:00", "9:30", "11:00", "12:30", "14:00", "15:30", "17:30")]
+                    + [("MW", start, 80) for start in ("13:00", "14:30", "16:00", "17:30", "19:00")])
+
+def sections_csv(path, courses=6, per_course=40, seed=0):
+    """
+    Write a sections CSV for the first `courses` CE courses, each with
+    `per_course` sections spread over the term's meeting patterns. A quarter of
+    the sections also meet for a lab, and instructors are named like the
+    professor_db() professors.
+
+    :return: (path, course codes)
+    """
+    rng = random.Random(seed)
+    codes = [row[0].replace("\u00A0", " ") for row in catalog_rows() if row[0].startswith("CE")][:courses]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["course", "section", "days", "start", "end", "instructor", "capacity", "enrolled"])
+        for code in codes:
+            for number in range(1, per_course + 1):
+                instructor = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+                capacity = rng.choice([25, 30, 45, 60, 120])
+                meetings = [rng.choice(SECTION_PATTERNS)]
+                if rng.random() < 0.25:
+                    meetings.append((rng.choice("MTWRF"), f"{rng.randint(8, 17)}:00", 170))
+                for days, start, length in meetings:
+                    hour, minute = map(int, start.split(":"))
+                    end = hour * 60 + minute + length
+                    writer.writerow([code, f"{number:03d}", days, start, f"{end // 60}:{end % 60:02d}",
+                                     instructor, capacity, rng.randint(capacity // 2, capacity)])
+    return path, codes
+
+# --- Rating pages ---
+
+def rating_record(professor_id, seed=0):
+    """
+    Random current ratings for one professor, as the stand-in server publishes them.
+    """
+    rng = random.Random(f"{seed}:{professor_id}")
+    total = rng.choice([0, 2, 7, 19, 60, 140])
+    return {
+        "legacyId": int(professor_id), "firstName": rng.choice(FIRST), "lastName": rng.choice(LAST),
+        "department": rng.choice(DEPARTMENTS), "numRatings": total,
+        "avgRating": round(rng.uniform(1, 5), 1) if total else 0, "avgDifficulty": round(rng.uniform(1, 5), 1) if total else 0,
+        "wouldTakeAgainPercent": rng.uniform(0, 100) if total else -1,
+        "tags": {tag: rng.randint(1, 30) for tag in rng.sample(TAGS, rng.randint(0, 7))},
+    }
+
+def rating_page(record):
+    """
+    A rating page carrying `record` in a window.__RELAY_STORE__ script, shaped like
+    the RateMyProfessors Relay store: a Teacher node referencing tag nodes.
+    """
+    teacher_key = f"VGVhY2hlci0{record['legacyId']}"
+    store = {"client:root": {"__id": "client:root", "__typename": "__Root"}}
+    refs = []
+    for i, (tag, count) in enumerate(record["tags"].items()):
+        key = f"{teacher_key}:tag{i}"
+        store[key] = {"__id": key, "__typename": "TeacherRatingTags", "tagName": tag, "tagCount": count}
+        refs.append(key)
+    store[teacher_key] = {
+        "__id": teacher_key, "__typename": "Teacher", "legacyId": record["legacyId"],
+        "firstName": record["firstName"], "lastName": record["lastName"], "department": record["department"],
+        "numRatings": record["numRatings"], "avgRating": record["avgRating"], "avgDifficulty": record["avgDifficulty"],
+        "wouldTakeAgainPercent": record["wouldTakeAgainPercent"], "teacherRatingTags": {"__refs": refs},
+    }
+    return ('<!DOCTYPE html><html><head><title>Rate My Professors</title></head><body><div id="root"></div>'
+            f'<script>window.__RELAY_STORE__ = {json.dumps(store)};window.process = {{}};</script></body></html>')
+
+class RatingServer:
+    """
+    Local stand-in for RateMyProfessors serving /professor/<id> rating pages.
+
+    :param records: {professor_id: record} to publish (see rating_record()).
+    :param flaky: {professor_id: n} answered with 503 for their first n requests.
+    :param throttle_every: Every nth request is answered 429 with Retry-After.
+    :param latency: Seconds each response takes, so concurrency is observable.
+    Requests are logged as (time, path, status); in_flight_peak is the most
+    requests the server handled at once.
+    """
+
+    def __init__(self, records, flaky=None, throttle_every=0, retry_after=1, latency=0.0):
+        self.records = records
+        self.flaky = dict(flaky or {})
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.latency = latency
+        self.requests = 0
+        self.log = []
+        self.in_flight = self.in_flight_peak = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/professor/{{professor_id}}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _respond(self, path):
+        professor_id = path.rstrip("/").rsplit("/", 1)[-1]
+        with self._lock:
+            self.requests += 1
+            if self.throttle_every and self.requests % self.throttle_every == 0:
+                return 429, ""
+            if self.flaky.get(professor_id, 0) > 0:
+                self.flaky[professor_id] -= 1
+                return 503, ""
+        record = self.records.get(professor_id)
+        if record is None:
+            return 404, "Not found"
+        return 200, rating_page(record)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.in_flight += 1
+                    server.in_flight_peak = max(server.in_flight_peak, server.in_flight)
+                try:
+                    time.sleep(server.latency)
+                    status, body = server._respond(self.path)
+                    with server._lock:
+                        server.log.append((time.monotonic(), self.path, status))
+                    data = body.encode("utf-8")
+                    self.send_response(status)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(data)))
+                    if status == 429:
+                        self.send_header("Retry-After", str(server.retry_after))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+# --- spaCy ---
+
+class _Span:
+    def __init__(self, text):
+        self.text = text
+
+class _Doc:
+    def __init__(self, text):
+        self.sents = [_Span(part) for part in re.split(r'(?<=[.!?;])\s+', text) if part]
+
+class StubNLP:
+    """
+    Stands in for the en_core_web_lg pipeline: pipe() yields docs whose sentences
+    are split at sentence punctuation and semicolons, like the parser's boundaries.
+    """
+
+    def pipe(self, texts, batch_size=64, disable=()):
+        for text in texts:
+            yield _Doc(text)
+
+    def __call__(self, text):
+        return _Doc(text)
+
+def install_spacy_stub():
+    """
+    Make scraping.get_nlp() return StubNLP when en_core_web_lg isn't installed.
+
+    :return: True when the stub is in use.
+    """
+    from app.scripts import scraping
+
+    try:
+        import spacy
+        if spacy.util.is_package("en_core_web_lg"):
+            return False
+    except ImportError:
+        pass
+    scraping._nlp = StubNLP()
+    return True
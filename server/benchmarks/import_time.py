@@ -0,0 +1,54 @@
+"""
+Cold import-time budget for the server.
+
+Each target is imported in a fresh interpreter so nothing is cached, and the
+run fails when a target takes longer than its budget. Run from the server
+directory:
+
+    python benchmarks/import_time.py
+"""
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# name -> (code to time, budget in seconds). create_app() has to import
+# Flask-SQLAlchemy and Flask-Migrate (SQLAlchemy and Alembic), which alone take
+# 0.5-0.6 s cold on a single core, so its budget leaves room for that plus the snapshot load
+TARGETS = {
+    "app.scripts.scraping": ("import app.scripts.scraping", 0.5),
+    "create_app()": ("from app import create_app; create_app()", 1.5),
+}
+
+TIMER = """
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+def measure(code, repeat=3):
+    """
+    Best-of-`repeat` cold import time for `code`, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+def main():
+    over_budget = False
+    for name, (code, budget) in TARGETS.items():
+        elapsed = measure(code)
+        status = "ok" if elapsed <= budget else "OVER BUDGET"
+        over_budget |= elapsed > budget
+        print(f"{name:<24} {elapsed * 1000:8.1f} ms  (budget {budget * 1000:.0f} ms)  {status}")
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
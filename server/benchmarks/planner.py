@@ -0,0 +1,57 @@
+"""
+Degree planner latency budget.
+
+Plans the CE degree for a fresh student and for a mid-degree student (the
+first four semesters of the fresh plan already completed) at a few credit
+caps, and fails when a plan takes longer than the budget. Run from the
+server directory:
+
+    python benchmarks/planner.py
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import Config  # noqa: E402
+from app.scripts.degree_plan import is_placeholder, load_degree_plan  # noqa: E402
+from app.scripts.planner import DegreePlanner  # noqa: E402
+
+BUDGET = 0.1  # seconds per plan
+CREDIT_CAPS = (12, 15, 18)
+
+def time_plan(planner, completed, credit_cap, repeat=50):
+    """
+    (median, worst) seconds for planner.plan(completed, credit_cap).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        planner.plan(completed, credit_cap=credit_cap)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), max(timings)
+
+def main():
+    planner = DegreePlanner(load_degree_plan(Config.DEGREE_PLAN_PATH))
+
+    fresh_plan = planner.plan([])
+    mid_degree = [course["code"] for semester in fresh_plan["semesters"][:4]
+                  for course in semester["courses"] if not is_placeholder(course["code"])]
+    students = {"fresh": [], "mid-degree": mid_degree}
+
+    over_budget = False
+    for name, completed in students.items():
+        for credit_cap in CREDIT_CAPS:
+            median, worst = time_plan(planner, completed, credit_cap)
+            semesters = planner.plan(completed, credit_cap=credit_cap)["total_semesters"]
+            status = "ok" if worst <= BUDGET else "OVER BUDGET"
+            over_budget |= worst > BUDGET
+            print(f"{name:<11} cap {credit_cap:>2}  {semesters:>2} semesters  "
+                  f"median {median * 1000:6.2f} ms  worst {worst * 1000:6.2f} ms  "
+                  f"(budget {BUDGET * 1000:.0f} ms)  {status}")
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""
+Professor refresh against a local stand-in for RateMyProfessors.
+
+Builds a professors table of --professors rows, then serves new ratings for
+them from fixtures.RatingServer, with a few professors missing (404), a few
+failing twice (503) and every --throttle-every'th request throttled (429).
+The refresh is stopped after a third of the professors and resumed, and the
+run fails unless:
+
+- every served professor's row holds the served ratings and missing ones are marked gone
+- no professor is fetched successfully twice across the interruption
+- requests never exceed the concurrency limit or the token bucket's rate
+- ProfessorRatings is rebuilt with every professor
+
+Run from the server directory:
+
+    python benchmarks/professor_refresh.py [--professors 300] [--rate 40]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.scripts.professor_refresh import parse_rating_page, refresh_professors  # noqa: E402
+from fixtures import RatingServer, professor_db, rating_page, rating_record  # noqa: E402
+
+def peak_rate(times, window=1.0):
+    """
+    Most requests started within any `window` seconds.
+    """
+    peak, start = 0, 0
+    for end in range(len(times)):
+        while times[end] - times[start] > window:
+            start += 1
+        peak = max(peak, end - start + 1)
+    return peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--professors", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=40.0)
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--throttle-every", type=int, default=75)
+    args = parser.parse_args(argv)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = professor_db(os.path.join(tmp, "professors.db"), args.professors)
+        ids = [str(100000 + i) for i in range(args.professors)]
+        missing, flaky = set(ids[5:10]), {professor_id: 2 for professor_id in ids[20:25]}
+        records = {professor_id: rating_record(professor_id, seed=1) for professor_id in ids if professor_id not in missing}
+        options = dict(concurrency=args.concurrency, rate=args.rate, burst=args.burst, batch_size=25,
+                       grades_db=os.path.join(tmp, "no-grades.db"))
+
+        with RatingServer(records, flaky=flaky, throttle_every=args.throttle_every, latency=0.02) as server:
+            start = time.perf_counter()
+            run_id, complete, first = refresh_professors(db_path, limit=args.professors // 3,
+                                                         base_url=server.url, **options)
+            if complete:
+                failures.append("the limited first call finished the whole run")
+            resumed_id, complete, second = refresh_professors(db_path, base_url=server.url, **options)
+            elapsed = time.perf_counter() - start
+        if resumed_id != run_id or not complete:
+            failures.append(f"resume went to run {resumed_id} (complete={complete}) instead of finishing run {run_id}")
+
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = {row[0]: row[1:] for row in conn.execute("""
+                SELECT id, rmp_name, department, quality_rating, difficulty_rating, total_ratings, would_take_again, tags
+                FROM professors
+            """)}
+            statuses = dict(conn.execute("SELECT Professor_Id, Status FROM ProfessorRefreshQueue WHERE Run_Id = ?", (run_id,)))
+            typed = conn.execute("SELECT COUNT(*) FROM ProfessorRatings").fetchone()[0]
+        finally:
+            conn.close()
+
+    for professor_id, record in records.items():
+        expected = parse_rating_page(rating_page(record))
+        stored = dict(zip(("name", "department", "quality_rating", "difficulty_rating", "total_ratings",
+                           "would_take_again", "tags"), rows[professor_id]))
+        if stored != expected or statuses.get(professor_id) != "done":
+            failures.append(f"{professor_id}: stored {stored} ({statuses.get(professor_id)}), expected {expected}")
+    for professor_id in missing:
+        if statuses.get(professor_id) != "gone":
+            failures.append(f"{professor_id}: status {statuses.get(professor_id)}, expected gone")
+    if typed != args.professors:
+        failures.append(f"ProfessorRatings has {typed} rows, expected {args.professors}")
+
+    fetched = {}
+    for _, path, status in server.log:
+        if status == 200:
+            fetched[path] = fetched.get(path, 0) + 1
+    refetched = [path for path, count in fetched.items() if count > 1]
+    if refetched:
+        failures.append(f"{len(refetched)} professor(s) fetched again after the resume, e.g. {refetched[0]}")
+    if server.in_flight_peak > args.concurrency:
+        failures.append(f"{server.in_flight_peak} requests in flight, limit {args.concurrency}")
+    per_second = peak_rate(sorted(t for t, _, _ in server.log))
+    if per_second > args.rate + args.burst + 1:
+        failures.append(f"{per_second} requests in one second, limit {args.rate:.0f}/s with burst {args.burst}")
+
+    statuses_seen = {}
+    for _, _, status in server.log:
+        statuses_seen[status] = statuses_seen.get(status, 0) + 1
+    print(f"{args.professors} professors in {elapsed:.1f}s, {len(server.log)} requests {statuses_seen}, "
+          f"peak {server.in_flight_peak} in flight, {per_second} in the busiest second")
+    print(f"first call: {first}")
+    print(f"resumed:    {second}")
+    for failure in failures[:20]:
+        print(f"FAIL {failure}")
+    print("ok" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
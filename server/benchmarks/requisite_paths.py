@@ -0,0 +1,84 @@
+"""
+Regression check of requisite extraction against the original spaCy path.
+
+Every description stored in a classes database (each ClassesFor{dept} table)
+is parsed twice: by extract_requisites_batch, which reads most blocks with the
+regex fast path and sends the rest through the trimmed pipeline, and by the
+path it replaced, the full en_core_web_lg pipeline splitting every requisite
+block into sentences. The run fails on any description whose prerequisites or
+corequisites differ, and when the model isn't installed, since nothing can be
+compared then. Run from the server directory:
+
+    python benchmarks/requisite_paths.py [--db ../data/classes.db]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import Config  # noqa: E402
+from app.scripts import scraping  # noqa: E402
+
+def stored_descriptions(db_path):
+    """
+    [(table, Course_Num, Description)] of every course with a description.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        tables = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'ClassesFor%' ORDER BY name")]
+        rows = []
+        for table in tables:
+            rows.extend((table, code, description) for code, description in
+                        conn.execute(f"SELECT Course_Num, Description FROM {table}") if description)
+    finally:
+        conn.close()
+    return rows
+
+def spacy_requisites(description_text, nlp):
+    """
+    The original extraction: the whole pipeline over the requisite block, one mode per sentence.
+    """
+    block = scraping._requisite_block(description_text)
+    if block is None:
+        return set(), set()
+    req_block_text, current_mode, _ = block
+    return scraping._classify_sentences((sent.text for sent in nlp(req_block_text).sents), current_mode)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=Config.CLASSES_DB_PATH, help="Classes database with stored descriptions.")
+    args = parser.parse_args(argv)
+
+    try:
+        import spacy
+        nlp = spacy.load("en_core_web_lg")
+    except (ImportError, OSError) as e:
+        print(f"Can't compare without spaCy and en_core_web_lg: {e}")
+        return 1
+
+    rows = stored_descriptions(args.db)
+    scraping._requisite_cache.clear()
+    start = time.perf_counter()
+    fast = scraping.extract_requisites_batch([description for _, _, description in rows])
+    fast_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    differences = 0
+    for (table, code, description), result in zip(rows, fast):
+        prereqs, coreqs = spacy_requisites(description, nlp)
+        if (result["prereqs"], result["coreqs"]) != (prereqs, coreqs):
+            differences += 1
+            print(f"DIFFERENT {table} {code}: fast {sorted(result['prereqs'])} / {sorted(result['coreqs'])}, "
+                  f"spaCy {sorted(prereqs)} / {sorted(coreqs)}")
+    spacy_time = time.perf_counter() - start
+
+    print(f"{len(rows)} descriptions: fast path {fast_time:.2f}s, spaCy path {spacy_time:.2f}s, "
+          f"{differences} difference(s)")
+    return 1 if differences else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,345 @@
+"""
+Benchmark suite for the parsing, extraction and API paths.
+
+Micro-benchmarks time extract_all_courses on 1-10 page transcripts,
+extract_requisites (one description and a whole page), find_data on catalog
+pages of N courses, the professor table build and ranking on N rows and the
+timetable search for 6 courses of 40 sections; macro
+benchmarks time the insert_courses database path and POST /api/process-file
+through the Flask test client. Every fixture is synthetic (see fixtures.py)
+and nothing touches the network; spaCy is stubbed when en_core_web_lg isn't
+installed, which the results record.
+
+Alongside the benchmarks, the share of a one-page transcript parse spent in
+the metrics stage timers is measured (metrics/stage_overhead); more than
+STAGE_OVERHEAD_LIMIT fails the run.
+
+Results are written as JSON. Given a baseline from an earlier run, every
+benchmark whose median got slower by more than --threshold is flagged and the
+run exits 1. Run from the server directory:
+
+    python benchmarks/suite.py [--output results.json] [--compare baseline.json]
+                               [--threshold 0.2] [--filter transcript] [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests  # noqa: E402
+
+from fixtures import (catalog_page, catalog_rows, department_pages, install_spacy_stub,  # noqa: E402
+                      professor_db, sections_csv, transcript_pdf)
+
+TRANSCRIPT_PAGES = (1, 2, 5, 10)
+CATALOG_COURSES = (100, 1000)
+PROFESSOR_ROWS = (1000, 10000)
+INSERT_DEPARTMENT = "CE"
+TIMETABLE_COURSES, TIMETABLE_SECTIONS = 6, 40
+
+DEFAULT_THRESHOLD = 0.2  # a median more than 20% slower than the baseline is a regression
+DEFAULT_REPEAT = 5
+STAGE_OVERHEAD_LIMIT = 0.01  # stage timers may take at most 1% of a transcript parse
+STAGE_TIMER_CALLS = 100000
+
+# --- Registry ---
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """
+    Register a setup function under `name`. Setup runs once, untimed, and returns
+    the callable to time; fixtures are built there, not in the timed call.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+class OfflineSession:
+    """
+    Stands in for the scraper's requests.Session: every department page the
+    fixtures don't provide fails like an unreachable host.
+    """
+
+    def get(self, url, **kwargs):
+        raise requests.exceptions.ConnectionError(f"offline: {url}")
+
+# --- Transcripts ---
+
+def _transcript_benchmark(pages):
+    def setup(tmp):
+        from app.scripts import parse_transcript
+
+        pdf, _ = transcript_pdf(pages)
+
+        def run():
+            parse_transcript.clear_cache()  # time the parse, not the transcript cache
+            parse_transcript.extract_all_courses(pdf)
+        return run
+    return setup
+
+for _pages in TRANSCRIPT_PAGES:
+    benchmark(f"transcript/extract_all_courses/{_pages}p")(_transcript_benchmark(_pages))
+
+# --- Requisites and catalog pages ---
+
+def _descriptions():
+    return [description for _, _, description in catalog_rows() if description]
+
+@benchmark("requisites/extract_requisites/single")
+def _requisites_single(tmp):
+    from app.scripts import scraping
+
+    description = max(_descriptions(), key=lambda text: text.count(";") + text.count("."))
+
+    def run():
+        scraping._requisite_cache.clear()
+        scraping.extract_requisites(description)
+    return run
+
+@benchmark("requisites/extract_requisites_batch/page")
+def _requisites_batch(tmp):
+    from app.scripts import scraping
+
+    descriptions = _descriptions()
+
+    def run():
+        scraping._requisite_cache.clear()
+        scraping.extract_requisites_batch(descriptions)
+    return run
+
+def _find_data_benchmark(courses):
+    def setup(tmp):
+        from app.scripts import scraping
+
+        page = catalog_page(courses)
+
+        def run():
+            scraping._requisite_cache.clear()
+            scraping.find_data(page)
+        return run
+    return setup
+
+for _courses in CATALOG_COURSES:
+    benchmark(f"catalog/find_data/{_courses}")(_find_data_benchmark(_courses))
+
+@benchmark("catalog/insert_courses")
+def _insert_courses(tmp):
+    from app.scripts import scraping
+
+    pages = department_pages()
+    page = pages[INSERT_DEPARTMENT]
+    db_path = os.path.join(tmp, "classes.db")
+
+    def run():
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        scraping._requisite_cache.clear()
+        catalog = scraping.CatalogScraper(http=OfflineSession(), min_interval=0)
+        for department, html in pages.items():
+            catalog.add_html(department, html)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraping.insert_courses(page, INSERT_DEPARTMENT, catalog=catalog, db_path=db_path)
+        catalog.close()
+    return run
+
+# --- Professors ---
+
+def _professor_benchmarks(count):
+    def build(tmp):
+        from app.scripts.professor_ratings import build_ratings_table
+
+        db_path = professor_db(os.path.join(tmp, f"professors_{count}.db"), count)
+        return lambda: build_ratings_table(db_path)
+
+    def rank(tmp):
+        from app.scripts.professor_ratings import ProfessorRanker, build_ratings_table
+
+        db_path = professor_db(os.path.join(tmp, f"professors_{count}_rank.db"), count)
+        build_ratings_table(db_path)
+        ranker = ProfessorRanker.from_db(db_path)
+        preferences = {"assessmentType": "projects", "attendanceRequired": "no", "classSize": "small"}
+        return lambda: ranker.rank(preferences, department="Engineering", k=10)
+
+    benchmark(f"professors/build_ratings_table/{count}")(build)
+    benchmark(f"professors/rank/{count}")(rank)
+
+for _count in PROFESSOR_ROWS:
+    _professor_benchmarks(_count)
+
+# --- Timetables ---
+
+@benchmark(f"timetable/build/{TIMETABLE_COURSES}x{TIMETABLE_SECTIONS}")
+def _timetable(tmp):
+    from app.scripts.professor_ratings import build_ratings_table
+    from app.scripts.timetable import TimetableBuilder
+
+    db_path = professor_db(os.path.join(tmp, "professors_timetable.db"), 1000)
+    build_ratings_table(db_path)
+    path, codes = sections_csv(os.path.join(tmp, "sections.csv"), TIMETABLE_COURSES, TIMETABLE_SECTIONS)
+    builder = TimetableBuilder.from_files(path, db_path)
+    preferences = {"preferredDays": ["Monday", "Wednesday"], "classSize": "Small", "assessmentType": "Assignment Heavy"}
+
+    def run():
+        # No time budget, so the benchmark times the whole search
+        result = builder.build(codes, preferences, budget_ms=60_000)
+        if not result["schedules"]:
+            raise RuntimeError("no schedule found")
+    return run
+
+# --- API ---
+
+def _process_file_benchmark(pages):
+    def setup(tmp):
+        os.environ.setdefault("DATABASE_URL", "sqlite://")
+        from app import create_app
+        from app.scripts import parse_transcript
+
+        client = create_app().test_client()
+        pdf, _ = transcript_pdf(pages)
+
+        def run():
+            parse_transcript.clear_cache()
+            response = client.post("/api/process-file", data={"file": (io.BytesIO(pdf), "transcript.pdf")},
+                                   content_type="multipart/form-data")
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/process-file returned {response.status_code}")
+        return run
+    return setup
+
+for _pages in (1, 10):
+    benchmark(f"api/process-file/{_pages}p")(_process_file_benchmark(_pages))
+
+# --- Running and comparing ---
+
+def measure(run, repeat):
+    """
+    {median_ms, p95_ms, min_ms, runs} of `repeat` timed calls after one warm-up call.
+    """
+    run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))]
+    return {"median_ms": round(statistics.median(timings), 3), "p95_ms": round(p95, 3),
+            "min_ms": round(timings[0], 3), "runs": repeat}
+
+def run_suite(names, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            results[name] = measure(BENCHMARKS[name](tmp), repeat)
+            print(f"{name:<44} median {results[name]['median_ms']:9.2f} ms  "
+                  f"p95 {results[name]['p95_ms']:9.2f} ms")
+    return results
+
+def stage_overhead(repeat, pages=1):
+    """
+    Fraction of a transcript parse spent in stage timers: the stages one parse
+    times, at the measured cost of an empty stage() each, over the parse's median time.
+    """
+    from app import metrics
+    from app.scripts import parse_transcript
+
+    pdf, _ = transcript_pdf(pages)
+    start = time.perf_counter()
+    for _ in range(STAGE_TIMER_CALLS):
+        with metrics.stage("benchmark.empty"):
+            pass
+    timer_seconds = (time.perf_counter() - start) / STAGE_TIMER_CALLS
+
+    def run():
+        parse_transcript.clear_cache()
+        return parse_transcript.parse_transcript_bytes(pdf)
+    with metrics.collect_stages() as stages:
+        run()
+    parse_seconds = measure(run, repeat)["median_ms"] / 1000
+    return {"stages_per_parse": len(stages), "timer_us": round(timer_seconds * 1e6, 3),
+            "parse_ms": round(parse_seconds * 1000, 3), "overhead": len(stages) * timer_seconds / parse_seconds}
+
+def compare(results, baseline, threshold):
+    """
+    Benchmarks whose median is more than `threshold` (a fraction) above the baseline's.
+
+    :return: [(name, baseline median, current median, relative change)]
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous["median_ms"]:
+            continue
+        change = current["median_ms"] / previous["median_ms"] - 1
+        if change > threshold:
+            regressions.append((name, previous["median_ms"], current["median_ms"], change))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results JSON of an earlier run to compare against.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown of the median that counts as a regression.")
+    parser.add_argument("--filter", help="Only run benchmarks whose name matches this regex.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit.")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.filter or re.search(args.filter, name)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    stubbed = install_spacy_stub()
+    results = run_suite(names, args.repeat)
+    overhead = None
+    if not args.filter or re.search(args.filter, "metrics/stage_overhead"):
+        overhead = stage_overhead(args.repeat)
+        print(f"{'metrics/stage_overhead':<44} {overhead['stages_per_parse']} timers x {overhead['timer_us']:.2f} us "
+              f"in {overhead['parse_ms']:.2f} ms = {overhead['overhead']:.3%}")
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "spacy_stub": stubbed,
+        },
+        "results": results,
+        "stage_overhead": overhead,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    over_limit = overhead is not None and overhead["overhead"] > STAGE_OVERHEAD_LIMIT
+    if over_limit:
+        print(f"Stage timers take {overhead['overhead']:.2%} of a transcript parse, over {STAGE_OVERHEAD_LIMIT:.0%}")
+    if not args.compare:
+        return 1 if over_limit else 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.threshold)
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: {before:.2f} ms -> {after:.2f} ms ({change:+.0%})")
+    if baseline["meta"].get("spacy_stub") != stubbed:
+        print("Note: the baseline and this run differ in whether spaCy was stubbed.")
+    print(f"{len(regressions)} regression(s) over {args.threshold * 100:.0f}% against {args.compare}")
+    return 1 if regressions or over_limit else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
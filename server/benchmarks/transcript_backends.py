@@ -0,0 +1,62 @@
+"""
+Accuracy and latency of the transcript text extraction backends.
+
+Runs the fast (pdfminer text stream) and layout (pdfplumber) backends over a
+corpus of synthetic transcripts from transcripts.py, without the fallback.
+Reports every transcript where the backends find different courses or miss
+expected ones, plus per-page latency, and exits non-zero on any difference.
+Run from the server directory:
+
+    python benchmarks/transcript_backends.py [count]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.scripts.parse_transcript import BACKENDS, _page_count, parse_pages  # noqa: E402
+from transcripts import make_corpus  # noqa: E402
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 20
+    corpus = make_corpus(count)
+    page_counts = [_page_count(pdf) for pdf, _ in corpus]
+    print(f"{len(corpus)} transcripts, {sum(page_counts)} pages")
+
+    per_page = {backend: [] for backend in BACKENDS}
+    differences = 0
+    for i, ((pdf, expected), pages) in enumerate(zip(corpus, page_counts)):
+        found = {}
+        for backend in BACKENDS:
+            start = time.perf_counter()
+            found[backend] = parse_pages(pdf, backend=backend, fallback=False)
+            per_page[backend].append((time.perf_counter() - start) / pages)
+
+        if found["fast"] != found["layout"]:
+            differences += 1
+            print(f"  transcript {i:02d}: only fast {sorted(found['fast'] - found['layout'])} "
+                  f"only layout {sorted(found['layout'] - found['fast'])}")
+        for backend, courses in found.items():
+            missed = sorted(set(expected) - courses)
+            if missed:
+                differences += 1
+                print(f"  transcript {i:02d}: {backend} missed {missed}")
+
+    for backend, timings in per_page.items():
+        print(f"{backend:<7} per page  median {statistics.median(timings) * 1000:7.2f} ms  "
+              f"p95 {percentile(timings, 95) * 1000:7.2f} ms")
+    fast, layout = statistics.median(per_page["fast"]), statistics.median(per_page["layout"])
+    print(f"fast is {layout / fast:.1f}x the layout backend per page")
+    print("backends agree" if not differences else f"{differences} differences")
+    return 1 if differences else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
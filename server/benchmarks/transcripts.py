@@ -0,0 +1,176 @@
+"""
+Synthetic UTA-style unofficial transcripts for the transcript benchmarks.
+
+make_transcript() lays out transfer credit, test credit and term sections the
+way the unofficial transcript does, with each column placed as its own text
+object, and returns the PDF bytes together with the course codes a parser
+should find. The PDF is written by hand (Helvetica, no dependencies). Run it
+directly to write a few samples:
+
+    python benchmarks/transcripts.py out_dir [count]
+"""
+import os
+import random
+import sys
+
+COURSES = [
+    ("CE 1105", "Intro to Civil Engineering"), ("CE 1252", "Engineering Graphics"),
+    ("CE 2153", "Geomatics Lab"), ("CE 2311", "Statics"), ("CE 2313", "Mechanics of Materials"),
+    ("CE 2331", "Fluid Mechanics Intro"), ("CE 3131", "Soils Lab"), ("CE 3142", "Hydraulics Lab"),
+    ("CE 3143", "Structures Lab"), ("CE 3210", "Engineering Economics"), ("CE 3301", "Dynamics"),
+    ("CE 3302", "Transportation Engineering"), ("CE 3305", "Fluid Mechanics"),
+    ("CE 3311", "Geomatics"), ("CE 3334", "Environmental Engineering"), ("CE 3341", "Structural Analysis"),
+    ("CE 3342", "Water Resources"), ("CE 3343", "Soil Mechanics"), ("CE 3361", "Construction Management"),
+    ("CE 4328", "Steel Design"), ("CE 4332", "Foundation Design"), ("CE 4336", "Senior Design"),
+    ("CE 4347", "Reinforced Concrete"), ("CE 4352", "Highway Design"), ("CHEM 1465", "Chemistry for Engineers"),
+    ("COMS 2302", "Professional Speaking"), ("ENGL 1301", "Rhetoric and Composition I"),
+    ("ENGR 1101", "Engineering Orientation"), ("GEOL 3340", "Engineering Geology"),
+    ("HIST 1301", "History of the US to 1865"), ("HIST 1302", "History of the US from 1865"),
+    ("IE 2308", "Engineering Economy"), ("MATH 1426", "Calculus I"), ("MATH 2425", "Calculus II"),
+    ("MATH 2326", "Calculus III"), ("MATH 3319", "Differential Equations"), ("PHYS 1443", "Physics I"),
+    ("PHYS 1444", "Physics II"), ("POLS 2311", "Government of the US"), ("POLS 2312", "State and Local Government"),
+    ("UNIV-EN 1131", "Engineering Learning Community"),
+]
+
+TERMS = ["Fall", "Spring", "Summer"]
+GRADES = ["A", "A", "B", "B", "C", "D", "F", "W", "P"]
+GRADE_POINTS = {"A": 4, "B": 3, "C": 2, "D": 1}
+
+# x positions of the term table columns
+COLUMNS = (40, 110, 330, 390, 450, 490)
+TOP, BOTTOM, LEADING = 760, 50, 11
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def build_pdf(pages):
+    """
+    :param pages: One list of (x, y, text) runs per page.
+    :return: PDF bytes.
+    """
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    pages_ref = 2 + 2 * len(pages)  # font, (content, page) per page, then Pages
+    page_refs = []
+    for runs in pages:
+        stream = "".join(f"BT /F1 9 Tf 1 0 0 1 {x} {y} Tm ({_escape(text)}) Tj ET\n" for x, y, text in runs).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 1 0 R >> >> >>" % (pages_ref, len(objects)))
+        page_refs.append(len(objects))
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>"
+                   % (b" ".join(b"%d 0 R" % ref for ref in page_refs), len(page_refs)))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_ref)
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+    return out
+
+def make_transcript(seed=0, terms=6, per_term=5, transfers=2, tests=1, retakes=False):
+    """
+    One synthetic transcript.
+
+    :param retakes: Cycle through the course list again once it runs out (courses
+                    are retaken), so long transcripts can run to any number of pages.
+    :return: (pdf bytes, sorted course codes a parser should find)
+    """
+    rng = random.Random(seed)
+    # Transfer and test credit is lower-division core work; the parser's transfer
+    # pattern only expects three- or four-letter subjects there
+    transferable = [course for course in COURSES if course[0].split(" ")[0].isalpha() and len(course[0].split(" ")[0]) >= 3]
+    credit = rng.sample(transferable, transfers + tests)
+    courses = credit + rng.sample([course for course in COURSES if course not in credit],
+                                  min(len(COURSES) - len(credit), terms * per_term))
+    expected = set()
+    rows = []  # each row is a list of (x, text)
+
+    rows += [[(40, "The University of Texas at Arlington")], [(40, "Unofficial Transcript")],
+             [(40, f"Name: Student {seed:04d}"), (330, f"Student ID: 1000{seed:06d}")], []]
+
+    start_year = 2020 + rng.randint(0, 3)
+    if transfers:
+        rows += [[(40, "Transfer Credits")], [(40, "Transfer Credit from Tarrant County College")]]
+        for code, title in courses[:transfers]:
+            rows += [[(40, code), (110, title.upper()[:20]), (390, "3.000"), (450, "T")],
+                     [(40, f"Transferred to Term {start_year} Fall as")],
+                     [(40, code), (110, title)]]
+            expected.add(code)
+        rows.append([])
+    if tests:
+        rows.append([(40, "Test Credits Applied Toward Undergraduate")])
+        for code, title in courses[transfers:transfers + tests]:
+            rows += [[(40, "Advanced Placement"), (330, "3.000")],
+                     [(40, f"Transferred to Term {start_year} Summer as")],
+                     [(40, code), (110, title)]]
+            expected.add(code)
+        rows.append([])
+
+    remaining = courses[transfers + tests:]
+    for term in range(terms):
+        year = start_year + (term + 1) // 3
+        rows += [[(40, f"{year} {TERMS[term % 3]}")],
+                 [(40, "Course"), (110, "Description"), (330, "Attempted"), (390, "Earned"), (450, "Grade"), (490, "Points")]]
+        in_progress = term == terms - 1
+        if retakes:
+            term_courses = [remaining[(term * per_term + k) % len(remaining)] for k in range(per_term)]
+        else:
+            term_courses = remaining[term * per_term:(term + 1) * per_term]
+        for code, title in term_courses:
+            credits = code.split(" ")[1][1]
+            grade = "" if in_progress else rng.choice(GRADES)
+            earned = "0.000" if in_progress or grade in ("F", "W") else f"{credits}.000"
+            points = f"{GRADE_POINTS.get(grade, 0) * int(credits)}.000"
+            rows.append(list(zip(COLUMNS, [code, title, f"{credits}.000", earned, grade, points])))
+            expected.add(code)
+        rows += [[(40, "Term GPA"), (110, f"{rng.uniform(2, 4):.3f}"), (330, "Term Totals"), (390, "15.000")], []]
+    rows.append([(40, "End of Unofficial Transcript")])
+
+    pages = [[]]
+    y = TOP
+    for row in rows:
+        if y < BOTTOM:
+            pages.append([])
+            y = TOP
+        pages[-1].extend((x, y, text) for x, text in row if text)
+        y -= LEADING
+    return build_pdf(pages), sorted(expected)
+
+def make_transcript_pages(pages, seed=0):
+    """
+    A transcript running to at least `pages` pages, built by adding terms until it does.
+
+    :return: (pdf bytes, sorted course codes a parser should find)
+    """
+    terms = 1
+    while True:
+        pdf, expected = make_transcript(seed=seed, terms=terms, per_term=6, retakes=True)
+        count = pdf.count(b"/Type /Page ")
+        if count >= pages:
+            return pdf, expected
+        # Roughly 64 rows per page and 10 rows per term
+        terms += max(1, (pages - count) * 6)
+
+def make_corpus(count=20, seed=0):
+    """
+    count transcripts of increasing length, from a new student to a senior.
+    """
+    corpus = []
+    for i in range(count):
+        terms = 1 + i % 8
+        corpus.append(make_transcript(seed=seed + i, terms=terms, per_term=5, transfers=i % 3, tests=i % 2))
+    return corpus
+
+if __name__ == "__main__":
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    os.makedirs(out_dir, exist_ok=True)
+    for i, (pdf, expected) in enumerate(make_corpus(count)):
+        with open(os.path.join(out_dir, f"transcript_{i:02d}.pdf"), "wb") as f:
+            f.write(pdf)
+        print(f"transcript_{i:02d}.pdf  {len(expected)} courses")
@@ -0,0 +1,27 @@
+"""
+Shared fixtures. Run from the server directory: python -m pytest -q
+
+Config is read when app.config is imported, so the environment is set here
+before anything from the app is. The synthetic data generators are shared
+with the benchmarks (benchmarks/fixtures.py).
+"""
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, SERVER_DIR)
+sys.path.insert(0, os.path.join(SERVER_DIR, "benchmarks"))
+
+import pytest  # noqa: E402
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+
+    return create_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
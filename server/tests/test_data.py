@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from app.data import CLASSES_DB_PATH, ConnectionPool, PoolTimeout
+
+def test_course_department_is_its_subject(app, client):
+    snapshot = app.extensions["data"].snapshot
+    assert all(course["department"] == code.split(" ")[0] for code, course in snapshot.courses.items())
+    assert client.get("/api/courses/MATH%201426").json["department"] == "MATH"
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool(CLASSES_DB_PATH, size=2)
+    yield pool
+    pool.close()
+
+def test_exhausted_pool_raises_pool_timeout(pool):
+    with pool.connection(), pool.connection():
+        start = time.monotonic()
+        with pytest.raises(PoolTimeout):
+            with pool.connection(timeout=0.1):
+                pass
+        assert time.monotonic() - start < 1
+
+def test_waiter_gets_a_returned_connection(pool):
+    got = []
+    with pool.connection() as first, pool.connection():
+        waiter = threading.Thread(target=lambda: got.append(pool.connection(timeout=2).__enter__()))
+        waiter.start()
+        time.sleep(0.05)
+    waiter.join()
+    assert got == [first]
+
+def test_close_wakes_waiters_and_retires_borrowed_connections(pool):
+    got = []
+
+    def wait_for_connection():
+        with pool.connection(timeout=5) as conn:
+            got.append(conn)
+
+    with pool.connection() as old, pool.connection():
+        waiter = threading.Thread(target=wait_for_connection)
+        waiter.start()
+        time.sleep(0.05)
+        pool.close()
+        waiter.join(timeout=1)
+        assert not waiter.is_alive()
+        assert got and got[0] is not old
+    # Connections borrowed before close() are closed on return, not reused
+    with pytest.raises(Exception):
+        old.execute("SELECT 1")
+    assert pool._opened <= pool.size and len(pool._idle) <= pool.size
+
+def test_threads_search_the_shared_index_without_copying_it(app):
+    from app.data import CatalogSnapshot
+
+    snapshot = CatalogSnapshot.load()
+    expected = snapshot.search("structural analysis")
+    assert expected["total"]
+    results, connections = [], []
+
+    def search():
+        results.append(snapshot.search("structural analysis"))
+        connections.append(snapshot._search_connection())
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expected] * 8
+    assert len({id(conn) for conn in connections}) == 8
+    # Every connection reads the one in-memory database rather than a copy of it
+    with snapshot._search_db:
+        snapshot._search_db.execute("CREATE TABLE Probe (x)")
+    for conn in connections:
+        assert conn.execute("SELECT COUNT(*) FROM Probe").fetchone() == (0,)
+        with pytest.raises(Exception):
+            conn.execute("DELETE FROM Courses")
@@ -0,0 +1,128 @@
+import sqlite3
+
+import pytest
+
+from app.scripts.grade_aggregates import course_grades, refresh_aggregates
+
+ROWS = [
+    # subject, course, section, year, term, instructor, A, B, C, D, F, W
+    ("CE", "3305", "001", 2022, "Fall", "Smith, Jane", 10, 8, 4, 1, 1, 2),
+    ("CE", "3305", "002", 2022, "Fall", "Lee, Sam", 6, 9, 5, 2, 0, 1),
+    ("CE", "3343", "001", 2022, "Fall", "Smith, Jane", 12, 5, 3, 0, 0, 0),
+    ("CE", "3305", "001", 2023, "Spring", "Smith, Jane", 9, 9, 3, 2, 1, 3),
+    ("CSE", "1310", "001", 2023, "Spring", "Park, Kim", 20, 15, 10, 5, 5, 5),
+]
+NEW_TERM = [
+    ("CE", "3305", "001", 2023, "Fall", "Lee, Sam", 7, 7, 7, 1, 1, 1),
+    ("CSE", "1320", "001", 2023, "Fall", "Park, Kim", 11, 9, 6, 2, 1, 0),
+]
+AGGREGATE_TABLES = ("GradeTermAggregates", "CourseGradeAggregates", "CourseInstructorGradeAggregates")
+
+def grade_db(path, rows):
+    """
+    A grade database with an allgrades table holding `rows`.
+    """
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("""
+            CREATE TABLE allgrades (subject_id TEXT, course_number TEXT, section_number TEXT, year INTEGER,
+                                    semester TEXT, instructor1 TEXT, A INTEGER, B INTEGER, C INTEGER,
+                                    D INTEGER, F INTEGER, W INTEGER)
+        """)
+        conn.executemany("INSERT INTO allgrades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.close()
+    return path
+
+def execute(path, sql, params=()):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(sql, params)
+    conn.close()
+
+def aggregates(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: sorted(conn.execute(f"SELECT * FROM {table}")) for table in AGGREGATE_TABLES}
+    finally:
+        conn.close()
+
+def rebuilt(path, tmp_path):
+    """
+    The aggregate tables a full refresh builds from a copy of the current allgrades.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT * FROM allgrades").fetchall()
+    finally:
+        conn.close()
+    copy = grade_db(str(tmp_path / "rebuilt.db"), rows)
+    refresh_aggregates(copy, full=True)
+    return aggregates(copy)
+
+def summary(path, subject, course_number):
+    conn = sqlite3.connect(path)
+    try:
+        return course_grades(conn, subject, course_number)
+    finally:
+        conn.close()
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = grade_db(str(tmp_path / "grades.db"), ROWS)
+    first = refresh_aggregates(path)
+    assert first["terms"] == [(2022, "Fall"), (2023, "Spring")]
+    return path
+
+def test_an_unchanged_source_refreshes_nothing(db_path):
+    assert refresh_aggregates(db_path) == {"terms": [], "removed": [], "courses": 0}
+
+def test_a_new_term_is_the_only_one_refreshed(db_path, tmp_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany("INSERT INTO allgrades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", NEW_TERM)
+    conn.close()
+
+    result = refresh_aggregates(db_path)
+
+    assert result == {"terms": [(2023, "Fall")], "removed": [], "courses": 2}
+    assert aggregates(db_path) == rebuilt(db_path, tmp_path)
+    assert summary(db_path, "CE", "3305")["terms"] == 3
+    assert summary(db_path, "CSE", "1320")["graded"] == 29
+
+def test_an_edit_that_keeps_the_row_count_is_noticed(db_path, tmp_path):
+    before = summary(db_path, "CE", "3305")
+    # A grade correction: two Fs become Ds in one section, the term keeps its rows
+    execute(db_path, "UPDATE allgrades SET D = D + 2, F = F - 2 WHERE subject_id = 'CSE' AND year = 2023")
+    execute(db_path, "UPDATE allgrades SET A = A + 3 WHERE subject_id = 'CE' AND course_number = '3305' "
+                     "AND year = 2022 AND section_number = '002'")
+
+    result = refresh_aggregates(db_path)
+
+    assert result["terms"] == [(2022, "Fall"), (2023, "Spring")]
+    assert aggregates(db_path) == rebuilt(db_path, tmp_path)
+    after = summary(db_path, "CE", "3305")
+    assert after["graded"] == before["graded"] + 3 and after["gpa"] > before["gpa"]
+
+def test_an_instructor_rename_is_noticed(db_path, tmp_path):
+    execute(db_path, "UPDATE allgrades SET instructor1 = 'Lee-Park, Sam' WHERE instructor1 = 'Lee, Sam'")
+
+    assert refresh_aggregates(db_path)["terms"] == [(2022, "Fall")]
+    assert aggregates(db_path) == rebuilt(db_path, tmp_path)
+    instructors = {row["instructor"] for row in summary(db_path, "CE", "3305")["instructors"]}
+    assert instructors == {"Smith, Jane", "Lee-Park, Sam"}
+
+def test_a_removed_term_drops_its_rows_and_rollups(db_path, tmp_path):
+    execute(db_path, "DELETE FROM allgrades WHERE year = 2023 AND semester = 'Spring'")
+
+    result = refresh_aggregates(db_path)
+
+    assert result == {"terms": [], "removed": [(2023, "Spring")], "courses": 2}
+    assert aggregates(db_path) == rebuilt(db_path, tmp_path)
+    # CSE 1310 was only taught that term; CE 3305 keeps its other term
+    assert summary(db_path, "CSE", "1310") is None
+    assert summary(db_path, "CE", "3305")["terms"] == 1
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM GradeRefreshLog WHERE Year = 2023").fetchone()[0] == 0
+    finally:
+        conn.close()
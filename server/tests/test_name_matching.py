@@ -0,0 +1,49 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from app.data import PROFESSORS_DB_PATH
+from app.scripts.name_matching import NICKNAMES, create_match_table, evaluate, match_names, read_overrides
+
+LABELS = os.path.join(os.path.dirname(__file__), "data", "name_labels.csv")
+
+@pytest.fixture
+def overrides(tmp_path):
+    path = tmp_path / "overrides.csv"
+    path.write_text("instructor,professor_id\nGeorgios Alexandrakis,1997585\n", encoding="utf-8")
+    return str(path)
+
+def test_precision_and_recall_on_the_labeled_sample(tmp_path):
+    # No override file, so only the matcher itself is measured
+    report = evaluate(LABELS, overrides_path=str(tmp_path / "none.csv"))
+
+    assert report["queries"] == 73 and report["labeled_matches"] == 53
+    assert report["precision"] == 1.0
+    assert report["recall"] >= 0.96
+    assert report["comparisons"] < report["pairwise_comparisons"] / 50
+
+def test_nicknames_are_generic():
+    assert "george" not in NICKNAMES and "wendy" not in NICKNAMES
+
+def test_overrides_pin_names_the_matcher_cannot_link(overrides, tmp_path):
+    assert read_overrides(overrides) == {("georgios", "alexandrakis"): "1997585"}
+    name = "Alexandrakis, Georgios"
+
+    matched, unmatched = match_names([name], overrides_path=str(tmp_path / "none.csv"))
+    assert (matched, unmatched) == ({}, [name])
+    matched, _ = match_names([name], overrides_path=overrides)
+    assert matched == {name: "1997585"}
+
+def test_an_override_wins_over_a_cached_match(overrides, tmp_path):
+    db_path = str(tmp_path / "professors.db")
+    shutil.copy(PROFESSORS_DB_PATH, db_path)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        create_match_table(conn.cursor())
+        conn.execute("INSERT INTO NameMatches (Source_Name, Professor_Id, Score) VALUES ('Georgios Alexandrakis', '1', 0.9)")
+    conn.close()
+
+    matched, _ = match_names(["Georgios Alexandrakis"], db_path, overrides_path=overrides)
+    assert matched == {"Georgios Alexandrakis": "1997585"}
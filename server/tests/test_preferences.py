@@ -0,0 +1,94 @@
+import pytest
+
+from app.cache import ResultCache, cache_key
+from app.recommendations import Recommender
+from app.scripts.professor_ratings import preference_key
+from app.scripts.timetable import TimetableBuilder, load_sections
+from fixtures import sections_csv
+
+SPELLINGS = [
+    ({"assessmentType": "Test Heavy"}, {"assessmentType": "  test   HEAVY "}),
+    ({"attendanceRequired": "Not Required"}, {"attendanceRequired": "not required"}),
+    ({"classSize": "Small (25)"}, {"classSize": "small"}),
+    ({"assessmentType": "Test Heavy"}, {"assessmentType": "Assignment Heavy"}),
+    ({"classSize": "Small"}, {"classSize": "Large"}),
+    ({"assessmentType": "Test Heavy"}, {"assessmentType": "Tests, lots"}),
+]
+
+@pytest.fixture
+def timetable(app, tmp_path, monkeypatch):
+    path, codes = sections_csv(str(tmp_path / "sections.csv"), courses=3, per_course=6)
+    builder = TimetableBuilder(load_sections(path), app.extensions["professor_ranker"])
+    monkeypatch.setitem(app.extensions, "timetable", builder)
+    return builder, codes
+
+@pytest.mark.parametrize("first, second", SPELLINGS)
+def test_spellings_share_a_cache_key_only_when_they_rank_the_same(app, first, second):
+    ranker = app.extensions["professor_ranker"]
+    same_key = cache_key([], first, "v") == cache_key([], second, "v")
+    assert same_key == (preference_key(first) == preference_key(second))
+    if same_key:
+        assert ranker.rank(first, course="CE 3305") == ranker.rank(second, course="CE 3305")
+
+def test_case_and_spacing_give_the_same_ranking(app):
+    ranker = app.extensions["professor_ranker"]
+    preferences = {"assessmentType": "Test Heavy", "attendanceRequired": "Required", "classSize": "Small"}
+    folded = {field: f" {value.upper()} " for field, value in preferences.items()}
+    assert ranker.rank(preferences, course="CE 3305") == ranker.rank(folded, course="CE 3305")
+    assert ranker.rank(preferences, course="CE 3305") != ranker.rank({}, course="CE 3305")
+
+def test_recommendations_of_two_spellings_match(client):
+    answers = [client.post("/api/recommendations", json={"courses": ["CE 1105"], "preferences": preferences}).json
+               for preferences in ({"assessmentType": "test heavy"}, {"assessmentType": "Test Heavy"})]
+    assert answers[0] == answers[1]
+
+BAD_PREFERENCES = [
+    {"assessmentType": ["x"]},
+    {"attendanceRequired": {"a": 1}},
+    {"classSize": 5},
+    {"preferredDays": 5},
+    {"preferredDays": ["Mon", 3]},
+]
+
+def test_weight_cache_stays_bounded(app):
+    ranker = app.extensions["professor_ranker"]
+    for i in range(50):
+        ranker.rank({"assessmentType": f"made up {i}", "classSize": f"Size {i}"}, course="CE 3305")
+    assert len(ranker._weights) <= 3 * 3 * 4
+
+@pytest.mark.parametrize("preferences", BAD_PREFERENCES)
+def test_rank_rejects_malformed_preferences(client, preferences):
+    response = client.post("/api/professors/rank", json={"course": "CE 3305", "preferences": preferences})
+    assert response.status_code == 400
+    assert "preferences" in response.json["error"]
+
+@pytest.mark.parametrize("preferences", BAD_PREFERENCES)
+def test_recommendations_reject_malformed_preferences(client, preferences):
+    response = client.post("/api/recommendations", json={"courses": [], "preferences": preferences})
+    assert response.status_code == 400
+    assert "preferences" in response.json["error"]
+
+@pytest.mark.parametrize("preferences", BAD_PREFERENCES)
+def test_timetable_rejects_malformed_preferences(client, timetable, preferences):
+    response = client.post("/api/timetable", json={"courses": timetable[1], "preferences": preferences})
+    assert response.status_code == 400
+    assert "preferences" in response.json["error"]
+
+@pytest.mark.parametrize("preferences", BAD_PREFERENCES[:3])
+def test_timetable_builder_ignores_wrong_types(timetable, preferences):
+    builder, codes = timetable
+    assert builder.build(codes, preferences)["schedules"]
+
+def test_timetable_score_cache_stays_bounded(timetable):
+    builder, codes = timetable
+    for i in range(50):
+        builder.build(codes, {"assessmentType": f"made up {i}", "classSize": f"Size {i}"})
+    assert len(builder._scores) <= 3 * 3 * 4
+
+def test_recommend_notices_a_data_change(app):
+    versions = iter(["first", "second"])
+    cache = ResultCache(version_fn=lambda: next(versions), check_interval=0)
+    recommender = Recommender(app.extensions["eligibility"], app.extensions["professor_ranker"], cache=cache)
+    recommender.recommend([])
+    assert cache.invalidations == 1
+    assert recommender.version == "second"
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from app.scripts.prereq_graph import PrerequisiteGraph, normalize_course_id
+
+SEEDS = range(20)
+
+def random_requisites(rng, count=40, edges=60, cyclic=False):
+    """
+    {course: (prereqs, coreqs)} over `count` courses. Without `cyclic` every
+    prerequisite has a lower number than its course, so there are no cycles.
+    """
+    courses = [f"C {i:04d}" for i in range(count)]
+    requisites = {course: (set(), set()) for course in courses}
+    for _ in range(edges):
+        a, b = rng.sample(range(count), 2)
+        if not cyclic:
+            a, b = max(a, b), min(a, b)
+        kind = 0 if rng.random() < 0.8 else 1  # mostly prerequisites, some corequisites
+        requisites[courses[a]][kind].add(courses[b])
+    return requisites
+
+def reachable(requisites, course):
+    """
+    Every course `course` reaches over prerequisite edges, by plain search.
+    """
+    seen, stack = set(), [course]
+    while stack:
+        for required in requisites.get(stack.pop(), (set(), set()))[0]:
+            if required not in seen:
+                seen.add(required)
+                stack.append(required)
+    return seen
+
+def longest_chain(requisites, course, memo):
+    if course not in memo:
+        memo[course] = max((longest_chain(requisites, required, memo) + 1
+                            for required in requisites[course][0]), default=0)
+    return memo[course]
+
+def assert_closure(graph, requisites):
+    courses = set(requisites)
+    for prereqs, coreqs in requisites.values():
+        courses |= prereqs | coreqs
+    for course in courses:
+        upstream = reachable(requisites, course)
+        in_cycle = course in upstream
+        assert graph.upstream(course) == upstream - {course}
+        assert graph.downstream(course) == {other for other in courses
+                                            if other != course and course in reachable(requisites, other)}
+        assert any(course in cycle for cycle in graph.cycles) == in_cycle
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_closure_matches_a_plain_search(seed):
+    requisites = random_requisites(random.Random(seed))
+    graph = PrerequisiteGraph(requisites)
+
+    assert_closure(graph, requisites)
+    assert graph.cycles == []
+    memo = {}
+    assert all(graph.depth(course) == longest_chain(requisites, course, memo) for course in requisites)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cycles_are_the_strongly_connected_components(seed):
+    requisites = random_requisites(random.Random(seed), edges=50, cyclic=True)
+    graph = PrerequisiteGraph(requisites)
+
+    assert_closure(graph, requisites)
+    # A cycle is exactly the courses that reach each other
+    for cycle in graph.cycles:
+        members = set(cycle)
+        assert all(members - {course} <= reachable(requisites, course) for course in cycle)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_an_updated_graph_matches_a_rebuild(seed):
+    rng = random.Random(seed)
+    requisites = random_requisites(rng)
+    graph = PrerequisiteGraph(requisites)
+
+    changed = {course: (set(prereqs), set(coreqs)) for course, (prereqs, coreqs) in requisites.items()}
+    for course in rng.sample(sorted(changed), 5):
+        prereqs = changed[course][0]
+        if prereqs and rng.random() < 0.5:
+            prereqs.discard(rng.choice(sorted(prereqs)))
+        else:
+            prereqs.add(rng.choice(sorted(changed)))  # may go against the order, or close a cycle
+    updated = graph.updated(changed)
+    rebuilt = PrerequisiteGraph(changed)
+
+    assert updated.requisites() == rebuilt.requisites()
+    assert_closure(updated, changed)
+    assert sorted(updated.cycles) == sorted(rebuilt.cycles)
+    assert all(updated.depth(course) == rebuilt.depth(course) for course in changed)
+    # The graph requests are still reading is left as it was
+    assert_closure(graph, requisites)
+
+@pytest.mark.parametrize("typed", ["CE 3305", "ce3305", "Ce 3305", "CE\u00A03305", " ce  3305 "])
+def test_course_ids_are_normalized(typed):
+    assert normalize_course_id(typed) == "CE 3305"
+
+def test_chain_route_accepts_course_ids_as_typed(client):
+    expected = client.get("/api/courses/CE%203305/chain").get_json()
+    assert expected["course"] == "CE 3305" and expected["upstream"]
+
+    for typed in ("ce3305", "ce%203305", "CE%C2%A03305"):
+        assert client.get(f"/api/courses/{typed}/chain").get_json() == expected
+    assert client.get("/api/courses/CE%209999/chain").status_code == 404
@@ -0,0 +1,146 @@
+import sqlite3
+
+import pytest
+
+from app.scripts import professor_refresh
+from app.scripts.professor_refresh import MAX_ATTEMPTS, MAX_CALLS, parse_rating_page, refresh_professors
+from app.scripts.scraping import build_session
+from fixtures import RatingServer, professor_db, rating_page, rating_record
+
+PROFESSORS = 30
+IDS = [str(100000 + i) for i in range(PROFESSORS)]
+
+class Interrupted(Exception):
+    pass
+
+class InterruptingSession:
+    """
+    Wraps a session and raises Interrupted on the request after the first `after`.
+    """
+
+    def __init__(self, http, after):
+        self.http = http
+        self.after = after
+
+    def get(self, url, **kwargs):
+        self.after -= 1
+        if self.after < 0:
+            raise Interrupted(url)
+        return self.http.get(url, **kwargs)
+
+@pytest.fixture(autouse=True)
+def quick_backoff(monkeypatch):
+    monkeypatch.setattr(professor_refresh, "BACKOFF_BASE", 0.01)
+
+@pytest.fixture
+def db_path(tmp_path):
+    return professor_db(str(tmp_path / "professors.db"), PROFESSORS)
+
+@pytest.fixture
+def options(tmp_path):
+    return {"concurrency": 4, "rate": 200.0, "burst": 4, "batch_size": 5,
+            "grades_db": str(tmp_path / "no-grades.db")}
+
+def records(ids=IDS):
+    return {professor_id: rating_record(professor_id, seed=1) for professor_id in ids}
+
+def queue(db_path, run_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {professor_id: (status, attempts) for professor_id, status, attempts in conn.execute(
+            "SELECT Professor_Id, Status, Attempts FROM ProfessorRefreshQueue WHERE Run_Id = ?", (run_id,))}
+    finally:
+        conn.close()
+
+def stored_ratings(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0]: dict(zip(("name", "department", "quality_rating", "difficulty_rating", "total_ratings",
+                                  "would_take_again", "tags"), row[1:]))
+                for row in conn.execute("""
+                    SELECT id, rmp_name, department, quality_rating, difficulty_rating, total_ratings,
+                           would_take_again, tags
+                    FROM professors
+                """)}
+    finally:
+        conn.close()
+
+def successful_fetches(server):
+    fetched = {}
+    for _, path, status in server.log:
+        if status == 200:
+            professor_id = path.rstrip("/").rsplit("/", 1)[-1]
+            fetched[professor_id] = fetched.get(professor_id, 0) + 1
+    return fetched
+
+def test_an_interrupted_run_resumes_with_the_professors_it_had_not_finished(db_path, options):
+    served = records()
+    with RatingServer(served) as server:
+        http = InterruptingSession(build_session(retries=0), after=12)
+        with pytest.raises(Interrupted):
+            refresh_professors(db_path, base_url=server.url, http=http, **options)
+        run_id = professor_refresh.ProfessorRefresher(db_path).prepare()
+        finished = {professor_id for professor_id, (status, _) in queue(db_path, run_id).items() if status == "done"}
+        fetched_before = dict(successful_fetches(server))
+
+        resumed_id, complete, _ = refresh_professors(db_path, base_url=server.url, **options)
+
+    assert finished and len(finished) < PROFESSORS
+    assert (resumed_id, complete) == (run_id, True)
+    # Professors committed before the interruption weren't fetched again
+    fetched = successful_fetches(server)
+    assert all(fetched[professor_id] == fetched_before[professor_id] for professor_id in finished)
+    stored = stored_ratings(db_path)
+    assert all(stored[professor_id] == parse_rating_page(rating_page(record))
+               for professor_id, record in served.items())
+    assert {status for status, _ in queue(db_path, run_id).values()} == {"done"}
+
+def test_a_limited_call_leaves_the_rest_of_the_run_pending(db_path, options):
+    with RatingServer(records()) as server:
+        run_id, complete, first = refresh_professors(db_path, limit=10, base_url=server.url, **options)
+        resumed_id, resumed, second = refresh_professors(db_path, base_url=server.url, **options)
+
+    assert (complete, first["done"]) == (False, 10)
+    assert (resumed_id, resumed, second["done"]) == (run_id, True, PROFESSORS - 10)
+    assert max(successful_fetches(server).values()) == 1
+
+def test_a_429_pauses_every_worker_for_its_retry_after(db_path, options):
+    with RatingServer(records(), throttle_every=12, retry_after=0.5) as server:
+        _, complete, stats = refresh_professors(db_path, base_url=server.url, **options)
+
+    assert complete
+    throttled = [when for when, _, status in server.log if status == 429]
+    assert stats["throttled"] == len(throttled) > 0
+    for when in throttled:
+        # Requests already in flight finish; nothing new starts until the pause is over
+        during_pause = [t for t, _, _ in server.log if when + 0.1 < t < when + 0.45]
+        assert during_pause == []
+
+def test_server_errors_are_retried(db_path, options):
+    flaky = {IDS[0]: 2, IDS[1]: MAX_ATTEMPTS - 1}
+    with RatingServer(records(), flaky=flaky) as server:
+        run_id, complete, stats = refresh_professors(db_path, base_url=server.url, **options)
+
+    assert complete
+    assert queue(db_path, run_id)[IDS[0]] == ("done", 3)
+    assert queue(db_path, run_id)[IDS[1]] == ("done", MAX_ATTEMPTS)
+    assert stats["retries"] == 2 + MAX_ATTEMPTS - 1
+
+def test_a_transient_failure_keeps_the_run_open_until_it_succeeds(db_path, options):
+    with RatingServer(records(), flaky={IDS[0]: MAX_ATTEMPTS + 1}) as server:
+        run_id, complete, stats = refresh_professors(db_path, base_url=server.url, **options)
+        assert (complete, stats["deferred"]) == (False, 1)
+        assert queue(db_path, run_id)[IDS[0]] == ("pending", MAX_ATTEMPTS)
+
+        resumed_id, complete, stats = refresh_professors(db_path, base_url=server.url, **options)
+
+    assert (resumed_id, complete, stats["done"]) == (run_id, True, 1)
+    assert queue(db_path, run_id)[IDS[0]] == ("done", MAX_ATTEMPTS + 2)
+
+def test_a_professor_that_keeps_failing_is_given_up_on_after_max_calls(db_path, options):
+    with RatingServer(records(), flaky={IDS[0]: MAX_ATTEMPTS * MAX_CALLS}) as server:
+        results = [refresh_professors(db_path, base_url=server.url, **options) for _ in range(MAX_CALLS)]
+
+    assert [complete for _, complete, _ in results] == [False] * (MAX_CALLS - 1) + [True]
+    run_id = results[0][0]
+    assert queue(db_path, run_id)[IDS[0]] == ("failed", MAX_ATTEMPTS * MAX_CALLS)
@@ -0,0 +1,30 @@
+import pytest
+
+from app.config import Config
+from app.scripts import scraping
+from requisite_paths import spacy_requisites, stored_descriptions
+
+# Every catalog description that has a requisite block
+REQUISITE_DESCRIPTIONS = [(code, description) for _, code, description in stored_descriptions(Config.CLASSES_DB_PATH)
+                          if scraping._requisite_block(description) is not None]
+
+@pytest.fixture(scope="module")
+def nlp():
+    spacy = pytest.importorskip("spacy")
+    if not spacy.util.is_package("en_core_web_lg"):
+        pytest.skip("en_core_web_lg isn't installed")
+    return spacy.load("en_core_web_lg")
+
+@pytest.fixture
+def full_pipeline(nlp, monkeypatch):
+    # The batch path's mixed blocks go through the real model too, not a stub
+    monkeypatch.setattr(scraping, "_nlp", nlp)
+    scraping._requisite_cache.clear()
+    return nlp
+
+@pytest.mark.parametrize("code, description", REQUISITE_DESCRIPTIONS,
+                         ids=[code.replace("\u00A0", " ") for code, _ in REQUISITE_DESCRIPTIONS])
+def test_fast_path_matches_the_full_pipeline(code, description, full_pipeline):
+    [fast] = scraping.extract_requisites_batch([description])
+    prereqs, coreqs = spacy_requisites(description, full_pipeline)
+    assert (fast["prereqs"], fast["coreqs"]) == (prereqs, coreqs)
@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+from app.scripts import scraping
+from fixtures import CatalogServer, catalog_page, catalog_rows, department_pages, install_spacy_stub
+
+@pytest.fixture(autouse=True)
+def offline_nlp(monkeypatch):
+    monkeypatch.setattr(scraping, "_nlp", scraping._nlp)
+    install_spacy_stub()
+    scraping._requisite_cache.clear()
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "classes.db")
+
+def options(server, **overrides):
+    # No backoff, so retried requests don't slow the tests down
+    return {"base_url": server.url, "http": scraping.build_session(backoff=0), "min_interval": 0, **overrides}
+
+def plain(code):
+    return code.replace("\u00A0", " ")
+
+def rows_of(department):
+    return [row for row in catalog_rows() if plain(row[0]).startswith(department + " ")]
+
+def stored_courses(db_path, department):
+    """
+    {course id: name} of the department's own courses; prerequisites from other
+    departments are stored in the same table and left out.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT Course_Num, Course_Name FROM ClassesFor{department}").fetchall()
+    finally:
+        conn.close()
+    return {plain(code): name for code, name in rows if plain(code).startswith(department + " ")}
+
+def test_scrape_fetches_each_department_page_once(db_path):
+    with CatalogServer(department_pages()) as server:
+        assert scraping.scrape_departments(["CE", "CSE"], db_path=db_path, **options(server)) == ["CE", "CSE"]
+
+    departments = [department for _, department, _, _ in server.log]
+    # CE and CSE, plus the departments their prerequisites lead to, each downloaded once
+    assert {"CE", "CSE", "MATH", "PHYS"} <= set(departments)
+    assert len(departments) == len(set(departments))
+    assert len(stored_courses(db_path, "CE")) == len(rows_of("CE"))
+
+def test_pooled_session_keeps_connections_alive(db_path):
+    with CatalogServer(department_pages()) as server:
+        scraping.scrape_departments(["CE", "CSE"], db_path=db_path, **options(server, max_workers=2))
+
+    # Every request went over one of the two workers' kept-alive connections
+    assert len(server.log) > 2
+    assert len({port for _, _, _, port in server.log}) <= 2
+
+def test_rate_limiter_spaces_out_request_starts():
+    pages = department_pages()
+    with CatalogServer(pages) as server:
+        with scraping.CatalogScraper(**options(server, min_interval=0.05)) as catalog:
+            catalog.prefetch(pages)
+
+    starts = sorted(when for when, _, _, _ in server.log)
+    assert len(starts) == len(pages)
+    # Measured where the server receives them, so allow a little jitter
+    assert all(later - earlier > 0.03 for earlier, later in zip(starts, starts[1:]))
+
+def test_unchanged_pages_come_back_as_304(db_path):
+    with CatalogServer(department_pages()) as server:
+        scraping.scrape_departments(["CE", "CSE"], db_path=db_path, **options(server))
+        server.log.clear()
+        summary = scraping.refresh_departments(["CE", "CSE"], db_path=db_path, **options(server))
+
+    assert summary == {"CE": {"status": "not_modified"}, "CSE": {"status": "not_modified"}}
+    assert [status for _, _, status, _ in server.log] == [304, 304]
+
+def test_refresh_rewrites_only_the_blocks_that_changed(db_path):
+    pages = department_pages()
+    rows = rows_of("CE")
+    with CatalogServer(pages) as server:
+        scraping.scrape_departments(["CE"], db_path=db_path, **options(server))
+
+        (renamed_code, _, description), (removed_code, _, _) = rows[0], rows[1]
+        pages["CE"] = catalog_page(rows=[(renamed_code, "Renamed Course", description)] + rows[2:])
+        summary = scraping.refresh_departments(["CE"], db_path=db_path, **options(server))["CE"]
+
+    assert summary["status"] == "refreshed"
+    assert summary["added"] == []
+    assert [plain(code) for code in summary["changed"]] == [plain(renamed_code)]
+    assert [plain(code) for code in summary["removed"]] == [plain(removed_code)]
+    assert summary["unchanged"] == len(rows) - 2
+
+    stored = stored_courses(db_path, "CE")
+    assert stored[plain(renamed_code)] == "Renamed Course"
+    assert plain(removed_code) not in stored
+
+def test_transient_failures_are_retried(db_path):
+    with CatalogServer(department_pages(), flaky={"CE": 2}) as server:
+        assert scraping.scrape_departments(["CE"], db_path=db_path, **options(server)) == ["CE"]
+
+    assert [status for _, _, status, _ in server.requests_for("CE")] == [503, 503, 200]
+
+def test_a_page_that_keeps_failing_is_fetched_again_next_run(db_path):
+    session = scraping.build_session(retries=1, backoff=0)
+    with CatalogServer(department_pages(), flaky={"CE": 2}) as server:
+        first = scraping.refresh_departments(["CE"], db_path=db_path, **options(server, http=session))
+        second = scraping.refresh_departments(["CE"], db_path=db_path, **options(server, http=session))
+
+    assert first == {"CE": {"status": "failed"}}
+    # No validators were stored for the failed page, so the next run downloads all of it
+    assert second["CE"]["status"] == "refreshed"
+    assert len(second["CE"]["added"]) == len(rows_of("CE"))
@@ -0,0 +1,88 @@
+import io
+
+import pypdfium2
+import pytest
+
+from app.metrics import collect_stages
+from app.scripts import parse_transcript
+from app.scripts.parse_transcript import _page_count, _parse_parallel, page_texts_fast, parse_pages, split_pdf
+from fixtures import transcript_pdf
+
+@pytest.fixture
+def pool(monkeypatch):
+    # A pool of its own with more than one worker, whatever this machine has
+    parse_transcript._reset_pool()
+    monkeypatch.setattr(parse_transcript, "TRANSCRIPT_WORKERS", 3)
+    yield parse_transcript.get_pool()
+    parse_transcript._reset_pool()
+
+@pytest.fixture(scope="module")
+def transcript():
+    return transcript_pdf(9)
+
+def with_blank_pages(data, count):
+    """
+    The PDF with `count` blank pages put in front, which have no course on them;
+    just the blank pages when `data` is None.
+    """
+    padded = pypdfium2.PdfDocument.new()
+    try:
+        for _ in range(count):
+            padded.new_page(612, 792)
+        if data is not None:
+            source = pypdfium2.PdfDocument(data)
+            padded.import_pages(source)
+            source.close()
+        buffer = io.BytesIO()
+        padded.save(buffer)
+        return buffer.getvalue()
+    finally:
+        padded.close()
+
+def stage_names(stages):
+    return {name for name, _, _ in stages}
+
+def test_split_pdf_keeps_every_page_in_order(transcript):
+    data, _ = transcript
+    page_total = _page_count(data)
+    pieces = split_pdf(data, page_total, 3)
+
+    assert [_page_count(piece) for piece in pieces] == [page_total // 3] * 3
+    assert [text for piece in pieces for text in page_texts_fast(piece)] == page_texts_fast(data)
+    # Each worker gets its own pages, not the whole file
+    assert all(len(piece) < len(data) / 2 for piece in pieces)
+
+def test_parallel_matches_serial(pool, transcript):
+    data, expected = transcript
+
+    assert sorted(_parse_parallel(data, _page_count(data))) == sorted(parse_pages(data)) == expected
+
+def test_parse_transcript_bytes_uses_the_pool(pool, transcript):
+    data, expected = transcript
+    parse_transcript.clear_cache()
+    with collect_stages() as stages:
+        assert parse_transcript.parse_transcript_bytes(data) == expected
+
+    assert {"transcript.parallel", "transcript.split"} <= stage_names(stages)
+
+def test_a_piece_without_courses_does_not_fall_back_to_layout(pool, transcript):
+    data, expected = transcript
+    # The first worker's pages are all blank, which is fine for the document as a whole
+    padded = with_blank_pages(data, _page_count(data))
+
+    with collect_stages() as stages:
+        found = _parse_parallel(padded, _page_count(padded))
+
+    assert sorted(found) == sorted(parse_pages(padded)) == expected
+    assert "transcript.extract_page" in stage_names(stages)
+    assert "transcript.extract_page_layout" not in stage_names(stages)
+
+def test_a_document_without_courses_falls_back_to_layout_once(pool):
+    blank = with_blank_pages(None, 3)
+
+    with collect_stages() as stages:
+        assert _parse_parallel(blank, 3) == set()
+
+    # The workers' stages come back with their results: each page is read with layout once
+    layout_pages = [name for name, _, _ in stages if name == "transcript.extract_page_layout"]
+    assert len(layout_pages) == 3